@@ -21,6 +21,8 @@ BOARD_HEIGHT = CELL_SIZE * BOARD_ROWS
 BOARD_TOP = (SCREEN_HEIGHT - BOARD_HEIGHT) // 2
 BOARD_LEFT = (SCREEN_WIDTH - BOARD_WIDTH) // 2
 
+
+
 # Couleurs du damier
 LIGHT_SQUARE_COLOR = (240, 217, 181)  # beige
 DARK_SQUARE_COLOR = (181, 136, 99)    # marron
@@ -49,6 +51,100 @@ PIECE_LIFE = {
     "king": 4,
 }
 
+# Réseau : interpolation des entités distantes (secondes)
+INTERP_DELAY = 0.1  # retard d'affichage initial
+INTERP_MIN_DELAY = 0.03
+INTERP_MAX_DELAY = 0.3
+INTERP_JITTER_FACTOR = 3.0  # marge = intervalle moyen + facteur * gigue
+NET_INTERPOLATE_BALL = False  # client : balle affichée interpolée (retardée) plutôt qu'à la dernière position reçue
+
+# Réseau : contrôle adaptatif du débit d'envoi
+NET_RATE_QUEUE_HIGH = 8 * 1024  # octets en attente d'acquittement
+NET_RATE_RTT_INFLATION = 0.05  # hausse du RTT (s) signe de mise en file
+NET_RATE_PROBE_PERIOD = 0.5  # durée saine (s) avant de réaccélérer
+
+# Réseau : mesure du RTT et synchronisation d'horloge
+NET_PING_INTERVAL = 0.5  # secondes entre deux pings
+
+# Réseau : thread d'entrées/sorties
+NET_IO_QUEUE_SIZE = 1024  # messages au plus par file (événements à envoyer, reçus)
+NET_IO_WRITE_CHUNK = 64 * 1024  # taille maximale (octets) d'un lot encodé
+
+# Réseau : détection de coupure et reconnexion (secondes)
+NET_HEARTBEAT_INTERVAL = 0.1  # inactivité en émission avant un message de présence
+NET_HEARTBEAT_TIMEOUT = 0.5  # silence du pair au-delà duquel la connexion est perdue
+NET_RECONNECT_INTERVAL = 0.5  # délai entre deux tentatives de reconnexion du client
+NET_RECONNECT_TIMEOUT = 0.3  # attente maximale d'une tentative (connexion + reprise)
+NET_STATS_LOG_INTERVAL = 0.0  # période (s) du résumé de débit imprimé ; 0 : désactivé
+NET_CONNECT_TIMEOUT = 3.0  # attente maximale (s) de la connexion du client au serveur
+
+# Réseau : découverte des parties sur le réseau local
+NET_DISCOVERY_PORT = 5051  # port UDP des sondes et des annonces
+NET_DISCOVERY_SCAN_DURATION = 1.5  # durée (s) d'une recherche
+NET_DISCOVERY_PROBE_INTERVAL = 0.3  # période (s) de rediffusion de la sonde UDP
+NET_DISCOVERY_TIMEOUT = 0.3  # attente maximale (s) de connexion et de réponse d'une sonde TCP
+NET_DISCOVERY_PROBE_GRACE = 0.05  # attente (s) des premiers octets d'une connexion acceptée (sonde ou joueur)
+
+# Réseau : transport en mémoire partagée (deux processus sur la même machine)
+NET_SHM_CAPACITY = 256 * 1024  # taille (octets) de l'anneau de chaque sens
+
+# Réseau : capture des trames échangées (rejouables avec tools/replay_capture.py)
+NET_CAPTURE_DIR = None  # dossier des fichiers .cpcap ; None : pas de capture
+
+# Réseau : simulation de l'hôte dans un thread à cadence fixe
+NET_SERVER_TICK_THREAD = True  # False : simulation dans la boucle de rendu
+NET_SERVER_TICK_RATE = FPS  # ticks de simulation par seconde
+NET_SERVER_MAX_TICK_LAG = 5  # retard (en ticks) au-delà duquel les ticks manqués sont abandonnés
+
+# Réseau : synchronisation des paddles
+NET_PADDLE_MODE = "state"  # "state" (positions) ou "input" (touches simulées par le serveur)
+NET_INPUT_HISTORY = 120  # ticks d'entrées locales conservés pour la réconciliation
+NET_INPUT_MAX_DRIFT = 10  # écart (ticks) au-delà duquel le serveur se recale sur le tick client
+
+# Réseau : détection de désynchronisation par empreinte de l'état répliqué
+NET_STATE_HASH_INTERVAL = 30  # ticks serveur entre deux empreintes ; 0 : désactivé
+NET_STATE_HASH_MISMATCHES = 2  # empreintes différentes consécutives avant une demande de resynchronisation
+
+# Réseau : compensation de latence des coups de paddle (mode "state")
+NET_LAG_COMPENSATION = True  # juger les coups du client sur la balle qu'il voyait
+NET_LAG_COMP_MAX_REWIND = 15  # retour en arrière maximal (ticks serveur, 250 ms à 60 ticks/s)
+
+# Réseau : lockstep déterministe (les pairs n'échangent que leurs entrées)
+NET_SYNC_MODE = "state"  # "state" (hôte autoritaire) ou "lockstep"
+NET_LOCKSTEP_DELAY = 3  # ticks entre la saisie d'une entrée et son application
+NET_LOCKSTEP_MAX_CATCHUP = 4  # ticks simulés au plus par frame pour rattraper un retard
+
+# Réseau : rollback (lockstep avec prédiction des entrées distantes)
+NET_ROLLBACK_DELAY = 0  # ticks de délai d'entrée local (0 : réponse immédiate)
+NET_ROLLBACK_WINDOW = 15  # ticks prédits au plus avant d'attendre le pair
+
+# Serveur dédié (dedicated_server.py)
+DEDICATED_TICK_RATE = FPS  # ticks de simulation par seconde, toutes salles
+DEDICATED_JOIN_GRACE = 0.2  # attente (s) d'un MSG_JOIN avant appariement automatique
+DEDICATED_MAX_WRITE_BUFFER = 256 * 1024  # octets en attente avant déconnexion d'un joueur
+DEDICATED_MAX_TICK_LAG = 5  # retard (en ticks) au-delà duquel les ticks manqués sont abandonnés
+SPECTATOR_QUEUE_FRAMES = 120  # tampons en attente par spectateur lent (~2 s à 60 ticks/s)
+SPECTATOR_WRITE_HIGH = 64 * 1024  # octets en tampon transport avant mise en file
+DEDICATED_WORKERS = 1  # processus de simulation (0 = un par cœur) ; au-delà de 1, un accepteur frontal répartit les salles
+DEDICATED_SHARD_STATS_INTERVAL = 1.0  # période (s) des statistiques de charge envoyées par chaque processus
+DEDICATED_SHARD_LOG_INTERVAL = 10.0  # période (s) du résumé de charge affiché par l'accepteur
+
 # Police
 pygame.font.init()
 DEFAULT_FONT_NAME = pygame.font.get_default_font()
+
+
+def apply_board_rows(rows: int) -> None:
+    """Met à jour BOARD_ROWS et les valeurs dérivées.
+
+    À appeler avant d'importer les modules de jeu, qui lisent ces constantes
+    à l'import.
+    """
+    global BOARD_ROWS, BOARD_HEIGHT, BOARD_TOP, BOARD_WIDTH, BOARD_LEFT, LEFT_AREA_X, RIGHT_AREA_X
+    BOARD_ROWS = rows
+    BOARD_HEIGHT = CELL_SIZE * BOARD_ROWS
+    BOARD_TOP = (SCREEN_HEIGHT - BOARD_HEIGHT) // 2
+    BOARD_WIDTH = CELL_SIZE * BOARD_COLS
+    BOARD_LEFT = (SCREEN_WIDTH - BOARD_WIDTH) // 2
+    LEFT_AREA_X = BOARD_LEFT - 200
+    RIGHT_AREA_X = BOARD_LEFT + BOARD_WIDTH + 200
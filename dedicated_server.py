@@ -0,0 +1,86 @@
+"""Lance un serveur dédié Chess-Ping (sans fenêtre, plusieurs parties).
+
+Usage :
+    python dedicated_server.py --port 5050 --rows 2
+    python dedicated_server.py --workers 0    # un processus par cœur (Linux)
+
+Les joueurs utilisent « Rejoindre une partie (Client) » avec l'IP du serveur.
+Toutes les salles d'un même serveur partagent le nombre de lignes du plateau.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+
+# Pas de fenêtre : pilote vidéo factice (nécessaire pour charger les images des pièces)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# Laisser SIGINT/SIGTERM arrêter le processus (SDL les convertit sinon en événement QUIT)
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur dédié Chess-Ping")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--rows", type=int, choices=[2, 4, 6, 8], default=2)
+    parser.add_argument("--first-server", choices=["left", "right"], default="left")
+    parser.add_argument("--tick-rate", type=int, default=config.DEDICATED_TICK_RATE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.DEDICATED_WORKERS,
+        help="processus de simulation (0 = un par cœur)",
+    )
+    args = parser.parse_args()
+    workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+
+    if workers > 1:
+        if not hasattr(socket, "send_fds") or not hasattr(socket, "SOCK_SEQPACKET"):
+            parser.error("--workers > 1 n'est disponible que sous Linux")
+        # Accepteur frontal : les processus de travail initialisent eux-mêmes pygame
+        from game.sharded_server import ShardFront
+
+        front = ShardFront(
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            rows=args.rows,
+            first_server=args.first_server,
+            tick_rate=args.tick_rate,
+        )
+        try:
+            asyncio.run(front.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    # Configurer le plateau avant d'importer les modules de jeu
+    config.apply_board_rows(args.rows)
+    from game.ui.pre_game_config import make_default_setup
+    from game.dedicated_server import DedicatedServer
+
+    server = DedicatedServer(
+        host=args.host,
+        port=args.port,
+        setup=make_default_setup(args.rows),
+        first_server=args.first_server,
+        tick_rate=args.tick_rate,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
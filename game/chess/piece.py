@@ -12,6 +12,7 @@ class Piece:
     kind: str  # "pawn", "rook", "knight", "bishop", "queen", "king"
     color: str  # "white" ou "dark"
     position: Tuple[int, int]
+    piece_id: int = -1  # identifiant stable, attribué par le moteur à la création
 
     def __post_init__(self):
         self.max_life = PIECE_LIFE.get(self.kind, 1)
@@ -34,8 +35,11 @@ class Piece:
             return
         surface.blit(self.image, self.rect)
 
-    def draw_life_bar(self, surface: pygame.Surface):
-        if not self.alive or self.max_life <= 0:
+    def draw_life_bar(self, surface: pygame.Surface, life: int | None = None):
+        # life remplace la vie courante (rendu depuis un instantané d'état)
+        if life is None:
+            life = self.life
+        if life <= 0 or self.max_life <= 0:
             return
         # petite barre de vie au-dessus de la pièce
         bar_width = self.rect.width
@@ -43,7 +47,7 @@ class Piece:
         x = self.rect.left
         y = self.rect.top - bar_height - 2
 
-        ratio = self.life / self.max_life
+        ratio = life / self.max_life
         filled_width = int(bar_width * ratio)
 
         pygame.draw.rect(surface, (255, 0, 0), (x, y, bar_width, bar_height))
@@ -51,7 +55,7 @@ class Piece:
 
         # Afficher la vie numérique actuelle sous la pièce, à l'intérieur de la case
         font = pygame.font.Font(None, 16)
-        life_text = str(self.life)
+        life_text = str(life)
         # Noir pour les pièces blanches, blanc pour les pièces noires
         text_color = (0, 0, 0) if self.color == "white" else (255, 255, 255)
         text_surface = font.render(life_text, True, text_color)
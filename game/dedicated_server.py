@@ -0,0 +1,496 @@
+"""Serveur dédié Chess-Ping : plusieurs parties (salles) dans un seul processus.
+
+Le serveur n'a pas de fenêtre : les deux joueurs se connectent comme des
+clients ordinaires (ChessPingClient) et chaque salle exécute la simulation
+autoritaire avec un NetworkGameEngine en mode serveur, sans paddle local.
+
+Toutes les connexions sont gérées par une seule boucle asyncio non bloquante,
+et un ordonnanceur de ticks unique avance toutes les salles à cadence fixe.
+
+Appariement : après sa connexion, un client peut envoyer ``MSG_JOIN`` avec un
+nom de salle (partie privée). Sans message dans les JOIN_GRACE secondes, il
+est apparié automatiquement avec le prochain joueur en attente. Le premier
+joueur arrivé dans une salle joue à gauche.
+
+Spectateurs : un ``MSG_JOIN`` avec ``spectate`` abonne la connexion au flux
+autoritaire d'une salle. Chaque tick est encodé une seule fois et le même
+tampon immuable est écrit à tous les abonnés ; un spectateur lent accumule
+les tampons dans sa propre file bornée, où les anciens états (balle,
+paddles) sont abandonnés en premier. Le tick de jeu n'attend jamais un
+spectateur.
+
+Découverte : le serveur répond aux sondes UDP sur NET_DISCOVERY_PORT et aux
+sondes TCP (MSG_DISCOVER en premier message) par son annonce (cf.
+game/net/discovery.py).
+
+Plusieurs processus : game/sharded_server.py répartit les salles entre des
+processus de travail, chacun exécutant un DedicatedServer sans socket
+d'écoute.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+import pygame
+
+from config import (
+    DEDICATED_JOIN_GRACE,
+    DEDICATED_MAX_TICK_LAG,
+    DEDICATED_MAX_WRITE_BUFFER,
+    DEDICATED_TICK_RATE,
+    NET_DISCOVERY_PORT,
+    NET_LAG_COMPENSATION,
+    NET_PADDLE_MODE,
+    SPECTATOR_QUEUE_FRAMES,
+    SPECTATOR_WRITE_HIGH,
+)
+from game.network_engine import NetworkGameEngine
+from game.net import protocol
+from game.net.clock_sync import ClockSync, process_sync_messages
+from game.net.connection import ENCODING, FrameReader
+from game.net.discovery import DiscoveryResponder, announce_line
+from game.net.rate_control import SendRateController
+from game.net.stats import NetStats
+from game.net.transport import Transport, send_ping_if_due
+
+
+def _opposite(side: str) -> str:
+    return "right" if side == "left" else "left"
+
+
+class PlayerSession(asyncio.Protocol):
+    """Connexion d'un joueur au serveur dédié.
+
+    Args:
+        server: Serveur propriétaire de la connexion
+        placed: Connexion déjà placée par l'accepteur frontal (cf.
+            game/sharded_server.py) : pas d'attente de MSG_JOIN
+    """
+
+    def __init__(self, server: "DedicatedServer", placed: bool = False):
+        self.server = server
+        self.transport: asyncio.Transport | None = None
+        self.reader = FrameReader()
+        self.inbox: List[Dict[str, Any]] = []
+        self.clock_sync = ClockSync()
+        # Remplacé par le contrôleur de la salle une fois placé
+        self.rate_controller = SendRateController()
+        self.room: "Room | None" = None
+        self.side: str | None = None
+        self.joined = placed
+        self._join_timer: asyncio.TimerHandle | None = None
+
+        # Spectateur : salle regardée et file bornée des tampons diffusés
+        # en attente d'écriture (tampon, abandonnable)
+        self.spectating: "Room | None" = None
+        self.backlog: Deque[Tuple[bytes, bool]] = deque()
+        self.dropped_frames = 0
+        self._paused = False
+
+    # ---- Callbacks asyncio ----
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+        if not self.joined:
+            loop = asyncio.get_running_loop()
+            self._join_timer = loop.call_later(DEDICATED_JOIN_GRACE, self._join, None)
+
+    def data_received(self, data: bytes) -> None:
+        self.reader.feed(data)
+        messages = process_sync_messages(self, self.reader.read_messages(), time.monotonic())
+        for msg in messages:
+            if msg.get("type") == protocol.MSG_HEARTBEAT:
+                continue
+            if not self.joined and msg.get("type") == protocol.MSG_DISCOVER:
+                # Sonde de découverte : annonce, puis fermeture
+                self.transport.write(announce_line(self.server.port, dedicated=True))
+                self.close()
+                return
+            if not self.joined and msg.get("type") == protocol.MSG_JOIN:
+                room = msg.get("room")
+                self._join(room if isinstance(room, str) and room else None, bool(msg.get("spectate")))
+                continue
+            if self.spectating is None:
+                self.inbox.append(msg)
+
+    def pause_writing(self) -> None:
+        self._paused = True
+
+    def resume_writing(self) -> None:
+        self._paused = False
+        while self.backlog and not self._paused and self.transport is not None:
+            data, _droppable = self.backlog.popleft()
+            self.transport.write(data)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if self._join_timer is not None:
+            self._join_timer.cancel()
+        self.transport = None
+        self.server.on_session_closed(self)
+
+    # ---- Envoi ----
+
+    def _join(self, room: str | None, spectate: bool = False) -> None:
+        if self.joined or self.transport is None:
+            return
+        if self._join_timer is not None:
+            self._join_timer.cancel()
+            self._join_timer = None
+        self.joined = True
+        if spectate:
+            self.server.spectate(self, room)
+        else:
+            self.server.join(self, room)
+
+    @property
+    def write_buffer_size(self) -> int:
+        if self.transport is None:
+            return 0
+        return self.transport.get_write_buffer_size()
+
+    def write(self, data: bytes) -> bool:
+        """Écrit des octets déjà encodés. Un joueur bloqué trop longtemps est déconnecté."""
+        if self.transport is None or self.transport.is_closing():
+            return False
+        if self.transport.get_write_buffer_size() > DEDICATED_MAX_WRITE_BUFFER:
+            self.transport.abort()
+            return False
+        self.transport.write(data)
+        return True
+
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        return self.write((json.dumps(message) + "\n").encode(ENCODING))
+
+    def push_frame(self, data: bytes, droppable: bool) -> None:
+        """Diffuse un tampon à un spectateur sans jamais bloquer le tick.
+
+        Si le transport est saturé, le tampon est mis en file ; quand la file
+        est pleine, le plus ancien tampon abandonnable est retiré. Un spectateur
+        dont la file ne contient plus que des événements est déconnecté.
+        """
+        if self.transport is None:
+            return
+        if not self._paused and not self.backlog:
+            self.transport.write(data)
+            return
+        if len(self.backlog) >= SPECTATOR_QUEUE_FRAMES:
+            for i, (_old, old_droppable) in enumerate(self.backlog):
+                if old_droppable:
+                    del self.backlog[i]
+                    self.dropped_frames += 1
+                    break
+            else:
+                self.transport.abort()
+                return
+        self.backlog.append((data, droppable))
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+
+class RoomConnection(Transport):
+    """Connexion vue par le moteur d'une salle, à la place d'un ChessPingServer.
+
+    Les messages d'un tick sont encodés une seule fois, en deux tampons :
+    les événements (touches, destructions, scores...) et les états. Les mêmes
+    tampons sont écrits aux joueurs et aux spectateurs. Les messages reçus
+    sont marqués avec le côté de leur émetteur (champ "side"), ce qui empêche
+    un joueur de piloter le paddle adverse.
+
+    Chaque joueur a sa propre horloge : la mesure du RTT est faite par
+    joueur, ``rtt`` est celui du joueur le plus lointain.
+    """
+
+    def __init__(self, players: Dict[str, PlayerSession]):
+        self.players = players
+        self.spectators: List[PlayerSession] = []
+        self.rate_controller = SendRateController()
+        self.stats = NetStats("salle")
+        self._events: List[bytes] = []
+        self._states: List[bytes] = []
+
+    @property
+    def connected(self) -> bool:
+        return all(player.transport is not None for player in self.players.values())
+
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        start = time.perf_counter_ns()
+        line = (json.dumps(message) + "\n").encode(ENCODING)
+        self.stats.on_encoded(message.get("type"), len(line), time.perf_counter_ns() - start)
+        if message.get("type") in protocol.STATE_MESSAGE_TYPES:
+            self._states.append(line)
+        else:
+            self._events.append(line)
+        return True
+
+    def flush(self) -> None:
+        """Écrit aux joueurs et aux spectateurs les messages produits pendant le tick."""
+        if self._events:
+            events = b"".join(self._events)
+            self._events.clear()
+            for player in self.players.values():
+                player.write(events)
+            for spectator in self.spectators:
+                spectator.push_frame(events, droppable=False)
+        if self._states:
+            states = b"".join(self._states)
+            self._states.clear()
+            for player in self.players.values():
+                player.write(states)
+            for spectator in self.spectators:
+                spectator.push_frame(states, droppable=True)
+
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        messages = []
+        for side, player in self.players.items():
+            for msg in player.inbox:
+                msg["side"] = side
+                messages.append(msg)
+            player.inbox.clear()
+        return messages
+
+    def update_send_rate(self) -> None:
+        depth = max(player.write_buffer_size for player in self.players.values())
+        self.rate_controller.update(None, queue_depth=depth)
+
+    def maybe_send_ping(self) -> None:
+        for player in self.players.values():
+            send_ping_if_due(player.clock_sync, player.send_game_message)
+
+    @property
+    def rtt(self) -> float | None:
+        rtts = [player.clock_sync.srtt for player in self.players.values() if player.clock_sync.srtt is not None]
+        return max(rtts, default=None)
+
+    @property
+    def clock_offset(self) -> float | None:
+        # Pas d'horloge commune aux deux joueurs
+        return None
+
+    def close(self) -> None:
+        for player in self.players.values():
+            player.close()
+
+
+class Room:
+    """Une partie en cours sur le serveur dédié."""
+
+    def __init__(
+        self,
+        name: str,
+        left: PlayerSession,
+        right: PlayerSession,
+        setup: Dict,
+        first_server: str,
+        screen: pygame.Surface,
+    ):
+        self.name = name
+        self.setup = setup
+        self.first_server = first_server
+        self.players = {"left": left, "right": right}
+        self.conn = RoomConnection(self.players)
+        self.engine = NetworkGameEngine(
+            screen,
+            setup_config=setup,
+            first_server=first_server,
+            network_mode="server",
+            server_conn=self.conn,
+            controlled_paddle=None,
+            paddle_mode=NET_PADDLE_MODE,
+            lag_compensation=NET_LAG_COMPENSATION,
+        )
+        # Identifiants des pièces au début de la partie : un spectateur arrivant
+        # en cours de partie les reçoit, puis un instantané de l'état courant
+        self.initial_piece_ids = self.engine.piece_ids()
+
+        for side, player in self.players.items():
+            player.room = self
+            player.side = side
+            player.rate_controller = self.conn.rate_controller
+            # Le client joue le paddle opposé à "l'hôte" annoncé
+            config_msg = protocol.make_config_message(
+                setup,
+                first_server,
+                _opposite(side),
+                ball_speed_factor=self.engine.ball_speed_factor,
+                piece_ids=self.initial_piece_ids,
+                paddle_mode=NET_PADDLE_MODE,
+            )
+            player.send_game_message(config_msg)
+
+    def add_spectator(self, session: PlayerSession) -> None:
+        """Abonne un spectateur : configuration, puis instantané de la partie en cours."""
+        session.spectating = self
+        if session.transport is not None:
+            session.transport.set_write_buffer_limits(high=SPECTATOR_WRITE_HIGH)
+        config_msg = protocol.make_config_message(
+            self.setup,
+            self.first_server,
+            "left",
+            ball_speed_factor=self.engine.ball_speed_factor,
+            spectator=True,
+            piece_ids=self.initial_piece_ids,
+        )
+        session.send_game_message(config_msg)
+        snapshot = protocol.stamp_message(self.engine.snapshot_state(), self.engine.server_tick, time.monotonic())
+        session.push_frame((json.dumps(snapshot) + "\n").encode(ENCODING), droppable=False)
+        self.conn.spectators.append(session)
+
+    def remove_spectator(self, session: PlayerSession) -> None:
+        session.spectating = None
+        if session in self.conn.spectators:
+            self.conn.spectators.remove(session)
+
+    def tick(self) -> None:
+        self.engine.advance_server_tick()
+        self.conn.flush()
+
+    def close(self) -> None:
+        for player in self.players.values():
+            player.room = None
+        self.conn.close()
+        for spectator in list(self.conn.spectators):
+            self.remove_spectator(spectator)
+            spectator.close()
+
+
+class DedicatedServer:
+    """Serveur asyncio hébergeant de nombreuses salles.
+
+    Args:
+        host, port: Adresse d'écoute
+        setup: Configuration de partie utilisée par toutes les salles
+        first_server: Côté qui sert en premier
+        tick_rate: Cadence de simulation (ticks par seconde), commune à toutes les salles
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 5050,
+        setup: Dict | None = None,
+        first_server: str = "left",
+        tick_rate: int = DEDICATED_TICK_RATE,
+    ):
+        self.host = host
+        self.port = port
+        self.setup = setup
+        self.first_server = first_server
+        self.tick_rate = tick_rate
+
+        self.rooms: Dict[str, Room] = {}
+        # Appelé avec le nom de chaque salle fermée (processus de travail)
+        self.on_room_closed: Callable[[str], None] | None = None
+        # Temps passé à avancer les salles et nombre de ticks (statistiques de charge)
+        self.tick_busy = 0.0
+        self.ticks = 0
+        # Joueur en attente d'adversaire, par nom de salle (None = appariement automatique)
+        self.waiting: Dict[str | None, PlayerSession] = {}
+        self._room_ids = itertools.count(1)
+        # Surface factice : les salles ne dessinent jamais
+        self._screen = pygame.Surface((1, 1))
+        self._server: asyncio.AbstractServer | None = None
+
+    # ---- Salles ----
+
+    def join(self, session: PlayerSession, room_name: str | None) -> None:
+        if room_name is not None and room_name in self.rooms:
+            # Salle déjà complète
+            session.close()
+            return
+
+        opponent = self.waiting.pop(room_name, None)
+        if opponent is None or opponent.transport is None:
+            self.waiting[room_name] = session
+            return
+
+        name = room_name if room_name is not None else f"auto-{next(self._room_ids)}"
+        self.open_room(name, opponent, session)
+
+    def open_room(self, name: str, left: PlayerSession, right: PlayerSession) -> Room:
+        """Démarre la partie de deux joueurs (le premier joue à gauche)."""
+        room = Room(name, left, right, self.setup, self.first_server, self._screen)
+        self.rooms[name] = room
+        print(f"Salle {name} ouverte ({len(self.rooms)} en cours)")
+        return room
+
+    def spectate(self, session: PlayerSession, room_name: str | None) -> None:
+        if room_name is None:
+            # Regarder une partie en cours quelconque
+            room = next(iter(self.rooms.values()), None)
+        else:
+            room = self.rooms.get(room_name)
+        if room is None:
+            session.close()
+            return
+        room.add_spectator(session)
+
+    def on_session_closed(self, session: PlayerSession) -> None:
+        for key, waiting in list(self.waiting.items()):
+            if waiting is session:
+                del self.waiting[key]
+        if session.spectating is not None:
+            session.spectating.remove_spectator(session)
+        if session.room is not None:
+            self.close_room(session.room)
+
+    def close_room(self, room: Room) -> None:
+        if self.rooms.get(room.name) is room:
+            del self.rooms[room.name]
+            print(f"Salle {room.name} fermée ({len(self.rooms)} en cours)")
+            if self.on_room_closed is not None:
+                self.on_room_closed(room.name)
+        room.close()
+
+    # ---- Boucles ----
+
+    async def tick_loop(self) -> None:
+        """Ordonnanceur commun : avance toutes les salles à cadence fixe.
+
+        L'échéance du tick suivant est calculée depuis la précédente (et non
+        depuis la fin du tick) pour ne pas dériver. En cas de retard important,
+        les ticks manqués sont abandonnés plutôt qu'exécutés en rafale.
+        """
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            start = time.perf_counter()
+            for room in list(self.rooms.values()):
+                try:
+                    room.tick()
+                except Exception as e:
+                    print(f"Erreur dans la salle {room.name}: {e}")
+                    self.close_room(room)
+            self.tick_busy += time.perf_counter() - start
+            self.ticks += 1
+
+            next_tick += period
+            delay = next_tick - loop.time()
+            if delay < -DEDICATED_MAX_TICK_LAG * period:
+                next_tick = loop.time()
+                delay = 0.0
+            await asyncio.sleep(max(0.0, delay))
+
+    async def serve_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: PlayerSession(self),
+            self.host,
+            self.port,
+            reuse_address=True,
+        )
+        try:
+            await loop.create_datagram_endpoint(
+                lambda: DiscoveryResponder(self.port), local_addr=(self.host, NET_DISCOVERY_PORT)
+            )
+        except OSError as e:
+            print(f"Découverte sur le réseau local indisponible: {e}")
+        print(f"Serveur dédié en écoute sur {self.host}:{self.port} ({self.tick_rate} ticks/s)")
+        async with self._server:
+            await asyncio.gather(self._server.serve_forever(), self.tick_loop())
@@ -37,6 +37,12 @@ class GameEngine:
         self.first_server = first_server  # "left" (Blancs) ou "right" (Noirs)
 
         self.pieces_left, self.pieces_right = self._create_pieces()
+        # Toutes les pièces créées (vivantes ou non), pour save_state/load_state
+        self._all_pieces_left = tuple(self.pieces_left)
+        self._all_pieces_right = tuple(self.pieces_right)
+        # Registre identifiant -> pièce (pièces vivantes uniquement)
+        self.pieces_by_id: Dict[int, Piece] = {}
+        self._register_pieces()
         self.board = ChessBoard(self.pieces_left, self.pieces_right)
         self.ball = Ball()
         self.left_paddle, self.right_paddle = self._create_paddles()
@@ -121,8 +127,14 @@ class GameEngine:
         # Angle initial : vers l'adversaire
         self.serve_angle = 0.0 if direction > 0 else math.pi
 
-    def _update_serve(self):
-        """Met à jour la position de la balle et l'angle de service tant que l'on sert."""
+    def _update_serve(self, aim: bool = True, aim_pos: Tuple[int, int] | None = None):
+        """Met à jour la position de la balle et l'angle de service tant que l'on sert.
+
+        Si aim est False, la balle reste attachée au paddle mais l'angle n'est
+        pas recalculé depuis la souris (service décidé par un joueur distant).
+        aim_pos remplace la position courante de la souris (relevée par le
+        thread de rendu quand la simulation tourne dans un autre thread).
+        """
         if not self.serving:
             return
 
@@ -140,8 +152,11 @@ class GameEngine:
         self.ball.y = y
         self.ball.rect.center = (int(x), int(y))
 
+        if not aim:
+            return
+
         # Calculer l'angle en fonction de la souris
-        mx, my = pygame.mouse.get_pos()
+        mx, my = aim_pos if aim_pos is not None else pygame.mouse.get_pos()
         dx = mx - x
         dy = my - y
         if dx == 0 and dy == 0:
@@ -150,23 +165,31 @@ class GameEngine:
         else:
             self.serve_angle = math.atan2(dy, dx)
 
-    def _draw_serve_arrow(self):
-        """Dessine une petite flèche indiquant la direction du service."""
-        if not self.serving:
-            return
+    def _draw_serve_arrow(self, origin: Tuple[float, float] | None = None, angle: float | None = None):
+        """Dessine une petite flèche indiquant la direction du service.
+
+        origin et angle remplacent la position de la balle et l'angle courants
+        (rendu depuis un instantané d'état).
+        """
+        if origin is None:
+            if not self.serving:
+                return
+            origin = (self.ball.x, self.ball.y)
+        if angle is None:
+            angle = self.serve_angle
 
-        cx, cy = int(self.ball.x), int(self.ball.y)
+        cx, cy = int(origin[0]), int(origin[1])
         length = 50
-        end_x = cx + int(math.cos(self.serve_angle) * length)
-        end_y = cy + int(math.sin(self.serve_angle) * length)
+        end_x = cx + int(math.cos(angle) * length)
+        end_y = cy + int(math.sin(angle) * length)
 
         # Ligne principale
         pygame.draw.line(self.screen, (255, 255, 0), (cx, cy), (end_x, end_y), 2)
 
         # Petite pointe de flèche
         head_len = 10
-        angle1 = self.serve_angle + math.radians(150)
-        angle2 = self.serve_angle - math.radians(150)
+        angle1 = angle + math.radians(150)
+        angle2 = angle - math.radians(150)
         head1 = (
             end_x + int(math.cos(angle1) * head_len),
             end_y + int(math.sin(angle1) * head_len),
@@ -377,8 +400,73 @@ class GameEngine:
         add_pieces_for_color("white", left_cols, pieces_left)
         add_pieces_for_color("dark", right_cols, pieces_right)
 
+        # Identifiants stables : ordre de création, gauche puis droite
+        for piece_id, piece in enumerate(pieces_left + pieces_right):
+            piece.piece_id = piece_id
+
         return pieces_left, pieces_right
 
+    def _register_pieces(self):
+        """Reconstruit le registre identifiant -> pièce à partir des listes."""
+        self.pieces_by_id = {piece.piece_id: piece for piece in self.pieces_left + self.pieces_right}
+
+    def piece_ids(self) -> Dict[str, List[int]]:
+        """Identifiants des pièces de chaque côté, dans l'ordre des listes."""
+        return {
+            "left": [piece.piece_id for piece in self.pieces_left],
+            "right": [piece.piece_id for piece in self.pieces_right],
+        }
+
+    def save_state(self) -> tuple:
+        """Instantané de l'état de simulation, restaurable par load_state.
+
+        Un tuple plat de valeurs immuables (balle, paddles, vies des pièces,
+        dernière pièce touchée, scores, service, vitesse) : quelques
+        microsecondes suffisent, ce qui permet un instantané à chaque tick.
+        """
+        return (
+            self.ball.save_state(),
+            self.left_paddle.rect.y,
+            self.right_paddle.rect.y,
+            tuple([piece.life for piece in self._all_pieces_left]),
+            tuple([piece.life for piece in self._all_pieces_right]),
+            self.last_hit_piece,
+            self.score_left,
+            self.score_right,
+            self.serving,
+            self.server_side,
+            self.serve_angle,
+            self.ball_speed_factor,
+        )
+
+    def load_state(self, state: tuple):
+        """Restaure un instantané produit par save_state."""
+        (
+            ball,
+            self.left_paddle.rect.y,
+            self.right_paddle.rect.y,
+            lives_left,
+            lives_right,
+            self.last_hit_piece,
+            self.score_left,
+            self.score_right,
+            self.serving,
+            self.server_side,
+            self.serve_angle,
+            self.ball_speed_factor,
+        ) = state
+        self.ball.load_state(ball)
+
+        # Les listes sont modifiées en place : le plateau et les panneaux les partagent
+        for pieces, all_pieces, lives in (
+            (self.pieces_left, self._all_pieces_left, lives_left),
+            (self.pieces_right, self._all_pieces_right, lives_right),
+        ):
+            for piece, life in zip(all_pieces, lives):
+                piece.life = life
+            pieces[:] = [piece for piece in all_pieces if piece.life > 0]
+        self._register_pieces()
+
     def _create_paddles(self):
         # Paddles à l'intérieur du plateau, devant les pions :
         # - gauche : entre les colonnes 1 (pions blancs) et 2
@@ -520,6 +608,7 @@ class GameEngine:
                 if not piece.alive:
                     print(f"REMOVE LEFT {piece.color} {piece.kind} (life={after}), score_right={self.score_right + 1}")
                     self.pieces_left.remove(piece)
+                    self.pieces_by_id.pop(piece.piece_id, None)
                     self.score_right += 1
                 self.last_hit_piece = piece
                 hit_handled = True
@@ -541,6 +630,7 @@ class GameEngine:
                     if not piece.alive:
                         print(f"REMOVE RIGHT {piece.color} {piece.kind} (life={after}), score_left={self.score_left + 1}")
                         self.pieces_right.remove(piece)
+                        self.pieces_by_id.pop(piece.piece_id, None)
                         self.score_left += 1
                     self.last_hit_piece = piece
                     break
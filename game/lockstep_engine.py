@@ -0,0 +1,305 @@
+"""GameEngine en lockstep déterministe pour le multijoueur en réseau.
+
+Les deux pairs exécutent la même simulation et n'échangent que leurs entrées
+de chaque tick (touches du paddle, visée et lancement du service, facteur de
+vitesse). Aucun état de balle ni de pièce ne transite : le débit ne dépend
+ni de la taille du plateau ni du nombre de pièces.
+
+Pour que les simulations restent identiques :
+
+- la balle est en virgule fixe (FixedBall) : aucun calcul flottant par tick ;
+- le service est transmis déjà converti en vitesse entière par le pair qui
+  lance, et le facteur de vitesse en dixièmes ;
+- le générateur aléatoire est initialisé avec une graine partagée.
+
+Une entrée saisie au tick T s'applique au tick T + delay : ce délai laisse
+aux entrées du pair distant le temps d'arriver. Si elles manquent, la
+simulation attend (aucune prédiction).
+"""
+
+from typing import Dict, Tuple
+import math
+import random
+import time
+
+import pygame
+
+from config import (
+    BALL_SPEED_X,
+    BALL_SPEED_Y,
+    FPS,
+    NET_LOCKSTEP_DELAY,
+    NET_LOCKSTEP_MAX_CATCHUP,
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+)
+from game.engine import GameEngine
+from game.net import protocol
+from game.pingpong.ball import FIXED_ONE, FixedBall
+
+# Entrées d'un pair pour un tick : (up, down, aim, launch, speed)
+TickInput = Tuple[bool, bool, int | None, Tuple[int, int] | None, int | None]
+EMPTY_INPUT: TickInput = (False, False, None, None, None)
+
+# Délai d'attente du pair distant avant d'afficher un bandeau (secondes)
+STALL_NOTICE_DELAY = 0.25
+
+
+class LockstepGameEngine(GameEngine):
+    """Partie réseau en lockstep : chaque pair simule, seules les entrées transitent.
+
+    Args:
+        screen: Surface d'affichage
+        setup_config: Configuration des pièces (identique chez les deux pairs)
+        first_server: Premier serveur, "left" ou "right"
+        conn: Connexion au pair (Transport : ChessPingServer, ChessPingClient...)
+        controlled_paddle: Paddle contrôlé localement, "left" ou "right"
+        seed: Graine partagée du générateur aléatoire
+        input_delay: Délai d'application des entrées, en ticks
+    """
+
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        setup_config: Dict | None = None,
+        first_server: str = "left",
+        conn=None,
+        controlled_paddle: str = "left",
+        seed: int = 0,
+        input_delay: int = NET_LOCKSTEP_DELAY,
+    ):
+        super().__init__(screen, setup_config, first_server)
+        self.conn = conn
+        self.controlled_paddle = controlled_paddle
+        self.remote_paddle = "right" if controlled_paddle == "left" else "left"
+        self.input_delay = input_delay
+
+        # Balle en virgule fixe et hasard reproductible
+        self.rng = random.Random(seed)
+        self.ball = FixedBall(self.rng)
+        self._reset_ball_for_serve()
+        # Facteur de vitesse en dixièmes : seule cette valeur entière est simulée
+        self.speed_tenths = 10
+
+        # Entrées par côté et par tick ; les premiers ticks n'ont pas d'entrée
+        self.inputs: Dict[str, Dict[int, TickInput]] = {"left": {}, "right": {}}
+        for side in self.inputs:
+            for tick in range(input_delay):
+                self.inputs[side][tick] = EMPTY_INPUT
+        self.sim_tick = 0
+        self.next_input_tick = input_delay
+
+        # Actions locales en attente de la prochaine entrée émise
+        self._pending_launch = False
+        self._pending_speed: int | None = None
+        self._stalled_since: float | None = None
+
+    # ---- Entrées ----
+
+    def _local_paddle(self):
+        return self.left_paddle if self.controlled_paddle == "left" else self.right_paddle
+
+    def _launch_velocity(self) -> Tuple[int, int]:
+        """Vitesse de service en virgule fixe pour un facteur 1.0, selon la visée locale."""
+        base = math.hypot(BALL_SPEED_X, BALL_SPEED_Y) * FIXED_ONE
+        return round(math.cos(self.serve_angle) * base), round(math.sin(self.serve_angle) * base)
+
+    def _produce_local_input(self, keys):
+        """Émet l'entrée locale du prochain tick, au plus input_delay ticks en avance."""
+        if self.next_input_tick > self.sim_tick + self.input_delay:
+            return
+        paddle = self._local_paddle()
+        our_serve = self.serving and self.server_side == self.controlled_paddle
+        aim = round(self.serve_angle * 1000) if our_serve else None
+        launch = self._launch_velocity() if our_serve and self._pending_launch else None
+        tick_input: TickInput = (
+            bool(keys[paddle.up_key]),
+            bool(keys[paddle.down_key]),
+            aim,
+            launch,
+            self._pending_speed,
+        )
+        self._pending_launch = False
+        self._pending_speed = None
+
+        tick = self.next_input_tick
+        self.inputs[self.controlled_paddle][tick] = tick_input
+        up, down, aim, launch, speed = tick_input
+        self.conn.send_game_message(
+            protocol.make_lockstep_input_message(
+                tick, up, down, aim, list(launch) if launch else None, speed
+            )
+        )
+        self.next_input_tick += 1
+
+    def _recv_remote_inputs(self):
+        """Range les entrées reçues du pair distant par tick."""
+        for msg in self.conn.recv_game_messages():
+            if msg.get("type") != protocol.MSG_LOCKSTEP_INPUT:
+                continue
+            tick = msg.get("tick")
+            if not isinstance(tick, int):
+                continue
+            aim = msg.get("aim")
+            launch = msg.get("launch")
+            speed = msg.get("speed")
+            if not (isinstance(launch, list) and len(launch) == 2 and all(isinstance(v, int) for v in launch)):
+                launch = None
+            self._on_remote_input(
+                tick,
+                (
+                    bool(msg.get("up")),
+                    bool(msg.get("down")),
+                    aim if isinstance(aim, int) else None,
+                    tuple(launch) if launch else None,
+                    speed if isinstance(speed, int) else None,
+                ),
+            )
+
+    def _on_remote_input(self, tick: int, tick_input: TickInput):
+        """Enregistre l'entrée du pair distant pour un tick pas encore simulé."""
+        if tick >= self.sim_tick:
+            self.inputs[self.remote_paddle][tick] = tick_input
+
+    # ---- Simulation ----
+
+    def save_state(self) -> tuple:
+        return (super().save_state(), self.speed_tenths)
+
+    def load_state(self, state: tuple):
+        base, self.speed_tenths = state
+        super().load_state(base)
+
+    def _apply_speed(self, tenths: int):
+        """Change le facteur de vitesse, en arithmétique entière."""
+        tenths = max(round(self.ball_speed_min * 10), min(round(self.ball_speed_max * 10), tenths))
+        if tenths == self.speed_tenths:
+            return
+        if not self.serving:
+            self.ball.fvx = self.ball.fvx * tenths // self.speed_tenths
+            self.ball.fvy = self.ball.fvy * tenths // self.speed_tenths
+        self.speed_tenths = tenths
+        self.ball_speed_factor = tenths / 10
+
+    def step(self, tick_inputs: Dict[str, TickInput]):
+        """Avance la simulation d'un tick ; identique chez les deux pairs."""
+        for side, paddle in (("left", self.left_paddle), ("right", self.right_paddle)):
+            up, down, aim, launch, speed = tick_inputs[side]
+            paddle.update({paddle.up_key: up, paddle.down_key: down})
+            if speed is not None:
+                self._apply_speed(speed)
+            if self.serving and side == self.server_side:
+                # La visée locale est déjà à jour ; celle du pair ne sert qu'à l'affichage
+                if aim is not None and side != self.controlled_paddle:
+                    self.serve_angle = aim / 1000
+                if launch is not None:
+                    self.ball.fvx = launch[0] * self.speed_tenths // 10
+                    self.ball.fvy = launch[1] * self.speed_tenths // 10
+                    self.serving = False
+
+        if self.serving:
+            self._update_serve(aim=False)
+        else:
+            self.ball.update()
+            self._handle_collisions()
+
+    def _advance(self) -> bool:
+        """Simule tous les ticks dont les deux entrées sont connues.
+
+        Retourne False si la simulation attend le pair distant.
+        """
+        left, right = self.inputs["left"], self.inputs["right"]
+        steps = 0
+        while steps < NET_LOCKSTEP_MAX_CATCHUP and self.sim_tick in left and self.sim_tick in right:
+            tick = self.sim_tick
+            self.step({"left": left.pop(tick), "right": right.pop(tick)})
+            self.sim_tick += 1
+            steps += 1
+        return steps > 0
+
+    def run_frame(self, keys) -> bool:
+        """Réception, entrée locale et simulation d'une frame, sans rendu.
+
+        Retourne False si la simulation est bloquée en attente du pair.
+        """
+        self._recv_remote_inputs()
+        self._produce_local_input(keys)
+        advanced = self._advance()
+        self.conn.maybe_send_ping()
+        if advanced:
+            self._stalled_since = None
+        elif self._stalled_since is None:
+            self._stalled_since = time.monotonic()
+        return advanced
+
+    # ---- Boucle de jeu ----
+
+    def _draw_stall(self):
+        """Bandeau affiché quand le pair distant ne suit plus."""
+        if self.conn.connected:
+            label = "En attente du joueur distant..."
+        else:
+            label = "Connexion perdue"
+        text = self.font.render(label, True, (255, 200, 0))
+        rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        backdrop = pygame.Surface((rect.width + 30, rect.height + 20), pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 200))
+        self.screen.blit(backdrop, backdrop.get_rect(center=rect.center))
+        self.screen.blit(text, rect)
+
+    def game_loop(self):
+        """Boucle de jeu lockstep."""
+        running = True
+        while running:
+            self.clock.tick(FPS)
+            our_serve = self.serving and self.server_side == self.controlled_paddle
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                # Gérer les événements des panneaux de configuration
+                self.white_config_panel.handle_event(event)
+                self.dark_config_panel.handle_event(event)
+
+                # Les boutons de vitesse produisent une entrée, appliquée par les deux pairs
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    current = self._pending_speed if self._pending_speed is not None else self.speed_tenths
+                    if self._speed_minus_rect.collidepoint(event.pos):
+                        self._pending_speed = current - 1
+                    elif self._speed_plus_rect.collidepoint(event.pos):
+                        self._pending_speed = current + 1
+                    elif our_serve:
+                        self._pending_launch = True
+                if our_serve and event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                    self._pending_launch = True
+
+            # Visée locale pendant notre service (affichage et vitesse de lancement)
+            if our_serve:
+                self._update_serve()
+
+            self.run_frame(pygame.key.get_pressed())
+
+            # Rendu
+            self.screen.fill((30, 30, 30))
+            self.board.draw_board(self.screen)
+            self.board.draw_pieces(self.screen)
+            self.left_paddle.draw(self.screen)
+            self.right_paddle.draw(self.screen)
+            self.ball.draw(self.screen)
+            self._draw_serve_arrow()
+            self._draw_hud()
+
+            footer_y = self.white_config_panel.y
+            footer_height = self.white_config_panel.get_height()
+            footer_surface = pygame.Surface((SCREEN_WIDTH, footer_height), pygame.SRCALPHA)
+            footer_surface.fill((10, 10, 20, 180))
+            self.screen.blit(footer_surface, (0, footer_y))
+            self.white_config_panel.draw(self.screen)
+            self.dark_config_panel.draw(self.screen)
+
+            if self._stalled_since is not None and time.monotonic() - self._stalled_since > STALL_NOTICE_DELAY:
+                self._draw_stall()
+
+            pygame.display.flip()
+
@@ -0,0 +1,95 @@
+"""Capture des trames d'une connexion de jeu, pour rejouer une session hors ligne.
+
+Fichier binaire : l'en-tête ``MAGIC``, puis une suite d'enregistrements
+
+    instant (uint64, ns, time.monotonic_ns) | sens (uint8) | longueur (uint32) | trame
+
+en little-endian. La trame est la ligne JSON sans son '\n'. Sens :
+
+- ``DIR_IN`` : trame reçue, enregistrée à son décodage ;
+- ``DIR_OUT`` : trame envoyée, enregistrée à son encodage ;
+- ``DIR_META`` : description de la capture (JSON : rôle, date), en premier.
+
+Les enregistrements sont écrits par le thread réseau de la connexion (et par
+la boucle de jeu avant son démarrage, pour la configuration) ; un verrou
+garde l'ordre des écritures. Le fichier est tamponné : une capture active
+coûte une copie et un ``write`` en mémoire par trame.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Tuple
+
+MAGIC = b"CPCAP\x00\x01\n"
+RECORD = struct.Struct("<QBI")
+
+DIR_IN = 0
+DIR_OUT = 1
+DIR_META = 2
+
+
+class CaptureWriter:
+    """Enregistre les trames d'une connexion dans un fichier de capture.
+
+    Args:
+        path: Fichier créé (les dossiers manquants aussi)
+        role: Rôle de la connexion capturée ("server" ou "client")
+    """
+
+    def __init__(self, path: str, role: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb", buffering=256 * 1024)
+        self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.records = 0
+        self.record(DIR_META, json.dumps({"role": role, "time": time.time()}).encode("utf-8"))
+
+    def record(self, direction: int, frame: bytes) -> None:
+        """Ajoute une trame (sans '\n') horodatée maintenant."""
+        header = RECORD.pack(time.monotonic_ns(), direction, len(frame))
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(header)
+            self.file.write(frame)
+            self.records += 1
+
+    def record_message(self, direction: int, message: Dict[str, Any]) -> None:
+        """Ajoute un message déjà décodé (lu hors du thread réseau, ex: configuration)."""
+        self.record(direction, json.dumps(message).encode("utf-8"))
+
+    def close(self) -> None:
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def capture_path(directory: str, role: str) -> str:
+    """Nom de fichier de capture horodaté pour une connexion."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{role}-{stamp}-{os.getpid()}.cpcap")
+
+
+def read_capture(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """Parcourt une capture : (instant en ns, sens, trame) par enregistrement.
+
+    Un dernier enregistrement tronqué (processus interrompu) est ignoré.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas une capture Chess-Ping")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            t_ns, direction, size = RECORD.unpack(header)
+            frame = f.read(size)
+            if len(frame) < size:
+                return
+            yield t_ns, direction, frame
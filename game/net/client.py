@@ -1,48 +1,201 @@
+import errno
+import json
+import select
 import socket
+import time
 from typing import Any, Dict, List
 
-from .connection import recv_json, recv_json_nonblocking, send_json
+from config import NET_CONNECT_TIMEOUT, NET_RECONNECT_INTERVAL, NET_RECONNECT_TIMEOUT, NET_STATS_LOG_INTERVAL
+from .capture import DIR_IN, DIR_OUT, CaptureWriter
+from .connection import ENCODING, FrameReader, recv_json, send_json, get_unsent_bytes
+from .rate_control import SendRateController
+from .io_thread import NetworkIOThread
+from .clock_sync import ClockSync, process_sync_messages
+from .stats import NetStats
+from .transport import Transport
+from . import protocol
 
 
-class ChessPingClient:
-    """Client TCP simple pour Chess-Ping."""
+class ChessPingClient(Transport):
+    """Client TCP simple pour Chess-Ping.
 
-    def __init__(self, host: str, port: int = 5050):
+    Avec capture_path, toutes les trames échangées sont enregistrées (cf.
+    game/net/capture.py).
+    """
+
+    def __init__(self, host: str, port: int = 5050, capture_path: str | None = None):
         self.host = host
         self.port = port
         self.sock: socket.socket | None = None
-        self.recv_buffer = bytearray()
+        self.reader = FrameReader()
+        self.rate_controller = SendRateController()
+        self.clock_sync = ClockSync()
+        # Compteurs par type de message (cf. stats.snapshot())
+        self.stats = NetStats("client", NET_STATS_LOG_INTERVAL)
+        self.capture = CaptureWriter(capture_path, "client") if capture_path else None
+        # Thread réseau, démarré au premier échange de jeu (après la configuration)
+        self.io: NetworkIOThread | None = None
+        # Jeton de reprise annoncé par le serveur dans la configuration
+        self.session_token: str | None = None
+        # Tentative de reprise en cours (connexion non bloquante) et son échéance
+        self._resume_sock: socket.socket | None = None
+        self._resume_deadline = 0.0
+        self._next_resume = 0.0
+
+    def connect(self, timeout: float = NET_CONNECT_TIMEOUT) -> None:
+        """Se connecte au serveur en au plus ``timeout`` secondes (TimeoutError sinon)."""
+        self.start_connect()
+        deadline = time.monotonic() + timeout
+        while not self.poll_connect(max(0.0, deadline - time.monotonic())):
+            if time.monotonic() >= deadline:
+                self._drop_connection()
+                raise TimeoutError(f"{self.host}:{self.port} ne répond pas")
 
-    def connect(self) -> None:
+    def start_connect(self) -> None:
+        """Lance la connexion sans attendre ; la suivre avec poll_connect()."""
+        self._drop_connection()
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.connect((self.host, self.port))
+        self.sock.setblocking(False)
+        err = self.sock.connect_ex((self.host, self.port))
+        if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+            self._drop_connection()
+            raise OSError(err, f"Connexion à {self.host}:{self.port} impossible")
+
+    def poll_connect(self, timeout: float = 0.0) -> bool:
+        """Attend au plus ``timeout`` secondes la fin de la connexion lancée.
+
+        Retourne True une fois connecté (socket repassé en mode bloquant pour
+        la réception de la configuration), False si la connexion est en cours.
+        Lève OSError si elle a échoué.
+        """
+        if self.sock is None:
+            raise RuntimeError("Call start_connect() first.")
+        _, writable, _ = select.select([], [self.sock], [], timeout)
+        if not writable:
+            return False
+        err = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err != 0:
+            self._drop_connection()
+            raise OSError(err, f"Connexion à {self.host}:{self.port} impossible")
+        self.sock.setblocking(True)
+        return True
+
+    def join_room(self, room: str | None = None, spectate: bool = False) -> None:
+        """Demande une salle à un serveur dédié. À appeler juste après connect().
+
+        Sans appel, un serveur dédié apparie automatiquement le client.
+        """
+        if self.sock is None:
+            raise RuntimeError("Client not connected")
+        message = protocol.make_join_message(room, spectate)
+        send_json(self.sock, message)
+        if self.capture is not None:
+            self.capture.record_message(DIR_OUT, message)
 
     def recv_config(self) -> Dict[str, Any] | None:
         if self.sock is None:
             raise RuntimeError("Client not connected")
-        cfg = recv_json(self.sock)
+        return self._on_config(recv_json(self.sock, self.reader))
+
+    def poll_config(self, timeout: float = 0.0) -> Dict[str, Any] | None:
+        """Attend la configuration au plus ``timeout`` secondes (None si pas encore reçue).
+
+        Lève ConnectionError si le serveur ferme la connexion avant de l'envoyer.
+        """
+        if self.sock is None:
+            raise RuntimeError("Client not connected")
+        frame = self.reader.next_frame()
+        if frame is None:
+            readable, _, _ = select.select([self.sock], [], [], timeout)
+            if readable and self.reader.recv_once(self.sock) == 0:
+                raise ConnectionError("Le serveur a fermé la connexion")
+            frame = self.reader.next_frame()
+            if frame is None:
+                return None
+        try:
+            cfg = json.loads(frame)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            cfg = None
+        if not isinstance(cfg, dict):
+            raise ConnectionError("Configuration invalide")
+        return self._on_config(cfg)
+
+    def _on_config(self, cfg: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        if cfg is not None and cfg.get("type") == protocol.MSG_ERROR:
+            raise ConnectionError(f"Refusé par le serveur : {cfg.get('reason')}")
         # Après réception de la config, passer en mode non-bloquant
         if self.sock:
             self.sock.setblocking(False)
+        if cfg is not None and isinstance(cfg.get("session"), str):
+            self.session_token = cfg["session"]
+        if cfg is not None and self.capture is not None:
+            self.capture.record_message(DIR_IN, cfg)
+        if cfg is not None:
+            # Messages de présence dès la configuration : l'hôte ne doit pas
+            # conclure à une coupure pendant que ce côté prépare la partie
+            self._io_thread()
         return cfg
 
-    def send_game_message(self, message: Dict[str, Any]) -> bool:
-        """Envoie un message de jeu au serveur. Retourne False si échec."""
+    @property
+    def connected(self) -> bool:
+        """Serveur connecté et entendu récemment (messages de présence compris)."""
         if self.sock is None:
             return False
+        return self.io is None or self.io.alive
+
+    def reconnect(self, timeout: float = NET_RECONNECT_TIMEOUT) -> bool:
+        """Fait avancer, sans bloquer, la reprise de la partie en cours.
+
+        À appeler à chaque frame pendant une coupure. Une tentative (connexion
+        non bloquante, puis demande de reprise) est lancée toutes les
+        NET_RECONNECT_INTERVAL secondes et abandonnée après ``timeout``
+        secondes. Retourne True une fois la demande envoyée : le serveur
+        répond par un MSG_FULL_STATE, reçu ensuite comme un message de jeu.
+        """
+        if self.session_token is None:
+            return False
+        now = time.monotonic()
+        if self._resume_sock is None:
+            if now < self._next_resume:
+                return False
+            self._next_resume = now + NET_RECONNECT_INTERVAL
+            self._drop_connection()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            err = sock.connect_ex((self.host, self.port))
+            if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                sock.close()
+                return False
+            self._resume_sock, self._resume_deadline = sock, now + timeout
+
+        sock = self._resume_sock
+        _, writable, _ = select.select([], [sock], [], 0)
+        if not writable:
+            if now >= self._resume_deadline:
+                self._abandon_resume()
+            return False
+        self._resume_sock = None
+        data = (json.dumps(protocol.make_resume_message(self.session_token)) + "\n").encode(ENCODING)
         try:
-            send_json(self.sock, message)
-            return True
-        except Exception:
+            failed = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0 or sock.send(data) != len(data)
+        except OSError:
+            failed = True
+        if failed:
+            sock.close()
             return False
+        self.sock = sock
+        self.reader = FrameReader()
+        return True
 
-    def recv_game_messages(self) -> List[Dict[str, Any]]:
-        """Reçoit tous les messages de jeu disponibles (non-bloquant)."""
-        if self.sock is None:
-            return []
-        return recv_json_nonblocking(self.sock, self.recv_buffer)
+    def _abandon_resume(self) -> None:
+        if self._resume_sock is not None:
+            self._resume_sock.close()
+            self._resume_sock = None
 
-    def close(self) -> None:
+    def _drop_connection(self) -> None:
+        if self.io is not None:
+            self.io.stop()
+            self.io = None
         if self.sock is not None:
             try:
                 self.sock.close()
@@ -50,3 +203,61 @@ class ChessPingClient:
                 pass
             self.sock = None
 
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        """Met un message de jeu en file d'envoi vers le serveur. Retourne False si échec."""
+        io = self._io_thread()
+        if io is None:
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        if not io.send(message):
+            self.rate_controller.on_send_failed()
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        return True
+
+    def _io_thread(self) -> NetworkIOThread | None:
+        """Thread réseau de la connexion, démarré à la première utilisation."""
+        if self.io is None and self.sock is not None:
+            self.io = NetworkIOThread(
+                self.sock,
+                self.reader,
+                on_sent=self.rate_controller.on_sent,
+                # Pings/pongs traités dans le thread réseau, à leur réception
+                filter_messages=lambda messages, recv_time: process_sync_messages(self, messages, recv_time),
+                stats=self.stats,
+                capture=self.capture,
+            )
+            self.io.start()
+        return self.io
+
+    def update_send_rate(self) -> None:
+        """Échantillonne le lien pour le contrôle adaptatif du débit (une fois par frame)."""
+        if self.sock is None:
+            return
+        # File d'envoi : octets non acquittés dans le noyau + octets encore en file côté thread
+        depth = get_unsent_bytes(self.sock) or 0
+        if self.io is not None:
+            depth += self.io.pending_bytes
+            self.stats.sample_queues(
+                coalesced=self.io.outbox.coalesced,
+                outbox=len(self.io.outbox),
+                inbox=len(self.io.inbox),
+                unsent_bytes=depth,
+            )
+        self.stats.maybe_log()
+        self.rate_controller.update(self.sock, queue_depth=depth)
+
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        """Retourne les messages de jeu reçus depuis le dernier appel (non-bloquant)."""
+        io = self._io_thread()
+        if io is None:
+            return []
+        # Les pings/pongs ont déjà été traités par le thread réseau
+        return io.receive()
+
+    def close(self) -> None:
+        self._abandon_resume()
+        self._drop_connection()
+        if self.capture is not None:
+            self.capture.close()
+
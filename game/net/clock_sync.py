@@ -0,0 +1,98 @@
+"""Mesure du RTT et synchronisation d'horloge entre pairs (échange de type NTP).
+
+Chaque pair envoie périodiquement un ``MSG_PING`` horodaté ``t0``. Le pair
+distant répond par un ``MSG_PONG`` contenant ``t0``, l'instant de réception
+``t1`` et l'instant d'envoi ``t2`` dans sa propre horloge. À la réception
+(``t3``) :
+
+    rtt    = (t3 - t0) - (t2 - t1)
+    offset = ((t1 - t0) + (t2 - t3)) / 2      # horloge distante - horloge locale
+
+L'écart d'horloge retenu est celui de l'échantillon de plus faible RTT parmi
+les derniers reçus (le moins perturbé par la mise en file d'attente).
+"""
+
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from config import NET_PING_INTERVAL
+from game.net import protocol
+
+
+class ClockSync:
+    """Estimateur lissé du RTT et de l'écart d'horloge avec le pair."""
+
+    RTT_GAIN = 1 / 8
+    RTTVAR_GAIN = 1 / 4
+
+    def __init__(self, window: int = 8, ping_interval: float = NET_PING_INTERVAL):
+        self.ping_interval = ping_interval
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=window)  # (rtt, offset)
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.offset: float | None = None
+        self._next_ping = 0.0
+
+    @property
+    def synced(self) -> bool:
+        return self.offset is not None
+
+    def ping_due(self, now: float) -> bool:
+        if now < self._next_ping:
+            return False
+        self._next_ping = now + self.ping_interval
+        return True
+
+    def on_pong(self, t0: float, t1: float, t2: float, t3: float) -> float | None:
+        """Intègre un échantillon. Retourne le RTT mesuré, ou None s'il est invalide."""
+        rtt = (t3 - t0) - (t2 - t1)
+        if rtt < 0:
+            return None
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += (abs(rtt - self.srtt) - self.rttvar) * self.RTTVAR_GAIN
+            self.srtt += (rtt - self.srtt) * self.RTT_GAIN
+
+        self.samples.append((rtt, offset))
+        self.offset = min(self.samples)[1]
+        return rtt
+
+    def to_local(self, remote_time: float) -> float:
+        """Convertit un instant de l'horloge du pair dans l'horloge locale."""
+        return remote_time - (self.offset or 0.0)
+
+    def to_remote(self, local_time: float) -> float:
+        """Convertit un instant de l'horloge locale dans l'horloge du pair."""
+        return local_time + (self.offset or 0.0)
+
+
+def process_sync_messages(conn, messages: List[Dict[str, Any]], recv_time: float) -> List[Dict[str, Any]]:
+    """Traite les pings/pongs reçus sur une connexion et retourne les autres messages.
+
+    ``conn`` est un Transport (attributs ``clock_sync``,
+    ``rate_controller`` et méthode ``send_game_message``).
+    """
+    game_messages = []
+    for msg in messages:
+        msg_type = msg.get("type")
+        if msg_type == protocol.MSG_PING:
+            t0 = msg.get("t0")
+            if isinstance(t0, (int, float)):
+                conn.send_game_message(protocol.make_pong_message(t0, recv_time, time.monotonic()))
+        elif msg_type == protocol.MSG_PONG:
+            try:
+                rtt = conn.clock_sync.on_pong(
+                    float(msg["t0"]), float(msg["t1"]), float(msg["t2"]), recv_time
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if rtt is not None:
+                conn.rate_controller.observe_rtt(rtt)
+        else:
+            game_messages.append(msg)
+    return game_messages
@@ -1,71 +1,203 @@
+import ipaddress
 import json
 import socket
+import sys
+import time
 from typing import Any, Dict, List
 
+from .capture import DIR_IN
+
+try:  # Disponible uniquement sur les systèmes Unix
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None
+    termios = None
+
 
 ENCODING = "utf-8"
 
 
-def send_json(sock: socket.socket, message: Dict[str, Any]) -> None:
-    """Envoie un message JSON terminé par un '\n'."""
-    data = json.dumps(message) + "\n"
-    sock.sendall(data.encode(ENCODING))
+def send_json(sock: socket.socket, message: Dict[str, Any]) -> int:
+    """Envoie un message JSON terminé par un '\n'. Retourne le nombre d'octets envoyés."""
+    data = (json.dumps(message) + "\n").encode(ENCODING)
+    sock.sendall(data)
+    return len(data)
 
 
-def recv_json(sock: socket.socket) -> Dict[str, Any] | None:
-    """Reçoit une ligne JSON depuis le socket. Bloquant, retourne None si fermé."""
-    buffer = b""
-    while True:
-        chunk = sock.recv(4096)
-        if not chunk:
+class FrameReader:
+    """Lecteur de trames JSON délimitées par '\n', sans copie intermédiaire.
+
+    Les données sont reçues avec ``recv_into`` directement dans un tampon
+    préalloué. Les trames sont repérées avec un offset qui avance dans le
+    tampon ; les octets non consommés ne sont ramenés en début de tampon que
+    lorsque la place libre en fin de tampon devient insuffisante. Le coût de
+    réception est ainsi linéaire en nombre d'octets reçus, et aucun octet
+    reçu n'est jamais perdu entre deux lectures.
+    """
+
+    # Place libre minimale en fin de tampon avant un recv_into
+    MIN_RECV_SPACE = 4096
+
+    def __init__(self, capacity: int = 64 * 1024):
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # début des octets non consommés
+        self.end = 0  # fin des octets reçus
+        self.closed = False  # le pair a fermé la connexion
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'octets reçus mais pas encore consommés."""
+        return self.end - self.start
+
+    def _make_room(self, space: int = MIN_RECV_SPACE) -> None:
+        """Garantit ``space`` octets libres en fin de tampon."""
+        if self.start == self.end:
+            self.start = self.end = 0
+        if len(self.buffer) - self.end >= space:
+            return
+        pending = self.end - self.start
+        if len(self.buffer) - pending >= space and self.start > 0:
+            # Compaction : déplacer les octets non consommés en début de tampon
+            self.view[:pending] = self.view[self.start:self.end]
+        else:
+            # Tampon trop petit pour l'arriéré : doubler sa taille
+            new_buffer = bytearray(max(2 * len(self.buffer), pending + space))
+            new_buffer[:pending] = self.view[self.start:self.end]
+            self.view.release()
+            self.buffer = new_buffer
+            self.view = memoryview(self.buffer)
+        self.start, self.end = 0, pending
+
+    def feed(self, data: bytes) -> None:
+        """Ajoute des octets reçus par ailleurs (ex: protocole asyncio)."""
+        n = len(data)
+        self._make_room(n)
+        self.view[self.end:self.end + n] = data
+        self.end += n
+
+    def recv_once(self, sock: socket.socket) -> int:
+        """Un seul recv_into (bloquant si le socket l'est). Retourne le nombre d'octets lus."""
+        self._make_room()
+        n = sock.recv_into(self.view[self.end:])
+        if n == 0:
+            self.closed = True
+        self.end += n
+        return n
+
+    def fill(self, sock: socket.socket) -> int:
+        """Vide le socket non-bloquant jusqu'à EAGAIN. Retourne le nombre d'octets lus."""
+        total = 0
+        while True:
+            self._make_room()
+            space = len(self.buffer) - self.end
+            try:
+                n = sock.recv_into(self.view[self.end:])
+            except (BlockingIOError, InterruptedError):
+                break
+            if n == 0:
+                self.closed = True
+                break
+            self.end += n
+            total += n
+            if n < space:
+                # Lecture partielle : le tampon du noyau est vide
+                break
+        return total
+
+    def next_frame(self) -> bytes | None:
+        """Extrait la prochaine trame complète (sans le '\n'), ou None."""
+        newline = self.buffer.find(b"\n", self.start, self.end)
+        if newline < 0:
             return None
-        buffer += chunk
-        if b"\n" in buffer:
-            line, _, rest = buffer.partition(b"\n")
-            # Si jamais plusieurs lignes arrivent, on ignore le reste pour l'instant
+        frame = self.view[self.start:newline].tobytes()
+        self.start = newline + 1
+        return frame
+
+    def read_messages(self, stats=None, capture=None) -> List[Dict[str, Any]]:
+        """Décode toutes les trames complètes disponibles dans le tampon.
+
+        Seuls les objets JSON sont retournés : les autres trames sont
+        ignorées et comptées comme malformées.
+
+        Args:
+            stats: NetStats optionnel, alimenté par type de message (taille,
+                temps de décodage) et en trames malformées
+            capture: CaptureWriter optionnel, qui enregistre chaque trame reçue
+        """
+        messages = []
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return messages
+            if capture is not None:
+                capture.record(DIR_IN, frame)
+            start = time.perf_counter_ns() if stats is not None else 0
             try:
-                return json.loads(line.decode(ENCODING))
-            except json.JSONDecodeError:
+                message = json.loads(frame)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                message = None
+            if not isinstance(message, dict):
+                # Message malformé (ou JSON valide mais pas un objet), on l'ignore
+                if stats is not None:
+                    stats.on_malformed()
+                continue
+            if stats is not None:
+                stats.on_decoded(message.get("type"), len(frame) + 1, time.perf_counter_ns() - start)
+            messages.append(message)
+
+
+def recv_json(sock: socket.socket, reader: FrameReader | None = None) -> Dict[str, Any] | None:
+    """Reçoit une ligne JSON depuis le socket. Bloquant, retourne None si fermé.
+
+    Les octets reçus après la ligne restent dans ``reader`` pour les lectures
+    suivantes : passer le même lecteur qu'ensuite pour recv_json_nonblocking.
+    """
+    if reader is None:
+        reader = FrameReader()
+    while True:
+        frame = reader.next_frame()
+        if frame is not None:
+            try:
+                message = json.loads(frame)
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 return None
+            return message if isinstance(message, dict) else None
+        if reader.recv_once(sock) == 0:
+            return None
 
 
-def recv_json_nonblocking(sock: socket.socket, buffer: bytearray) -> List[Dict[str, Any]]:
+def recv_json_nonblocking(sock: socket.socket, reader: FrameReader) -> List[Dict[str, Any]]:
     """Reçoit des messages JSON en mode non-bloquant.
-    
+
     Args:
         sock: Socket à lire
-        buffer: Buffer partagé pour accumuler les données
-        
+        reader: Lecteur de trames associé à la connexion
+
     Returns:
         Liste de messages JSON décodés (peut être vide)
     """
-    messages = []
-    
     try:
-        # Recevoir les données disponibles
-        chunk = sock.recv(4096)
-        if chunk:
-            buffer.extend(chunk)
-    except BlockingIOError:
-        # Pas de données disponibles, c'est normal en mode non-bloquant
-        pass
-    except Exception:
-        # Erreur de connexion
-        return messages
-    
-    # Traiter tous les messages complets dans le buffer
-    while b"\n" in buffer:
-        line, _, rest = buffer.partition(b"\n")
-        buffer[:] = rest  # Modifier le buffer en place
-        
-        try:
-            msg = json.loads(line.decode(ENCODING))
-            messages.append(msg)
-        except json.JSONDecodeError:
-            # Message malformé, on l'ignore
-            pass
-    
-    return messages
+        reader.fill(sock)
+    except OSError:
+        # Erreur de connexion : on décode tout de même ce qui a été reçu
+        reader.closed = True
+    return reader.read_messages()
+
+
+def get_unsent_bytes(sock: socket.socket) -> int | None:
+    """Octets encore dans la file d'envoi du noyau (non acquittés par le pair).
+
+    Retourne None si le système ne fournit pas cette information (Windows).
+    """
+    if fcntl is None or termios is None or not hasattr(termios, "TIOCOUTQ"):
+        return None
+    try:
+        buf = fcntl.ioctl(sock.fileno(), termios.TIOCOUTQ, b"\0\0\0\0")
+    except OSError:
+        return None
+    return int.from_bytes(buf, sys.byteorder)
 
 
 def get_local_ip() -> str:
@@ -78,3 +210,8 @@ def get_local_ip() -> str:
         return ip
     except Exception:
         return "127.0.0.1"
+
+
+def get_local_network(prefix: int = 24) -> ipaddress.IPv4Network:
+    """Sous-réseau local (un /24 par défaut) de l'IP retournée par get_local_ip."""
+    return ipaddress.ip_interface(f"{get_local_ip()}/{prefix}").network
@@ -0,0 +1,261 @@
+"""Découverte des parties sur le réseau local.
+
+Deux recherches, lancées ensemble par ``LanScanner`` :
+
+- diffusion UDP : le client envoie un MSG_DISCOVER en broadcast sur
+  NET_DISCOVERY_PORT ; chaque serveur en attente de joueurs
+  (``DiscoveryAnnouncer`` pour un hôte, ``DiscoveryResponder`` pour le
+  serveur dédié) répond directement par un MSG_ANNOUNCE (port de jeu, nom) ;
+- balayage TCP, si la diffusion est filtrée : connexion au port de jeu de
+  chaque adresse du /24 local (cf. ``get_local_network``), toutes en
+  parallèle avec asyncio et un délai court. Une fois connectée, la sonde
+  envoie aussi MSG_DISCOVER et attend l'annonce : le serveur la reconnaît
+  (``answer_tcp_probe``) et ne la prend pas pour un joueur.
+
+Les annonces sont des lignes JSON, comme les trames de jeu.
+"""
+
+import asyncio
+import json
+import select
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from config import (
+    NET_DISCOVERY_PORT,
+    NET_DISCOVERY_PROBE_GRACE,
+    NET_DISCOVERY_PROBE_INTERVAL,
+    NET_DISCOVERY_SCAN_DURATION,
+    NET_DISCOVERY_TIMEOUT,
+)
+from .connection import ENCODING, get_local_network
+from . import protocol
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(message) + "\n").encode(ENCODING)
+
+
+def _decode(data: bytes) -> Dict[str, Any] | None:
+    try:
+        message = json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def is_discover(data: bytes) -> bool:
+    """La trame (datagramme ou ligne) est une sonde de découverte."""
+    message = _decode(data)
+    return message is not None and message.get("type") == protocol.MSG_DISCOVER
+
+
+def announce_line(game_port: int, dedicated: bool = False) -> bytes:
+    """Annonce encodée d'un serveur de ce poste."""
+    return _encode(protocol.make_announce_message(game_port, socket.gethostname(), dedicated))
+
+
+def answer_tcp_probe(conn: socket.socket, game_port: int, grace: float = NET_DISCOVERY_PROBE_GRACE) -> bool:
+    """Côté serveur, juste après accept : répond à une sonde de découverte et la ferme.
+
+    Un joueur n'envoie rien avant de recevoir la configuration ; une sonde
+    envoie MSG_DISCOVER dès sa connexion (ou ferme aussitôt). Retourne True
+    si la connexion était une sonde (fermée), False pour un joueur (aucun
+    octet consommé).
+    """
+    readable, _, _ = select.select([conn], [], [], grace)
+    if not readable:
+        return False
+    try:
+        data = conn.recv(1024, socket.MSG_PEEK)
+    except OSError:
+        data = b""
+    if data and not is_discover(data.split(b"\n", 1)[0]):
+        return False
+    try:
+        if data:
+            conn.sendall(announce_line(game_port))
+    except OSError:
+        pass
+    conn.close()
+    return True
+
+
+class DiscoveryAnnouncer(threading.Thread):
+    """Répond aux sondes UDP tant qu'un hôte attend son adversaire.
+
+    Args:
+        game_port: Port TCP de la partie annoncée
+        discovery_port: Port UDP écouté
+    """
+
+    def __init__(self, game_port: int, discovery_port: int = NET_DISCOVERY_PORT):
+        super().__init__(name="chess-ping-discovery", daemon=True)
+        self.announce = announce_line(game_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("", discovery_port))
+        self._running = True
+        self._wake_r, self._wake_w = socket.socketpair()
+
+    def run(self) -> None:
+        while self._running:
+            readable, _, _ = select.select([self.sock, self._wake_r], [], [])
+            if self.sock not in readable:
+                continue
+            try:
+                data, addr = self.sock.recvfrom(2048)
+                if is_discover(data):
+                    self.sock.sendto(self.announce, addr)
+            except OSError:
+                continue
+
+    def stop(self) -> None:
+        self._running = False
+        self._wake_w.send(b"\0")
+        if self.is_alive():
+            self.join(timeout=1.0)
+        self.sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+class DiscoveryResponder(asyncio.DatagramProtocol):
+    """Réponse aux sondes UDP dans une boucle asyncio (serveur dédié).
+
+    Args:
+        game_port: Port TCP du serveur annoncé
+    """
+
+    def __init__(self, game_port: int):
+        self.announce = announce_line(game_port, dedicated=True)
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        if is_discover(data):
+            self.transport.sendto(self.announce, addr)
+
+
+class _AnnounceCollector(asyncio.DatagramProtocol):
+    def __init__(self, scanner: "LanScanner"):
+        self.scanner = scanner
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.scanner._found(addr[0], _decode(data))
+
+
+class LanScanner(threading.Thread):
+    """Recherche en arrière-plan les parties du réseau local.
+
+    Les serveurs trouvés sont disponibles dès leur réponse avec ``results()``,
+    sans attendre la fin de la recherche (``finished``).
+
+    Args:
+        game_port: Port de jeu sondé par le balayage TCP
+        duration: Durée de la recherche (s)
+        discovery_port: Port UDP des sondes
+    """
+
+    def __init__(
+        self,
+        game_port: int = 5050,
+        duration: float = NET_DISCOVERY_SCAN_DURATION,
+        discovery_port: int = NET_DISCOVERY_PORT,
+    ):
+        super().__init__(name="chess-ping-scan", daemon=True)
+        self.game_port = game_port
+        self.duration = duration
+        self.discovery_port = discovery_port
+        self.lock = threading.Lock()
+        self.servers: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.finished = False
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Serveurs trouvés jusqu'ici : {"host", "port", "name", "dedicated"}, par adresse."""
+        with self.lock:
+            servers = list(self.servers.values())
+        # Un serveur de ce poste répond aussi à la sonde envoyée à 127.0.0.1 :
+        # ne garder que son adresse sur le réseau
+        remote = {(server["name"], server["port"]) for server in servers if server["host"] != "127.0.0.1"}
+        servers = [
+            server for server in servers
+            if server["host"] != "127.0.0.1" or (server["name"], server["port"]) not in remote
+        ]
+        return sorted(servers, key=lambda server: (server["host"], server["port"]))
+
+    def _found(self, host: str, message: Dict[str, Any] | None) -> None:
+        if message is None or message.get("type") != protocol.MSG_ANNOUNCE:
+            return
+        port = message.get("port")
+        if not isinstance(port, int):
+            return
+        with self.lock:
+            self.servers[(host, port)] = {
+                "host": host,
+                "port": port,
+                "name": str(message.get("name") or host),
+                "dedicated": bool(message.get("dedicated")),
+            }
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self._scan())
+        except Exception as e:
+            print(f"Recherche des parties interrompue: {e}")
+        finally:
+            self.finished = True
+
+    async def _scan(self) -> None:
+        await asyncio.gather(self._broadcast(), self._sweep())
+
+    async def _broadcast(self) -> None:
+        """Diffuse la sonde UDP régulièrement pendant la recherche."""
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setblocking(False)
+        transport, _ = await loop.create_datagram_endpoint(lambda: _AnnounceCollector(self), sock=sock)
+        network = get_local_network()
+        # Broadcast général et dirigé, plus ce poste (serveur local)
+        targets = {"255.255.255.255", str(network.broadcast_address), "127.0.0.1"}
+        probe = _encode(protocol.make_discover_message())
+        deadline = time.monotonic() + self.duration
+        try:
+            while time.monotonic() < deadline:
+                for target in targets:
+                    try:
+                        transport.sendto(probe, (target, self.discovery_port))
+                    except OSError:
+                        pass
+                await asyncio.sleep(NET_DISCOVERY_PROBE_INTERVAL)
+        finally:
+            transport.close()
+
+    async def _sweep(self) -> None:
+        """Sonde le port de jeu de toutes les adresses du /24 local, en parallèle."""
+        network = get_local_network()
+        if network.network_address.is_loopback:
+            # Pas d'interface réseau : rien à balayer
+            return
+        await asyncio.gather(*(self._probe(str(host)) for host in network.hosts()))
+
+    async def _probe(self, host: str) -> None:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, self.game_port), NET_DISCOVERY_TIMEOUT
+            )
+        except (OSError, asyncio.TimeoutError):
+            return
+        try:
+            writer.write(_encode(protocol.make_discover_message()))
+            line = await asyncio.wait_for(reader.readline(), NET_DISCOVERY_TIMEOUT)
+            self._found(host, _decode(line))
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
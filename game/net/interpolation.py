@@ -0,0 +1,158 @@
+"""Interpolation des entités distantes (paddles, balle) à partir de snapshots.
+
+Les mises à jour réseau arrivent de façon irrégulière. Au lieu d'appliquer
+chaque position dès sa réception (mouvement saccadé), on stocke des snapshots
+horodatés et on affiche l'entité avec un léger retard (``delay``), en
+interpolant entre les deux snapshots qui encadrent l'instant affiché.
+
+Le retard s'adapte à la gigue mesurée : plus les paquets arrivent de façon
+irrégulière, plus le tampon est profond. Les snapshots peuvent être horodatés
+à leur réception ou, une fois l'horloge du serveur synchronisée, à leur
+instant d'émission converti dans l'horloge locale ; dans ce cas la gigue est
+mesurée sur le temps de transit (RFC 3550) et le retard inclut le transit moyen.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Sequence, Tuple
+
+from config import (
+    INTERP_DELAY,
+    INTERP_MIN_DELAY,
+    INTERP_MAX_DELAY,
+    INTERP_JITTER_FACTOR,
+)
+
+
+Snapshot = Tuple[float, Tuple[float, ...]]
+
+
+class SnapshotBuffer:
+    """Tampon de snapshots horodatés pour une entité distante.
+
+    Args:
+        delay: Retard d'interpolation initial (secondes)
+        min_delay: Retard minimal autorisé en mode adaptatif
+        max_delay: Retard maximal autorisé en mode adaptatif
+        jitter_factor: Nombre d'écarts de gigue ajoutés à l'intervalle moyen
+        adaptive: Si False, le retard reste fixé à ``delay``
+        max_snapshots: Nombre maximal de snapshots conservés
+    """
+
+    # Poids des moyennes glissantes (intervalle moyen et gigue, cf. RFC 3550)
+    INTERVAL_GAIN = 1 / 16
+    # Fraction de l'écart vers le retard cible rattrapée à chaque échantillon,
+    # pour éviter les sauts dans le temps affiché
+    DELAY_SLEW = 0.05
+
+    def __init__(
+        self,
+        delay: float = INTERP_DELAY,
+        min_delay: float = INTERP_MIN_DELAY,
+        max_delay: float = INTERP_MAX_DELAY,
+        jitter_factor: float = INTERP_JITTER_FACTOR,
+        adaptive: bool = True,
+        max_snapshots: int = 64,
+    ):
+        self.delay = delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.jitter_factor = jitter_factor
+        self.adaptive = adaptive
+        self.snapshots: Deque[Snapshot] = deque(maxlen=max_snapshots)
+
+        # Statistiques d'arrivée
+        self.mean_interval: float | None = None
+        self.mean_transit = 0.0
+        self.jitter = 0.0
+        self._last_arrival: float | None = None
+        self._last_transit: float | None = None
+        self._sender_timestamps = False
+
+    def clear(self) -> None:
+        self.snapshots.clear()
+        self._last_arrival = None
+        self._last_transit = None
+
+    def push(self, values: Sequence[float], timestamp: float | None = None) -> None:
+        """Ajoute un snapshot.
+
+        Args:
+            values: Valeurs à interpoler (ex: (y,) pour un paddle, (x, y) pour la balle)
+            timestamp: Instant du snapshot dans l'horloge locale ; par défaut
+                l'instant de réception
+        """
+        arrival = time.monotonic()
+        sender_timestamps = timestamp is not None
+        if sender_timestamps != self._sender_timestamps:
+            # Changement de référence temporelle (synchronisation acquise) :
+            # les anciens snapshots ne sont plus comparables.
+            self.clear()
+            self._sender_timestamps = sender_timestamps
+        if timestamp is None:
+            timestamp = arrival
+        self._observe_arrival(arrival, timestamp)
+
+        # Un snapshot plus ancien que le dernier est ignoré (hors ordre)
+        if self.snapshots and timestamp < self.snapshots[-1][0]:
+            return
+        self.snapshots.append((timestamp, tuple(values)))
+
+    def _observe_arrival(self, arrival: float, timestamp: float) -> None:
+        transit = arrival - timestamp
+        if self._last_transit is None:
+            self.mean_transit = transit
+        if self._last_arrival is not None:
+            interval = arrival - self._last_arrival
+            if self.mean_interval is None:
+                self.mean_interval = interval
+            else:
+                if self._sender_timestamps:
+                    deviation = abs(transit - self._last_transit)
+                else:
+                    deviation = abs(interval - self.mean_interval)
+                self.mean_interval += (interval - self.mean_interval) * self.INTERVAL_GAIN
+                self.mean_transit += (transit - self.mean_transit) * self.INTERVAL_GAIN
+                self.jitter += (deviation - self.jitter) * self.INTERVAL_GAIN
+        self._last_arrival = arrival
+        self._last_transit = transit
+
+    def target_delay(self) -> float:
+        """Retard visé : transit moyen, un intervalle d'envoi et une marge proportionnelle à la gigue."""
+        if not self.adaptive or self.mean_interval is None:
+            return self.delay
+        target = self.mean_interval + self.jitter_factor * self.jitter
+        target = min(self.max_delay, max(self.min_delay, target))
+        # Le transit n'est pas borné : sans lui, l'instant affiché dépasserait
+        # toujours le dernier snapshot reçu.
+        return self.mean_transit + target
+
+    def sample(self, now: float | None = None) -> Tuple[float, ...] | None:
+        """Retourne les valeurs interpolées à l'instant ``now - delay``.
+
+        Retourne None tant qu'aucun snapshot n'a été reçu. Si l'instant affiché
+        dépasse le dernier snapshot, la dernière valeur connue est conservée.
+        """
+        if not self.snapshots:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        self.delay += (self.target_delay() - self.delay) * self.DELAY_SLEW
+        render_time = now - self.delay
+
+        # Purger les snapshots trop anciens en gardant celui qui précède render_time
+        snapshots = self.snapshots
+        while len(snapshots) >= 2 and snapshots[1][0] <= render_time:
+            snapshots.popleft()
+
+        t0, v0 = snapshots[0]
+        if render_time <= t0 or len(snapshots) == 1:
+            return v0
+
+        t1, v1 = snapshots[1]
+        span = t1 - t0
+        if span <= 0:
+            return v1
+        alpha = (render_time - t0) / span
+        return tuple(a + (b - a) * alpha for a, b in zip(v0, v1))
@@ -0,0 +1,249 @@
+"""Thread d'entrées/sorties réseau dédié à une connexion de jeu.
+
+La boucle de jeu ne touche plus au socket : elle dépose les messages à
+envoyer dans une file et récupère les messages décodés dans une autre. Le
+thread réseau encode, écrit (en gérant les écritures partielles et
+``EAGAIN``), lit et décode.
+
+Aucun verrou n'est pris par la boucle de jeu : la file de réception est une
+``deque`` et la file d'envoi une ``SendQueue`` (événements prioritaires,
+états fusionnés). Elles sont bornées :
+
+- file d'événements pleine : ``send`` retourne False (lien durablement saturé) ;
+- file de réception pleine : le thread cesse de lire le socket, ce qui
+  reporte la contre-pression sur TCP sans perdre de message.
+
+Un nouveau lot de messages n'est encodé qu'une fois le précédent entièrement
+accepté par le noyau : les états en attente restent fusionnables jusqu'au
+dernier moment, et une trame partiellement écrite est toujours complétée
+avant la suivante.
+
+Les pings/pongs sont traités directement dans le thread réseau, au plus près
+de la réception, ce qui rend la mesure du RTT indépendante de la cadence de
+rendu.
+
+Présence : après ``heartbeat_interval`` secondes sans rien écrire, le thread
+envoie un ``MSG_HEARTBEAT``. Tout octet reçu prouve que le pair est vivant ;
+après ``heartbeat_timeout`` secondes de silence, ``alive`` devient faux, même
+si TCP n'a signalé aucune erreur (coupure Wi-Fi, câble débranché...).
+"""
+
+import json
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List
+
+from config import (
+    NET_HEARTBEAT_INTERVAL,
+    NET_HEARTBEAT_TIMEOUT,
+    NET_IO_QUEUE_SIZE,
+    NET_IO_WRITE_CHUNK,
+)
+from game.net import protocol
+from game.net.capture import DIR_OUT, CaptureWriter
+from game.net.connection import ENCODING, FrameReader
+from game.net.send_queue import SendQueue
+from game.net.stats import NetStats
+
+
+class NetworkIOThread(threading.Thread):
+    """Thread de lecture/écriture d'un socket de jeu non-bloquant.
+
+    Args:
+        sock: Socket connecté (passé en mode non-bloquant)
+        reader: Lecteur de trames de la connexion (peut contenir des octets déjà reçus)
+        on_sent: Appelé avec le nombre d'octets effectivement écrits
+        filter_messages: Appelé dans le thread réseau sur chaque lot de messages
+            reçus (avec l'instant de réception) ; retourne ceux à transmettre au jeu
+        queue_size: Nombre maximal de messages dans chaque file
+        heartbeat_interval: Inactivité en émission (s) avant un message de présence
+        heartbeat_timeout: Silence du pair (s) au-delà duquel la connexion est perdue
+        stats: Compteurs de la connexion (encodage et décodage par type de message)
+        capture: Capture des trames envoyées (à l'encodage) et reçues (au décodage)
+    """
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        reader: FrameReader,
+        on_sent: Callable[[int], None] | None = None,
+        filter_messages: Callable[[List[Dict[str, Any]], float], List[Dict[str, Any]]] | None = None,
+        queue_size: int = NET_IO_QUEUE_SIZE,
+        heartbeat_interval: float = NET_HEARTBEAT_INTERVAL,
+        heartbeat_timeout: float = NET_HEARTBEAT_TIMEOUT,
+        stats: NetStats | None = None,
+        capture: CaptureWriter | None = None,
+    ):
+        super().__init__(name="chess-ping-net", daemon=True)
+        sock.setblocking(False)
+        self.sock = sock
+        self.reader = reader
+        self.on_sent = on_sent
+        self.filter_messages = filter_messages
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.stats = stats
+        self.capture = capture
+
+        self.outbox = SendQueue(queue_size)
+        self.inbox: Deque[Dict[str, Any]] = deque()
+        # Octets encodés pas encore acceptés par le noyau (écriture partielle)
+        self.out_buffer = bytearray()
+        self.closed = False
+        self.error: OSError | None = None
+        self.last_recv = time.monotonic()
+        self._last_send = self.last_recv
+
+        self._running = True
+        self._wakeup_pending = False
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+    # ---- Côté boucle de jeu ----
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        """Met un message en file d'envoi. Ne bloque jamais.
+
+        Retourne False si la connexion est fermée ou la file d'événements pleine.
+        """
+        if self.closed or not self.outbox.push(message):
+            return False
+        self._wake()
+        return True
+
+    def receive(self) -> List[Dict[str, Any]]:
+        """Retire tous les messages décodés disponibles. Ne bloque jamais."""
+        throttled = len(self.inbox) >= self.queue_size
+        messages = []
+        inbox = self.inbox
+        while inbox:
+            messages.append(inbox.popleft())
+        if throttled:
+            # Le thread avait suspendu la lecture du socket
+            self._wake()
+        return messages
+
+    @property
+    def alive(self) -> bool:
+        """Connexion ouverte et pair entendu récemment."""
+        return not self.closed and time.monotonic() - self.last_recv < self.heartbeat_timeout
+
+    @property
+    def pending_bytes(self) -> int:
+        """Octets en attente côté utilisateur (file encodée non écrite)."""
+        return len(self.out_buffer)
+
+    def stop(self) -> None:
+        self._running = False
+        self._wake(force=True)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=1.0)
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _wake(self, force: bool = False) -> None:
+        if self._wakeup_pending and not force:
+            return
+        self._wakeup_pending = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            # Tampon de réveil plein (le thread a déjà un réveil en attente) ou fermé
+            pass
+
+    # ---- Côté thread réseau ----
+
+    def run(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        selector.register(self.sock, selectors.EVENT_READ)
+        registered = selectors.EVENT_READ
+        try:
+            while self._running and not self.closed:
+                self._drain_wakeups()
+                if time.monotonic() - self._last_send >= self.heartbeat_interval and not self.outbox:
+                    self.outbox.push(protocol.make_heartbeat_message())
+                self._encode_outbox()
+                if self.out_buffer:
+                    self._write()
+
+                events = 0
+                if len(self.inbox) < self.queue_size:
+                    events |= selectors.EVENT_READ
+                if self.out_buffer:
+                    events |= selectors.EVENT_WRITE
+                if events != registered:
+                    if registered:
+                        selector.unregister(self.sock)
+                    if events:
+                        selector.register(self.sock, events)
+                    registered = events
+
+                for key, mask in selector.select(self.heartbeat_interval):
+                    if key.fileobj is self.sock and mask & selectors.EVENT_READ:
+                        self._read()
+        except OSError as e:
+            self.error = e
+        finally:
+            self.closed = True
+            selector.close()
+
+    def _drain_wakeups(self) -> None:
+        # Effacer l'indicateur avant de vider l'outbox : un envoi concurrent
+        # provoquera un nouveau réveil
+        self._wakeup_pending = False
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _encode_outbox(self) -> None:
+        """Encode le lot suivant, seulement si le précédent est entièrement écrit."""
+        out_buffer = self.out_buffer
+        if out_buffer:
+            return
+        stats = self.stats
+        while len(out_buffer) < NET_IO_WRITE_CHUNK:
+            message = self.outbox.pop()
+            if message is None:
+                return
+            start = time.perf_counter_ns()
+            data = (json.dumps(message) + "\n").encode(ENCODING)
+            if stats is not None:
+                stats.on_encoded(message.get("type"), len(data), time.perf_counter_ns() - start)
+            if self.capture is not None:
+                self.capture.record(DIR_OUT, data[:-1])
+            out_buffer += data
+
+    def _write(self) -> None:
+        while self.out_buffer:
+            try:
+                n = self.sock.send(self.out_buffer)
+            except (BlockingIOError, InterruptedError):
+                # Tampon du noyau plein : les octets restent en file, rien n'est perdu
+                return
+            del self.out_buffer[:n]
+            self._last_send = time.monotonic()
+            if self.on_sent is not None:
+                self.on_sent(n)
+            self._encode_outbox()
+
+    def _read(self) -> None:
+        if self.reader.fill(self.sock) > 0:
+            self.last_recv = time.monotonic()
+        messages = [
+            msg
+            for msg in self.reader.read_messages(self.stats, self.capture)
+            if msg.get("type") != protocol.MSG_HEARTBEAT
+        ]
+        if messages and self.filter_messages is not None:
+            messages = self.filter_messages(messages, time.monotonic())
+        self.inbox.extend(messages)
+        if self.reader.closed:
+            self.closed = True
@@ -17,6 +17,56 @@ MSG_SCORE_UPDATE = "score_update"
 MSG_SERVE_START = "serve_start"
 MSG_SERVE_LAUNCH = "serve_launch"
 MSG_GAME_END = "game_end"
+MSG_JOIN = "join"
+MSG_PING = "ping"
+MSG_PONG = "pong"
+MSG_HEARTBEAT = "heartbeat"
+MSG_RESUME = "resume"
+MSG_FULL_STATE = "full_state"
+MSG_INPUT = "input"
+MSG_LOCKSTEP_INPUT = "lockstep_input"
+MSG_STATE_HASH = "state_hash"
+MSG_RESYNC_REQUEST = "resync_request"
+MSG_DISCOVER = "discover"
+MSG_ANNOUNCE = "announce"
+MSG_ERROR = "error"
+
+# Synchronisation des paddles : positions absolues envoyées par chaque joueur
+# ("state") ou transitions de touches simulées par le serveur ("input")
+PADDLE_MODE_STATE = "state"
+PADDLE_MODE_INPUT = "input"
+
+# Synchronisation de la partie : hôte autoritaire ("state") ou simulation
+# déterministe exécutée par chaque pair à partir des entrées ("lockstep")
+SYNC_MODE_STATE = "state"
+SYNC_MODE_LOCKSTEP = "lockstep"
+SYNC_MODE_ROLLBACK = "rollback"
+
+# Messages d'état : chacun rend obsolète le précédent de même type (et même
+# paddle). Ils peuvent être fusionnés ou abandonnés ; tous les autres messages
+# (touches, destructions, scores, configuration...) doivent être délivrés.
+# L'empreinte d'état en fait partie : seule la plus récente compte.
+STATE_MESSAGE_TYPES = frozenset({MSG_BALL_UPDATE, MSG_PADDLE_UPDATE, MSG_STATE_HASH})
+
+# Événements qui rendent périmés les états produits avant eux (types d'états
+# concernés) : écrit après l'événement, un tel état serait appliqué par-dessus.
+_BALL_STATES = frozenset({MSG_BALL_UPDATE, MSG_STATE_HASH})
+STALE_STATES_AFTER = {
+    MSG_PIECE_HIT: _BALL_STATES,
+    MSG_PIECE_DESTROYED: _BALL_STATES,
+    MSG_SCORE_UPDATE: _BALL_STATES,
+    MSG_SPEED_UPDATE: _BALL_STATES,
+    MSG_SERVE_START: _BALL_STATES,
+    MSG_FULL_STATE: STATE_MESSAGE_TYPES,
+}
+
+
+def state_key(message: Dict[str, Any]) -> Tuple[str, Any] | None:
+    """Clé de fusion d'un message d'état, ou None pour un message fiable."""
+    msg_type = message.get("type")
+    if msg_type not in STATE_MESSAGE_TYPES:
+        return None
+    return (msg_type, message.get("side"))
 
 
 def make_config_message(
@@ -24,11 +74,25 @@ def make_config_message(
     first_server: str,
     host_paddle: str,
     ball_speed_factor: float = 1.0,
+    spectator: bool = False,
+    piece_ids: Dict[str, List[int]] | None = None,
+    session: str | None = None,
+    paddle_mode: str = PADDLE_MODE_STATE,
+    sync_mode: str = SYNC_MODE_STATE,
+    lockstep: Dict[str, int] | None = None,
 ) -> Dict[str, Any]:
     """Crée un message de configuration de partie.
 
     ball_speed_factor permet de synchroniser le multiplicateur de vitesse
-    initial entre le serveur et le client.
+    initial entre le serveur et le client. spectator indique au client qu'il
+    ne contrôle aucun paddle. piece_ids donne, pour chaque côté, les
+    identifiants des pièces dans leur ordre de création (cf. GameEngine.piece_ids).
+    session est le jeton à présenter dans MSG_RESUME pour reprendre la partie
+    après une coupure. paddle_mode indique comment le client synchronise son
+    paddle (PADDLE_MODE_STATE ou PADDLE_MODE_INPUT). sync_mode choisit entre
+    l'hôte autoritaire et une simulation déterministe par pair
+    (SYNC_MODE_LOCKSTEP, SYNC_MODE_ROLLBACK) ; lockstep donne alors la graine
+    du générateur aléatoire et le délai d'entrée en ticks ({"seed", "delay"}).
     """
     return {
         "type": MSG_CONFIG,
@@ -36,21 +100,93 @@ def make_config_message(
         "first_server": first_server,
         "host_paddle": host_paddle,
         "ball_speed_factor": ball_speed_factor,
+        "spectator": spectator,
+        "piece_ids": piece_ids,
+        "session": session,
+        "paddle_mode": paddle_mode,
+        "sync_mode": sync_mode,
+        "lockstep": lockstep,
     }
 
 
-def make_paddle_update_message(side: str, y: float) -> Dict[str, Any]:
+def make_paddle_update_message(
+    side: str, y: float, ack: int | None = None, view: int | None = None
+) -> Dict[str, Any]:
     """Crée un message de mise à jour de position de paddle.
     
     Args:
         side: "left" ou "right"
         y: Position Y du paddle
+        ack: En mode "input", tick client de la dernière entrée prise en
+            compte dans cette position (pour la réconciliation)
+        view: Côté client, tick serveur de la balle affichée quand cette
+            position a été relevée (pour la compensation de latence)
     """
-    return {
+    message = {
         "type": MSG_PADDLE_UPDATE,
         "side": side,
         "y": y,
     }
+    if ack is not None:
+        message["ack"] = ack
+    if view is not None:
+        message["view"] = view
+    return message
+
+
+def make_input_message(tick: int, up: bool, down: bool) -> Dict[str, Any]:
+    """Crée un message de transition des touches du paddle (mode "input").
+
+    Envoyé seulement quand l'état des touches change.
+
+    Args:
+        tick: Tick client à partir duquel cet état s'applique
+        up: Touche « monter » enfoncée
+        down: Touche « descendre » enfoncée
+    """
+    return {
+        "type": MSG_INPUT,
+        "tick": tick,
+        "up": up,
+        "down": down,
+    }
+
+
+def make_lockstep_input_message(
+    tick: int,
+    up: bool,
+    down: bool,
+    aim: int | None = None,
+    launch: List[int] | None = None,
+    speed: int | None = None,
+) -> Dict[str, Any]:
+    """Crée le message d'entrées d'un pair pour un tick (mode lockstep).
+
+    Envoyé à chaque tick ; les champs optionnels ne sont présents que s'ils
+    sont utilisés.
+
+    Args:
+        tick: Tick de simulation auquel ces entrées s'appliquent
+        up: Touche « monter » enfoncée
+        down: Touche « descendre » enfoncée
+        aim: Angle de visée du service en milliradians (pendant son service)
+        launch: Vitesse de lancement [vx, vy] en virgule fixe, pour un facteur
+            de vitesse de 1.0
+        speed: Nouveau facteur de vitesse, en dixièmes
+    """
+    message = {
+        "type": MSG_LOCKSTEP_INPUT,
+        "tick": tick,
+        "up": up,
+        "down": down,
+    }
+    if aim is not None:
+        message["aim"] = aim
+    if launch is not None:
+        message["launch"] = launch
+    if speed is not None:
+        message["speed"] = speed
+    return message
 
 
 def make_ball_update_message(x: float, y: float, vx: float, vy: float, color: Tuple[int, int, int]) -> Dict[str, Any]:
@@ -77,33 +213,33 @@ def make_speed_update_message(factor: float) -> Dict[str, Any]:
     }
 
 
-def make_piece_hit_message(side: str, piece_index: int, life: int) -> Dict[str, Any]:
+def make_piece_hit_message(side: str, piece_id: int, life: int) -> Dict[str, Any]:
     """Crée un message indiquant qu'une pièce a été touchée.
     
     Args:
         side: "left" ou "right"
-        piece_index: Index de la pièce dans la liste du côté
+        piece_id: Identifiant stable de la pièce (annoncé dans la configuration)
         life: Vie restante de la pièce
     """
     return {
         "type": MSG_PIECE_HIT,
         "side": side,
-        "piece_index": piece_index,
+        "piece_id": piece_id,
         "life": life,
     }
 
 
-def make_piece_destroyed_message(side: str, piece_index: int) -> Dict[str, Any]:
+def make_piece_destroyed_message(side: str, piece_id: int) -> Dict[str, Any]:
     """Crée un message indiquant qu'une pièce a été détruite.
     
     Args:
         side: "left" ou "right"
-        piece_index: Index de la pièce dans la liste du côté
+        piece_id: Identifiant stable de la pièce (annoncé dans la configuration)
     """
     return {
         "type": MSG_PIECE_DESTROYED,
         "side": side,
-        "piece_index": piece_index,
+        "piece_id": piece_id,
     }
 
 
@@ -150,3 +286,169 @@ def make_game_end_message(winner: str) -> Dict[str, Any]:
         "type": MSG_GAME_END,
         "winner": winner,
     }
+
+
+def make_join_message(room: str | None = None, spectate: bool = False) -> Dict[str, Any]:
+    """Crée un message de demande de partie auprès d'un serveur dédié.
+
+    Args:
+        room: Nom de la salle à rejoindre ; None pour être apparié automatiquement
+            (ou, en spectateur, pour regarder une partie en cours quelconque)
+        spectate: Regarder la partie sans y jouer
+    """
+    return {
+        "type": MSG_JOIN,
+        "room": room,
+        "spectate": spectate,
+    }
+
+
+def make_ping_message(t0: float) -> Dict[str, Any]:
+    """Crée un message de ping pour la mesure du RTT et de l'écart d'horloge.
+
+    Args:
+        t0: Instant d'envoi dans l'horloge de l'émetteur
+    """
+    return {
+        "type": MSG_PING,
+        "t0": t0,
+    }
+
+
+def make_pong_message(t0: float, t1: float, t2: float) -> Dict[str, Any]:
+    """Crée la réponse à un ping (échange de type NTP).
+
+    Args:
+        t0: Instant d'envoi du ping (horloge de l'émetteur du ping)
+        t1: Instant de réception du ping (horloge du répondeur)
+        t2: Instant d'envoi du pong (horloge du répondeur)
+    """
+    return {
+        "type": MSG_PONG,
+        "t0": t0,
+        "t1": t1,
+        "t2": t2,
+    }
+
+
+def make_heartbeat_message() -> Dict[str, Any]:
+    """Crée un message de présence, envoyé quand la connexion est inactive."""
+    return {"type": MSG_HEARTBEAT}
+
+
+def make_resume_message(session: str) -> Dict[str, Any]:
+    """Crée une demande de reprise de partie après reconnexion.
+
+    Args:
+        session: Jeton de session reçu dans le message de configuration
+    """
+    return {
+        "type": MSG_RESUME,
+        "session": session,
+    }
+
+
+def make_full_state_message(
+    pieces: List[List[int]],
+    score_left: int,
+    score_right: int,
+    ball: List[float],
+    ball_color: Tuple[int, int, int],
+    paddles: Dict[str, float],
+    serving: bool,
+    server_side: str,
+    serve_angle: float,
+    speed_factor: float,
+) -> Dict[str, Any]:
+    """Crée un instantané complet de la partie (reprise après coupure, resynchronisation).
+
+    Args:
+        pieces: Pièces vivantes, sous forme [identifiant, vie]
+        score_left, score_right: Scores
+        ball: [x, y, vx, vy]
+        ball_color: Couleur de la balle
+        paddles: Position Y de chaque paddle ("left", "right")
+        serving: Balle attachée au paddle du serveur
+        server_side: Côté qui sert
+        serve_angle: Angle de service courant (radians)
+        speed_factor: Multiplicateur de vitesse de balle
+    """
+    return {
+        "type": MSG_FULL_STATE,
+        "pieces": pieces,
+        "score_left": score_left,
+        "score_right": score_right,
+        "ball": ball,
+        "color": list(ball_color),
+        "paddles": paddles,
+        "serving": serving,
+        "server_side": server_side,
+        "serve_angle": serve_angle,
+        "factor": speed_factor,
+    }
+
+
+def make_state_hash_message(digest: int) -> Dict[str, Any]:
+    """Crée un message d'empreinte de l'état répliqué, envoyé périodiquement par le serveur.
+
+    Args:
+        digest: CRC32 des vies des pièces, des scores, de la vitesse et du service
+    """
+    return {
+        "type": MSG_STATE_HASH,
+        "hash": digest,
+    }
+
+
+def make_resync_request_message(tick: int) -> Dict[str, Any]:
+    """Crée une demande de resynchronisation (réponse attendue : MSG_FULL_STATE).
+
+    Args:
+        tick: Tick serveur de l'empreinte qui ne correspondait pas
+    """
+    return {
+        "type": MSG_RESYNC_REQUEST,
+        "tick": tick,
+    }
+
+
+def make_discover_message() -> Dict[str, Any]:
+    """Crée une sonde de découverte des parties du réseau local (UDP ou TCP)."""
+    return {
+        "type": MSG_DISCOVER,
+    }
+
+
+def make_error_message(reason: str) -> Dict[str, Any]:
+    """Crée le refus d'un serveur envoyé à la place de la configuration.
+
+    Args:
+        reason: Motif affiché au joueur
+    """
+    return {
+        "type": MSG_ERROR,
+        "reason": reason,
+    }
+
+
+def make_announce_message(port: int, name: str, dedicated: bool = False) -> Dict[str, Any]:
+    """Crée la réponse d'un serveur à une sonde de découverte.
+
+    Args:
+        port: Port TCP de la partie
+        name: Nom affiché (nom du poste)
+        dedicated: Serveur dédié (plusieurs salles) plutôt qu'un hôte
+    """
+    return {
+        "type": MSG_ANNOUNCE,
+        "port": port,
+        "name": name,
+        "dedicated": dedicated,
+    }
+
+
+def stamp_message(message: Dict[str, Any], tick: int, server_time: float) -> Dict[str, Any]:
+    """Ajoute l'horodatage serveur (numéro de tick et horloge) à un message d'état."""
+    message["tick"] = tick
+    message["ts"] = server_time
+    return message
@@ -0,0 +1,159 @@
+"""Contrôle adaptatif de la fréquence d'envoi des messages d'état.
+
+Les messages d'état (balle, paddles) sont redondants : si l'un d'eux est
+envoyé moins souvent, le suivant le remplace. Le contrôleur ajuste donc,
+pour chaque type de message d'état, un intervalle d'envoi en frames entre
+des bornes configurées, selon l'état du lien :
+
+- RTT lissé (fourni par ``observe_rtt``),
+- profondeur de la file d'envoi du noyau (octets non acquittés),
+- débit effectivement délivré,
+- échecs d'envoi (tampon noyau plein).
+
+Principe AIMD : l'intervalle double dès qu'une congestion est détectée et
+diminue d'une frame à chaque période saine. Sur un LAN, l'intervalle reste
+à sa borne basse (un envoi par frame).
+"""
+
+import socket
+import time
+from typing import Dict, Tuple
+
+from config import (
+    NET_RATE_PROBE_PERIOD,
+    NET_RATE_QUEUE_HIGH,
+    NET_RATE_RTT_INFLATION,
+)
+from game.net import protocol
+from game.net.connection import get_unsent_bytes
+
+
+# Bornes (min, max) de l'intervalle d'envoi en frames, par type de message d'état.
+# Les autres types (touches, destructions, scores...) ne sont jamais limités.
+DEFAULT_INTERVAL_BOUNDS: Dict[str, Tuple[int, int]] = {
+    protocol.MSG_BALL_UPDATE: (1, 4),
+    protocol.MSG_PADDLE_UPDATE: (1, 6),
+}
+
+
+class SendRateController:
+    """Ajuste la fréquence d'envoi par type de message selon la congestion mesurée.
+
+    Args:
+        bounds: Bornes (min, max) d'intervalle en frames par type de message
+        queue_high: Seuil (octets) de file d'envoi au-delà duquel le lien est congestionné
+        rtt_inflation: Hausse du RTT (secondes) au-dessus du minimum observé
+            considérée comme de la mise en file d'attente
+        probe_period: Durée (secondes) de lien sain avant de réaccélérer
+    """
+
+    RTT_GAIN = 1 / 8
+    RATE_GAIN = 1 / 4
+
+    def __init__(
+        self,
+        bounds: Dict[str, Tuple[int, int]] | None = None,
+        queue_high: int = NET_RATE_QUEUE_HIGH,
+        rtt_inflation: float = NET_RATE_RTT_INFLATION,
+        probe_period: float = NET_RATE_PROBE_PERIOD,
+    ):
+        self.bounds = dict(DEFAULT_INTERVAL_BOUNDS if bounds is None else bounds)
+        self.queue_high = queue_high
+        self.rtt_inflation = rtt_inflation
+        self.probe_period = probe_period
+
+        self.intervals: Dict[str, int] = {t: lo for t, (lo, _hi) in self.bounds.items()}
+        self._frames_since: Dict[str, int] = {t: 0 for t in self.bounds}
+
+        # Mesures du lien
+        self.srtt: float | None = None
+        self.min_rtt: float | None = None
+        self.queue_depth = 0
+        self.delivery_rate = 0.0  # octets/s
+        self.bytes_sent = 0
+        self.send_failures = 0
+
+        self._failed_since_update = False
+        self._last_update = time.monotonic()
+        self._last_change = self._last_update
+        self._last_delivered = 0
+
+    # ---- Décision d'envoi ----
+
+    def should_send(self, msg_type: str) -> bool:
+        """Indique si un message de ce type doit être envoyé à cette frame."""
+        interval = self.intervals.get(msg_type)
+        if interval is None:
+            return True
+        self._frames_since[msg_type] += 1
+        if self._frames_since[msg_type] >= interval:
+            self._frames_since[msg_type] = 0
+            return True
+        return False
+
+    # ---- Mesures ----
+
+    def on_sent(self, nbytes: int) -> None:
+        self.bytes_sent += nbytes
+
+    def on_send_failed(self) -> None:
+        self.send_failures += 1
+        self._failed_since_update = True
+
+    def observe_rtt(self, rtt: float) -> None:
+        if rtt < 0:
+            return
+        if self.srtt is None:
+            self.srtt = rtt
+        else:
+            self.srtt += (rtt - self.srtt) * self.RTT_GAIN
+        if self.min_rtt is None or rtt < self.min_rtt:
+            self.min_rtt = rtt
+
+    def is_congested(self) -> bool:
+        if self._failed_since_update:
+            return True
+        if self.queue_depth > self.queue_high:
+            return True
+        if self.srtt is not None and self.min_rtt is not None:
+            if self.srtt - self.min_rtt > self.rtt_inflation:
+                return True
+        return False
+
+    def update(self, sock: socket.socket | None, queue_depth: int | None = None) -> None:
+        """Échantillonne le lien et ajuste les intervalles. À appeler une fois par frame.
+
+        Args:
+            sock: Socket dont on lit la file d'envoi du noyau
+            queue_depth: Profondeur de file déjà connue (octets), prioritaire sur sock
+        """
+        now = time.monotonic()
+        dt = now - self._last_update
+        if dt <= 0:
+            return
+
+        # Profondeur de file : octets écrits mais pas encore acquittés par le pair.
+        # Si le système ne la fournit pas, on se rabat sur les octets acceptés.
+        if queue_depth is None and sock is not None:
+            queue_depth = get_unsent_bytes(sock)
+        self.queue_depth = queue_depth if queue_depth is not None else 0
+        delivered = self.bytes_sent - self.queue_depth
+        rate = max(0, delivered - self._last_delivered) / dt
+        self.delivery_rate += (rate - self.delivery_rate) * self.RATE_GAIN
+        self._last_delivered = delivered
+        self._last_update = now
+
+        if self.is_congested():
+            # Diminution multiplicative, au plus une fois par RTT
+            cooldown = self.srtt if self.srtt is not None else 0.0
+            if now - self._last_change >= cooldown:
+                for msg_type, (_lo, hi) in self.bounds.items():
+                    self.intervals[msg_type] = min(hi, self.intervals[msg_type] * 2)
+                self._last_change = now
+        elif now - self._last_change >= self.probe_period:
+            # Augmentation additive après une période saine
+            for msg_type, (lo, _hi) in self.bounds.items():
+                self.intervals[msg_type] = max(lo, self.intervals[msg_type] - 1)
+            self._last_change = now
+
+        self._failed_since_update = False
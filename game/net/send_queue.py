@@ -0,0 +1,78 @@
+"""File d'envoi d'une connexion : priorité aux événements, fusion des états.
+
+Deux classes de messages (cf. ``protocol.STATE_MESSAGE_TYPES``) :
+
+- événements fiables (touches, destructions, scores, configuration, pings...) :
+  file FIFO, jamais abandonnés, toujours écrits avant les états ;
+- états (balle, paddles) : un seul emplacement par clé de fusion. Un nouvel
+  état remplace celui encore en file, si bien qu'un lien congestionné
+  n'accumule jamais de positions périmées : le retard reste d'un tick.
+
+Les événements passant avant les états, un état mis en file avant un
+événement peut être écrit après lui. Pour les événements qui modifient la
+balle (cf. ``protocol.STALE_STATES_AFTER``), les états concernés encore en
+file sont donc abandonnés : le pair n'applique jamais une balle antérieure
+à un point par-dessus la remise en jeu.
+
+La file est alimentée par la boucle de jeu et vidée par le thread réseau
+sans verrou : ``deque.append``/``popleft``, l'affectation et ``popitem`` sur
+un dict sont atomiques.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+from config import NET_IO_QUEUE_SIZE
+from game.net import protocol
+
+
+class SendQueue:
+    """File d'envoi à deux niveaux de priorité.
+
+    Ordre garanti : les événements sont écrits dans l'ordre de leur ajout,
+    avant tout état en file. Un état n'est jamais écrit après un événement
+    ajouté après lui qui le rend périmé ; les autres états peuvent doubler
+    les événements.
+
+    Args:
+        max_events: Nombre maximal d'événements en attente
+    """
+
+    def __init__(self, max_events: int = NET_IO_QUEUE_SIZE):
+        self.max_events = max_events
+        self.events: Deque[Dict[str, Any]] = deque()
+        self.states: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self.coalesced = 0  # états remplacés ou périmés avant d'avoir été envoyés
+
+    def __len__(self) -> int:
+        return len(self.events) + len(self.states)
+
+    def push(self, message: Dict[str, Any]) -> bool:
+        """Ajoute un message. Retourne False si la file d'événements est pleine."""
+        key = protocol.state_key(message)
+        if key is not None:
+            if key in self.states:
+                self.coalesced += 1
+            self.states[key] = message
+            return True
+        if len(self.events) >= self.max_events:
+            return False
+        stale = protocol.STALE_STATES_AFTER.get(message.get("type"))
+        if stale and self.states:
+            # list() copie les clés d'un bloc : le thread réseau peut retirer un état en parallèle
+            for state in list(self.states):
+                if state[0] in stale and self.states.pop(state, None) is not None:
+                    self.coalesced += 1
+        self.events.append(message)
+        return True
+
+    def pop(self) -> Dict[str, Any] | None:
+        """Retire le prochain message à écrire (événements d'abord), ou None."""
+        try:
+            return self.events.popleft()
+        except IndexError:
+            pass
+        try:
+            return self.states.popitem()[1]
+        except KeyError:
+            return None
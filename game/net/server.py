@@ -1,22 +1,53 @@
+import hmac
+import json
+import secrets
+import selectors
 import socket
+import time
 from typing import Any, Dict, List
 
-from .connection import send_json, recv_json_nonblocking, get_local_ip
+from config import NET_DISCOVERY_PROBE_GRACE, NET_RECONNECT_TIMEOUT, NET_STATS_LOG_INTERVAL
+from .capture import CaptureWriter
+from .discovery import answer_tcp_probe
+from .connection import FrameReader, get_local_ip, get_unsent_bytes
+from .rate_control import SendRateController
+from .io_thread import NetworkIOThread
+from .clock_sync import ClockSync, process_sync_messages
+from .stats import NetStats
+from .transport import Transport
+from . import protocol
 
 
-class ChessPingServer:
+class ChessPingServer(Transport):
     """Serveur TCP simple pour Chess-Ping.
 
-    Gère une seule connexion client pour l'instant.
+    Gère une seule connexion client pour l'instant. Avec capture_path, toutes
+    les trames échangées sont enregistrées (cf. game/net/capture.py).
     """
 
-    def __init__(self, host: str = "0.0.0.0", port: int = 5050):
+    def __init__(self, host: str = "0.0.0.0", port: int = 5050, capture_path: str | None = None):
         self.host = host
         self.port = port
         self.sock: socket.socket | None = None
         self.client_sock: socket.socket | None = None
         self.client_addr: tuple[str, int] | None = None
-        self.recv_buffer = bytearray()
+        self.reader = FrameReader()
+        self.rate_controller = SendRateController()
+        self.clock_sync = ClockSync()
+        # Compteurs par type de message (cf. stats.snapshot())
+        self.stats = NetStats("serveur", NET_STATS_LOG_INTERVAL)
+        self.capture = CaptureWriter(capture_path, "server") if capture_path else None
+        # Thread réseau, démarré au premier échange de jeu (après la configuration)
+        self.io: NetworkIOThread | None = None
+        # Jeton permettant au client de reprendre la partie après une coupure
+        self.session_token = secrets.token_hex(16)
+        # Attente non bloquante du client (poll_accept) : connexions acceptées
+        # pas encore identifiées (joueur ou sonde), avec leur échéance
+        self.selector: selectors.BaseSelector | None = None
+        self.pending: Dict[socket.socket, tuple[tuple[str, int], float]] = {}
+        # Reprise (poll_reconnect) : connexions en attente de leur MSG_RESUME,
+        # avec leur lecteur et leur échéance
+        self.resuming: Dict[socket.socket, tuple[tuple[str, int], FrameReader, float]] = {}
 
     def start_listening(self) -> None:
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -27,45 +58,258 @@ class ChessPingServer:
     def accept_client_blocking(self) -> None:
         if self.sock is None:
             raise RuntimeError("Server socket not started. Call start_listening() first.")
-        self.client_sock, self.client_addr = self.sock.accept()
+        while True:
+            conn, addr = self.sock.accept()
+            # Les sondes de découverte (cf. discovery.py) reçoivent l'annonce et sont fermées
+            if not answer_tcp_probe(conn, self.port):
+                break
+        self.client_sock, self.client_addr = conn, addr
         # Mettre le socket client en mode non-bloquant pour le jeu
         if self.client_sock:
             self.client_sock.setblocking(False)
 
+    def poll_accept(self) -> bool:
+        """Attend le client sans bloquer (à appeler à chaque frame d'un écran).
+
+        Le socket d'écoute et les connexions acceptées sont surveillés par un
+        sélecteur. Une connexion qui envoie MSG_DISCOVER (ou ferme) est une
+        sonde : elle reçoit l'annonce et est fermée. Une connexion silencieuse
+        pendant NET_DISCOVERY_PROBE_GRACE secondes est retenue comme joueur,
+        mais reste remplaçable jusqu'à la configuration : une sonde ralentie
+        par le réseau finit par parler ou fermer, et la première connexion
+        silencieuse gardée en réserve prend alors sa place. Les connexions
+        en réserve sont refusées à l'envoi de la configuration.
+
+        Retourne True tant qu'un client est connecté.
+        """
+        if self.sock is None:
+            raise RuntimeError("Server socket not started. Call start_listening() first.")
+        self._ensure_selector()
+
+        now = time.monotonic()
+        for key, _ in self.selector.select(0):
+            conn = key.fileobj
+            if conn is self.sock:
+                try:
+                    conn, addr = self.sock.accept()
+                except (BlockingIOError, InterruptedError):
+                    continue
+                conn.setblocking(False)
+                self.pending[conn] = (addr, now + NET_DISCOVERY_PROBE_GRACE)
+                self.selector.register(conn, selectors.EVENT_READ)
+            elif conn is self.client_sock:
+                # Un joueur n'envoie rien avant la configuration : c'était une
+                # sonde lente (annonce, puis fermeture) ou il s'est déconnecté
+                self.selector.unregister(conn)
+                if answer_tcp_probe(conn, self.port, grace=0.0):
+                    self.client_sock = None
+                    self.client_addr = None
+            else:
+                addr, _ = self.pending.pop(conn)
+                self.selector.unregister(conn)
+                if not answer_tcp_probe(conn, self.port, grace=0.0):
+                    self._adopt_client(conn, addr)
+
+        for conn, (addr, deadline) in list(self.pending.items()):
+            # Sans place libre, la connexion silencieuse reste en réserve
+            if now >= deadline and self.client_sock is None:
+                del self.pending[conn]
+                self.selector.unregister(conn)
+                self._adopt_client(conn, addr)
+        return self.client_sock is not None
+
+    def _ensure_selector(self) -> None:
+        if self.selector is None:
+            self.sock.setblocking(False)
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.sock, selectors.EVENT_READ)
+
+    def _adopt_client(self, conn: socket.socket, addr: tuple[str, int]) -> None:
+        if self.client_sock is not None:
+            # Une seule partie : les joueurs suivants sont refusés
+            conn.close()
+            return
+        self.client_sock, self.client_addr = conn, addr
+        self.selector.register(conn, selectors.EVENT_READ)
+
+    def _stop_accepting(self) -> None:
+        """Fin de l'attente du client : libère le sélecteur et les connexions en suspens."""
+        for conn in self.pending:
+            conn.close()
+        self.pending.clear()
+        for conn in self.resuming:
+            conn.close()
+        self.resuming.clear()
+        if self.selector is not None:
+            self.selector.close()
+            self.selector = None
+
     def send_config(self, config_msg: Dict[str, Any]) -> None:
         if self.client_sock is None:
             raise RuntimeError("No client connected")
-        send_json(self.client_sock, config_msg)
+        self._stop_accepting()
+        # Via la file d'envoi : le socket client est non-bloquant, un sendall
+        # interrompu laisserait une trame partielle dans le flux
+        if not self.send_game_message(config_msg):
+            raise RuntimeError("Could not queue config message")
 
-    def send_game_message(self, message: Dict[str, Any]) -> bool:
-        """Envoie un message de jeu au client. Retourne False si échec."""
+    @property
+    def connected(self) -> bool:
+        """Client connecté et entendu récemment (messages de présence compris)."""
         if self.client_sock is None:
             return False
-        try:
-            send_json(self.client_sock, message)
-            return True
-        except Exception:
+        return self.io is None or self.io.alive
+
+    def poll_reconnect(self, timeout: float = NET_RECONNECT_TIMEOUT) -> bool:
+        """Accepte sans bloquer une reconnexion du client (MSG_RESUME avec le bon jeton).
+
+        À appeler à chaque frame pendant une coupure. Comme pour poll_accept,
+        le socket d'écoute et les connexions acceptées sont surveillés par le
+        sélecteur ; une connexion sans demande de reprise valide dans les
+        ``timeout`` secondes est fermée.
+
+        Retourne True si la connexion a été remplacée ; l'appelant doit alors
+        renvoyer l'état complet de la partie.
+        """
+        if self.sock is None:
             return False
+        self._ensure_selector()
 
-    def recv_game_messages(self) -> List[Dict[str, Any]]:
-        """Reçoit tous les messages de jeu disponibles (non-bloquant)."""
-        if self.client_sock is None:
-            return []
-        return recv_json_nonblocking(self.client_sock, self.recv_buffer)
+        now = time.monotonic()
+        for key, _ in self.selector.select(0):
+            conn = key.fileobj
+            if conn is self.sock:
+                try:
+                    conn, addr = self.sock.accept()
+                except (BlockingIOError, InterruptedError):
+                    continue
+                conn.setblocking(False)
+                self.resuming[conn] = (addr, FrameReader(), now + timeout)
+                self.selector.register(conn, selectors.EVENT_READ)
+                continue
+            if conn not in self.resuming:
+                continue
+            addr, reader, _deadline = self.resuming[conn]
+            try:
+                reader.fill(conn)
+            except OSError:
+                reader.closed = True
+            frame = reader.next_frame()
+            if frame is None:
+                if reader.closed:
+                    self._forget_resuming(conn)
+                continue
+            self._forget_resuming(conn, close=False)
+            if not self._is_resume(frame):
+                conn.close()
+                continue
 
-    def close(self) -> None:
+            self._drop_client()
+            self.client_sock, self.client_addr = conn, addr
+            # Les octets reçus après la demande de reprise restent dans le lecteur
+            self.reader = reader
+            return True
+
+        for conn, (_addr, _reader, deadline) in list(self.resuming.items()):
+            if now >= deadline:
+                self._forget_resuming(conn)
+        return False
+
+    def _forget_resuming(self, conn: socket.socket, close: bool = True) -> None:
+        del self.resuming[conn]
+        self.selector.unregister(conn)
+        if close:
+            conn.close()
+
+    def _is_resume(self, frame: bytes) -> bool:
+        """La trame est une demande de reprise portant le jeton de la session."""
+        try:
+            msg = json.loads(frame)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return False
+        if not isinstance(msg, dict):
+            return False
+        token = msg.get("session")
+        return (
+            msg.get("type") == protocol.MSG_RESUME
+            and isinstance(token, str)
+            and hmac.compare_digest(token, self.session_token)
+        )
+
+    def _drop_client(self) -> None:
+        if self.io is not None:
+            self.io.stop()
+            self.io = None
         if self.client_sock is not None:
             try:
                 self.client_sock.close()
             except Exception:
                 pass
             self.client_sock = None
+
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        """Met un message de jeu en file d'envoi vers le client. Retourne False si échec."""
+        io = self._io_thread()
+        if io is None:
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        if not io.send(message):
+            self.rate_controller.on_send_failed()
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        return True
+
+    def _io_thread(self) -> NetworkIOThread | None:
+        """Thread réseau de la connexion, démarré à la première utilisation."""
+        if self.io is None and self.client_sock is not None:
+            self.io = NetworkIOThread(
+                self.client_sock,
+                self.reader,
+                on_sent=self.rate_controller.on_sent,
+                # Pings/pongs traités dans le thread réseau, à leur réception
+                filter_messages=lambda messages, recv_time: process_sync_messages(self, messages, recv_time),
+                stats=self.stats,
+                capture=self.capture,
+            )
+            self.io.start()
+        return self.io
+
+    def update_send_rate(self) -> None:
+        """Échantillonne le lien pour le contrôle adaptatif du débit (une fois par frame)."""
+        if self.client_sock is None:
+            return
+        # File d'envoi : octets non acquittés dans le noyau + octets encore en file côté thread
+        depth = get_unsent_bytes(self.client_sock) or 0
+        if self.io is not None:
+            depth += self.io.pending_bytes
+            self.stats.sample_queues(
+                coalesced=self.io.outbox.coalesced,
+                outbox=len(self.io.outbox),
+                inbox=len(self.io.inbox),
+                unsent_bytes=depth,
+            )
+        self.stats.maybe_log()
+        self.rate_controller.update(self.client_sock, queue_depth=depth)
+
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        """Retourne les messages de jeu reçus depuis le dernier appel (non-bloquant)."""
+        io = self._io_thread()
+        if io is None:
+            return []
+        # Les pings/pongs ont déjà été traités par le thread réseau
+        return io.receive()
+
+    def close(self) -> None:
+        self._stop_accepting()
+        self._drop_client()
         if self.sock is not None:
             try:
                 self.sock.close()
             except Exception:
                 pass
             self.sock = None
+        if self.capture is not None:
+            self.capture.close()
 
     @staticmethod
     def get_display_ip() -> str:
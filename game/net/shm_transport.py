@@ -0,0 +1,273 @@
+"""Transport en mémoire partagée entre deux processus de la même machine.
+
+Chaque sens de communication est un anneau d'octets à producteur unique et
+consommateur unique (SPSC) dans un segment ``multiprocessing.shared_memory``.
+Les trames sont exactement celles du chemin socket (JSON terminé par '\n') :
+le consommateur les découpe avec le même ``FrameReader``.
+
+Organisation d'un segment :
+
+- octets 0-7 : ``head``, total des octets écrits (producteur seulement) ;
+- octets 8-15 : fermeture du producteur (0 si ouvert, sinon ``head`` final + 1) ;
+- octets 16-23 : capacité de l'anneau, écrite à la création et relue à
+  l'ouverture (``shm.size`` peut être arrondi à la page selon la plateforme) ;
+- octets 64-71 : ``tail``, total des octets lus (consommateur seulement) ;
+- à partir de l'octet 128 : données de l'anneau.
+
+``head`` et ``tail`` sont des compteurs 64 bits croissants : l'espace occupé
+est ``head - tail``, sans ambiguïté anneau plein/vide. Chaque index n'a qu'un
+écrivain ; les deux sont sur des lignes de cache distinctes pour éviter le
+faux partage.
+
+Python n'offre pas de barrière mémoire : sur un processeur à ordre faible
+(ARM), le nouveau ``head`` peut être visible avant la trame qu'il publie.
+Chaque trame est donc précédée d'un en-tête (position absolue, longueur,
+CRC32) et le consommateur ne l'accepte que si l'en-tête est à sa position et
+que le CRC correspond ; sinon il s'arrête et relit à la réception suivante.
+Il ne publie le nouveau ``tail`` qu'après cette vérification, qui dépend des
+octets lus : le producteur ne peut pas réécrire une zone en cours de lecture.
+La fermeture porte le ``head`` final pour la même raison.
+
+Aucun appel système par message : envoyer est une copie mémoire, recevoir
+est une lecture des index. La réception se fait par scrutation (appel à
+chaque frame ou tick), sans réveil.
+
+Ce transport n'est choisi ni par config.py ni par main.py : seul
+tools/bench_protocol.py l'utilise, et un script de bots ou de charge peut
+passer une ``ShmConnection`` aux moteurs réseau.
+"""
+
+import json
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import Any, Dict, List
+
+from config import NET_SHM_CAPACITY
+from .clock_sync import ClockSync, process_sync_messages
+from .connection import ENCODING, FrameReader
+from .rate_control import SendRateController
+from .stats import NetStats
+from .transport import Transport
+from . import protocol
+
+
+HEAD_OFFSET = 0
+CLOSED_OFFSET = 8
+CAPACITY_OFFSET = 16
+TAIL_OFFSET = 64
+DATA_OFFSET = 128
+_INDEX = struct.Struct("<Q")
+# En-tête de trame : position absolue, longueur, CRC32 de la trame
+_RECORD = struct.Struct("<QII")
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Ouvre un segment existant sans le confier au suivi de ressources du processus.
+
+    Sans cela, le processus qui s'attache détruirait le segment à sa sortie
+    (avant Python 3.13, ``track=False`` n'existe pas).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class ShmRing:
+    """Anneau d'octets SPSC dans un segment de mémoire partagée.
+
+    Args:
+        shm: Segment (créé ou ouvert), capacité déjà inscrite dans l'en-tête
+        owner: Le segment a été créé par ce processus (détruit à la fermeture)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = _INDEX.unpack_from(self.buf, CAPACITY_OFFSET)[0]
+        if not 0 < self.capacity <= shm.size - DATA_OFFSET:
+            shm.close()
+            raise ValueError(f"Segment {shm.name} : capacité invalide ({self.capacity})")
+
+    @classmethod
+    def create(cls, name: str, capacity: int = NET_SHM_CAPACITY) -> "ShmRing":
+        shm = shared_memory.SharedMemory(name=name, create=True, size=DATA_OFFSET + capacity)
+        shm.buf[:DATA_OFFSET] = bytes(DATA_OFFSET)
+        _INDEX.pack_into(shm.buf, CAPACITY_OFFSET, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        return cls(_attach(name), owner=False)
+
+    @property
+    def used(self) -> int:
+        """Octets écrits et pas encore lus (en-têtes compris)."""
+        return _INDEX.unpack_from(self.buf, HEAD_OFFSET)[0] - _INDEX.unpack_from(self.buf, TAIL_OFFSET)[0]
+
+    @property
+    def drained(self) -> bool:
+        """Le producteur a fermé l'anneau et tout ce qu'il a écrit a été lu."""
+        closed_at = _INDEX.unpack_from(self.buf, CLOSED_OFFSET)[0]
+        return closed_at != 0 and _INDEX.unpack_from(self.buf, TAIL_OFFSET)[0] >= closed_at - 1
+
+    def mark_closed(self) -> None:
+        head = _INDEX.unpack_from(self.buf, HEAD_OFFSET)[0]
+        _INDEX.pack_into(self.buf, CLOSED_OFFSET, head + 1)
+
+    def _put(self, pos: int, data: bytes) -> None:
+        """Copie ``data`` à la position absolue ``pos``, en repliant en fin d'anneau."""
+        n = len(data)
+        offset = pos % self.capacity
+        first = min(n, self.capacity - offset)
+        start = DATA_OFFSET + offset
+        self.buf[start:start + first] = data[:first]
+        if first < n:
+            self.buf[DATA_OFFSET:DATA_OFFSET + n - first] = data[first:]
+
+    def _get(self, pos: int, n: int):
+        """Octets à la position absolue ``pos`` : vue directe, ou copie si repliés."""
+        offset = pos % self.capacity
+        first = min(n, self.capacity - offset)
+        start = DATA_OFFSET + offset
+        if first == n:
+            return self.buf[start:start + n]
+        return bytes(self.buf[start:start + first]) + bytes(self.buf[DATA_OFFSET:DATA_OFFSET + n - first])
+
+    def write(self, data: bytes) -> bool:
+        """Écrit une trame entière, ou rien si la place manque (côté producteur)."""
+        buf = self.buf
+        head = _INDEX.unpack_from(buf, HEAD_OFFSET)[0]
+        tail = _INDEX.unpack_from(buf, TAIL_OFFSET)[0]
+        n = _RECORD.size + len(data)
+        if not data or n > self.capacity - (head - tail):
+            return False
+        self._put(head, _RECORD.pack(head, len(data), zlib.crc32(data)))
+        self._put(head + _RECORD.size, data)
+        # Publier après la copie ; le consommateur vérifie quand même l'en-tête et le CRC
+        _INDEX.pack_into(buf, HEAD_OFFSET, head + n)
+        return True
+
+    def read_into(self, reader: FrameReader) -> int:
+        """Transfère les trames complètes disponibles dans ``reader`` (côté consommateur).
+
+        Retourne le nombre d'octets consommés dans l'anneau.
+        """
+        buf = self.buf
+        head = _INDEX.unpack_from(buf, HEAD_OFFSET)[0]
+        tail = _INDEX.unpack_from(buf, TAIL_OFFSET)[0]
+        pos = tail
+        while head - pos > _RECORD.size:
+            start, length, crc = _RECORD.unpack(self._get(pos, _RECORD.size))
+            end = pos + _RECORD.size + length
+            if start != pos or length == 0 or end > head:
+                # En-tête pas encore visible
+                break
+            data = self._get(pos + _RECORD.size, length)
+            if zlib.crc32(data) != crc:
+                # Trame pas encore entièrement visible : relue à la prochaine réception
+                break
+            reader.feed(data)
+            pos = end
+        if pos != tail:
+            _INDEX.pack_into(buf, TAIL_OFFSET, pos)
+        return pos - tail
+
+    def close(self) -> None:
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmConnection(Transport):
+    """Connexion de jeu par mémoire partagée, utilisable à la place d'un
+    ChessPingServer ou d'un ChessPingClient par NetworkGameEngine et les
+    moteurs lockstep.
+
+    Le côté "server" crée les deux anneaux, le côté "client" s'y attache.
+    Pas de reprise de session : les deux processus partagent la machine.
+
+    Args:
+        name: Nom commun des segments (deux segments : name_s2c et name_c2s)
+        role: "server" ou "client"
+        capacity: Taille de chaque anneau en octets (côté "server")
+    """
+
+    def __init__(self, name: str, role: str = "server", capacity: int = NET_SHM_CAPACITY):
+        if role == "server":
+            self.tx = ShmRing.create(f"{name}_s2c", capacity)
+            try:
+                self.rx = ShmRing.create(f"{name}_c2s", capacity)
+            except Exception:
+                self.tx.close()
+                raise
+        else:
+            self.rx = ShmRing.attach(f"{name}_s2c")
+            self.tx = ShmRing.attach(f"{name}_c2s")
+        self.name = name
+        self.role = role
+        self.reader = FrameReader()
+        self.rate_controller = SendRateController()
+        self.clock_sync = ClockSync()
+        self.stats = NetStats(f"shm {role}")
+        self.closed = False
+
+    @property
+    def connected(self) -> bool:
+        return not self.closed and not self.rx.drained
+
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        """Encode et copie un message dans l'anneau d'émission. Retourne False si plein."""
+        if self.closed:
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        start = time.perf_counter_ns()
+        data = (json.dumps(message) + "\n").encode(ENCODING)
+        if not self.tx.write(data):
+            self.rate_controller.on_send_failed()
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        self.stats.on_encoded(message.get("type"), len(data), time.perf_counter_ns() - start)
+        self.rate_controller.on_sent(len(data))
+        return True
+
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        """Retourne les messages de jeu disponibles dans l'anneau de réception."""
+        if self.closed or self.rx.read_into(self.reader) == 0:
+            return []
+        messages = [
+            msg for msg in self.reader.read_messages(self.stats) if msg.get("type") != protocol.MSG_HEARTBEAT
+        ]
+        return process_sync_messages(self, messages, time.monotonic())
+
+    def update_send_rate(self) -> None:
+        """Échantillonne l'anneau d'émission pour le contrôle du débit (une fois par frame)."""
+        if self.closed:
+            return
+        depth = self.tx.used
+        self.stats.sample_queues(unsent_bytes=depth)
+        self.stats.maybe_log()
+        self.rate_controller.update(None, queue_depth=depth)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.tx.mark_closed()
+        self.tx.close()
+        self.rx.close()
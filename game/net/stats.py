@@ -0,0 +1,157 @@
+"""Compteurs réseau par type de message et comptabilité du débit.
+
+Pour chaque type de message : nombre et octets envoyés/reçus, temps passé à
+encoder et décoder. S'y ajoutent les trames malformées, les échecs d'envoi
+(file pleine ou connexion fermée) et les profondeurs de files échantillonnées
+à chaque frame.
+
+Les octets envoyés sont comptés à l'encodage, au moment où la trame entre
+dans le tampon d'écriture du thread réseau ; les octets reçus comptent le
+'\n' de fin de trame. Les compteurs d'émission et de réception sont tenus
+par le thread réseau, les échecs d'envoi et les files par la boucle de jeu :
+chaque compteur n'a qu'un seul écrivain. Seule la création des compteurs
+d'un nouveau type, possible depuis les deux threads, se fait sous verrou.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+
+class TypeCounters:
+    """Compteurs d'un type de message."""
+
+    __slots__ = ("sent", "sent_bytes", "received", "received_bytes", "encode_ns", "decode_ns", "send_failures")
+
+    def __init__(self):
+        self.sent = 0
+        self.sent_bytes = 0
+        self.received = 0
+        self.received_bytes = 0
+        self.encode_ns = 0
+        self.decode_ns = 0
+        self.send_failures = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class NetStats:
+    """Compteurs d'une connexion de jeu.
+
+    Args:
+        label: Nom de la connexion dans le journal ("serveur", "client"...)
+        log_interval: Période (s) du résumé imprimé par maybe_log ; 0 pour ne rien imprimer
+    """
+
+    def __init__(self, label: str = "réseau", log_interval: float = 0.0):
+        self.label = label
+        self.log_interval = log_interval
+        self.started = time.monotonic()
+        self.types: Dict[str, TypeCounters] = {}
+        self._types_lock = threading.Lock()
+        self.malformed_frames = 0
+        self.send_failures = 0
+        # Profondeurs des files (dernière valeur et maximum)
+        self.queue_depths: Dict[str, int] = {}
+        self.max_queue_depths: Dict[str, int] = {}
+        self.coalesced = 0
+        self._next_log = self.started + log_interval
+        self._last_log_snapshot: Dict[str, Any] | None = None
+
+    def _counters(self, msg_type: Any) -> TypeCounters:
+        key = msg_type if isinstance(msg_type, str) else "?"
+        counters = self.types.get(key)
+        if counters is None:
+            # Premier message de ce type : création unique, quel que soit le thread
+            with self._types_lock:
+                counters = self.types.setdefault(key, TypeCounters())
+        return counters
+
+    # ---- Thread réseau ----
+
+    def on_encoded(self, msg_type: Any, size: int, elapsed_ns: int) -> None:
+        counters = self._counters(msg_type)
+        counters.sent += 1
+        counters.sent_bytes += size
+        counters.encode_ns += elapsed_ns
+
+    def on_decoded(self, msg_type: Any, size: int, elapsed_ns: int) -> None:
+        counters = self._counters(msg_type)
+        counters.received += 1
+        counters.received_bytes += size
+        counters.decode_ns += elapsed_ns
+
+    def on_malformed(self) -> None:
+        self.malformed_frames += 1
+
+    # ---- Boucle de jeu ----
+
+    def on_send_failed(self, msg_type: Any) -> None:
+        self.send_failures += 1
+        self._counters(msg_type).send_failures += 1
+
+    def sample_queues(self, coalesced: int | None = None, **depths: int) -> None:
+        """Enregistre les profondeurs de files courantes (une fois par frame)."""
+        for name, depth in depths.items():
+            self.queue_depths[name] = depth
+            if depth > self.max_queue_depths.get(name, -1):
+                self.max_queue_depths[name] = depth
+        if coalesced is not None:
+            self.coalesced = coalesced
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copie des compteurs sous forme de dictionnaire (sérialisable en JSON)."""
+        types = {msg_type: counters.as_dict() for msg_type, counters in list(self.types.items())}
+        return {
+            "label": self.label,
+            "elapsed": time.monotonic() - self.started,
+            "types": types,
+            "sent": sum(c["sent"] for c in types.values()),
+            "sent_bytes": sum(c["sent_bytes"] for c in types.values()),
+            "received": sum(c["received"] for c in types.values()),
+            "received_bytes": sum(c["received_bytes"] for c in types.values()),
+            "malformed_frames": self.malformed_frames,
+            "send_failures": self.send_failures,
+            "coalesced": self.coalesced,
+            "queue_depths": dict(self.queue_depths),
+            "max_queue_depths": dict(self.max_queue_depths),
+        }
+
+    def maybe_log(self, now: float | None = None) -> None:
+        """Imprime un résumé du débit depuis le résumé précédent, si la période est écoulée."""
+        if self.log_interval <= 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        if now < self._next_log:
+            return
+        self._next_log = now + self.log_interval
+        snapshot = self.snapshot()
+        previous = self._last_log_snapshot
+        self._last_log_snapshot = snapshot
+        span = snapshot["elapsed"] - (previous["elapsed"] if previous else 0.0)
+        if span <= 0:
+            return
+        print(format_summary(snapshot, previous, span))
+
+
+def format_summary(snapshot: Dict[str, Any], previous: Dict[str, Any] | None, span: float) -> str:
+    """Résumé sur une ligne : débit de chaque sens, réparti par type (ko/s)."""
+
+    def rates(direction: str) -> str:
+        parts = []
+        for msg_type, counters in sorted(snapshot["types"].items()):
+            before = previous["types"].get(msg_type, {}) if previous else {}
+            delta = counters[direction] - before.get(direction, 0)
+            if delta:
+                parts.append((delta, f"{msg_type} {delta / span / 1000:.1f}"))
+        total = sum(delta for delta, _ in parts)
+        detail = ", ".join(text for _, text in sorted(parts, reverse=True))
+        return f"{total / span / 1000:.1f} ko/s ({detail})" if parts else "0.0 ko/s"
+
+    return (
+        f"[{snapshot['label']}] envoi {rates('sent_bytes')} | réception {rates('received_bytes')}"
+        f" | malformés {snapshot['malformed_frames']}, échecs d'envoi {snapshot['send_failures']},"
+        f" files max {snapshot['max_queue_depths']}"
+    )
@@ -0,0 +1,165 @@
+"""Interface commune des connexions de jeu, et transport en mémoire.
+
+Les moteurs réseau (NetworkGameEngine, LockstepGameEngine, RollbackGameEngine)
+n'utilisent de leur connexion que les méthodes de ``Transport`` : envoi et
+réception de messages de jeu, contrôle du débit, mesure du RTT, état de la
+liaison et reprise. ChessPingServer, ChessPingClient, ShmConnection,
+LoopbackTransport et RoomConnection (salle du serveur dédié) l'implémentent.
+
+``LoopbackTransport`` relie deux moteurs dans le même processus, sans socket
+ni thread : un message envoyé est encodé comme sur TCP, puis décodé à la
+réception suivante du pair. Deux moteurs appelés tour à tour avancent donc de
+façon reproductible, sans dépendre de l'ordonnanceur ni du réseau. Avec
+``delay``, un message n'est livré qu'après ce nombre de réceptions du pair :
+une latence reproductible, comptée en frames.
+"""
+
+import abc
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from .clock_sync import ClockSync, process_sync_messages
+from .connection import ENCODING, FrameReader
+from .rate_control import SendRateController
+from .stats import NetStats
+from . import protocol
+
+
+def send_ping_if_due(clock_sync: ClockSync, send: Callable[[Dict[str, Any]], Any]) -> None:
+    """Envoie un ping de mesure du RTT par ``send`` si l'intervalle de ``clock_sync`` est écoulé."""
+    now = time.monotonic()
+    if clock_sync.ping_due(now):
+        send(protocol.make_ping_message(now))
+
+
+class Transport(abc.ABC):
+    """Connexion de jeu vue par les moteurs réseau.
+
+    Les sous-classes fournissent ``rate_controller``, ``clock_sync`` et
+    ``stats``, et implémentent l'envoi, la réception, l'échantillonnage du
+    lien et la fermeture (méthodes abstraites : une implémentation
+    incomplète échoue dès sa construction).
+    """
+
+    rate_controller: SendRateController
+    clock_sync: ClockSync
+    stats: NetStats
+    # Jeton de reprise de session, None si le transport n'en a pas
+    session_token: str | None = None
+
+    @property
+    @abc.abstractmethod
+    def connected(self) -> bool:
+        """Pair connecté et entendu récemment."""
+
+    @abc.abstractmethod
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        """Envoie un message de jeu au pair. Retourne False si échec."""
+
+    @abc.abstractmethod
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        """Retourne les messages de jeu reçus depuis le dernier appel (non-bloquant)."""
+
+    @abc.abstractmethod
+    def update_send_rate(self) -> None:
+        """Échantillonne le lien pour le contrôle adaptatif du débit (une fois par frame)."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Ferme la connexion."""
+
+    def poll_reconnect(self, timeout: float = 0.0) -> bool:
+        """Côté serveur, sans bloquer : accepte une reprise de session. Retourne True si la liaison est rétablie."""
+        return False
+
+    def reconnect(self, timeout: float = 0.0) -> bool:
+        """Côté client, sans bloquer : rouvre la liaison et demande la reprise. Retourne True en cas de succès."""
+        return False
+
+    def maybe_send_ping(self) -> None:
+        """Envoie un ping de mesure du RTT si l'intervalle est écoulé."""
+        send_ping_if_due(self.clock_sync, self.send_game_message)
+
+    @property
+    def rtt(self) -> float | None:
+        """RTT lissé avec le pair (secondes), None avant la première mesure."""
+        return self.clock_sync.srtt
+
+    @property
+    def clock_offset(self) -> float | None:
+        """Écart estimé horloge du pair - horloge locale (secondes)."""
+        return self.clock_sync.offset
+
+
+class LoopbackTransport(Transport):
+    """Extrémité d'une liaison en mémoire (cf. ``make_loopback_pair``).
+
+    Args:
+        label: Nom de l'extrémité dans les compteurs ("serveur", "client"...)
+        delay: Réceptions du pair avant la livraison d'un message envoyé
+    """
+
+    def __init__(self, label: str = "loopback", delay: int = 0):
+        self.peer: "LoopbackTransport | None" = None
+        self.delay = delay
+        self.reader = FrameReader()
+        # Octets reçus pas encore livrés : (réception de livraison, octets)
+        self.in_flight: Deque[Tuple[int, bytes]] = deque()
+        self.receives = 0
+        self.rate_controller = SendRateController()
+        self.clock_sync = ClockSync()
+        self.stats = NetStats(label)
+        self.closed = False
+
+    @property
+    def connected(self) -> bool:
+        return not self.closed and self.peer is not None and not self.peer.closed
+
+    def send_game_message(self, message: Dict[str, Any]) -> bool:
+        """Encode le message et le dépose dans le tampon de réception du pair."""
+        if not self.connected:
+            self.stats.on_send_failed(message.get("type"))
+            return False
+        start = time.perf_counter_ns()
+        data = (json.dumps(message) + "\n").encode(ENCODING)
+        if self.delay > 0:
+            self.peer.in_flight.append((self.peer.receives + self.delay, data))
+        else:
+            self.peer.reader.feed(data)
+        self.stats.on_encoded(message.get("type"), len(data), time.perf_counter_ns() - start)
+        self.rate_controller.on_sent(len(data))
+        return True
+
+    def recv_game_messages(self) -> List[Dict[str, Any]]:
+        """Décode les messages déposés par le pair depuis le dernier appel."""
+        self.receives += 1
+        while self.in_flight and self.in_flight[0][0] <= self.receives:
+            self.reader.feed(self.in_flight.popleft()[1])
+        if self.closed or self.reader.pending == 0:
+            return []
+        messages = [
+            msg for msg in self.reader.read_messages(self.stats) if msg.get("type") != protocol.MSG_HEARTBEAT
+        ]
+        return process_sync_messages(self, messages, time.monotonic())
+
+    def update_send_rate(self) -> None:
+        # Aucune file d'envoi : le pair reçoit les octets immédiatement
+        self.stats.sample_queues(unsent_bytes=0)
+        self.stats.maybe_log()
+        self.rate_controller.update(None, queue_depth=0)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_loopback_pair(delay: int = 0) -> Tuple[LoopbackTransport, LoopbackTransport]:
+    """Crée deux extrémités reliées : (côté serveur, côté client).
+
+    Args:
+        delay: Latence de chaque sens, en réceptions du pair (frames)
+    """
+    server, client = LoopbackTransport("serveur", delay), LoopbackTransport("client", delay)
+    server.peer, client.peer = client, server
+    return server, client
@@ -1,14 +1,30 @@
 """GameEngine pour le mode multijoueur en réseau."""
 
-from typing import Dict, Any, List
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, Any, Deque, List, Tuple
 import math
+import threading
+import time
+import zlib
 import pygame
 
 from game.engine import GameEngine
-from game.net.server import ChessPingServer
-from game.net.client import ChessPingClient
 from game.net import protocol
-from config import BALL_SPEED_X, BALL_SPEED_Y
+from game.net.interpolation import SnapshotBuffer
+from game.net.transport import Transport
+from game.tick_thread import FixedRateTicker
+from config import (
+    BALL_SPEED_X,
+    BALL_SPEED_Y,
+    NET_INPUT_HISTORY,
+    NET_INPUT_MAX_DRIFT,
+    NET_LAG_COMP_MAX_REWIND,
+    NET_SERVER_MAX_TICK_LAG,
+    NET_SERVER_TICK_RATE,
+    NET_STATE_HASH_INTERVAL,
+    NET_STATE_HASH_MISMATCHES,
+)
 
 
 class NetworkGameEngine(GameEngine):
@@ -16,6 +32,30 @@ class NetworkGameEngine(GameEngine):
     
     Le serveur a l'autorité sur la balle et les collisions.
     Les clients envoient leurs positions de paddle et reçoivent les mises à jour.
+
+    En mode serveur avec controlled_paddle=None (serveur dédié), aucun paddle
+    n'est contrôlé localement : les deux joueurs sont distants. En mode client
+    avec controlled_paddle=None, le client est un spectateur.
+
+    Avec paddle_mode="input", les clients n'envoient que les transitions de
+    leurs touches (MSG_INPUT, étiquetées par leur tick) ; le serveur simule
+    les paddles distants avec Paddle.update et renvoie leurs positions, que
+    le client réconcilie avec sa prédiction locale.
+
+    Avec tick_thread=True (mode serveur), la simulation autoritaire tourne
+    dans un thread à cadence fixe : une frame de rendu lente (déplacement de
+    fenêtre, rendu logiciel) ne ralentit plus la partie. Le rendu dessine le
+    dernier état validé (committed_state) ; il ne prend sim_lock que pour les
+    rares modifications qu'il déclenche (clics, panneaux de configuration).
+
+    Avec lag_compensation=True (mode serveur), les positions de paddle
+    reçues portent le tick serveur de la balle que le client voyait : un coup
+    manqué sur la balle courante mais réussi sur la balle vue par le client
+    (au plus NET_LAG_COMP_MAX_REWIND ticks en arrière) est accordé.
+
+    Tous les NET_STATE_HASH_INTERVAL ticks, le serveur envoie une empreinte
+    de l'état répliqué (state_digest) ; un client dont l'empreinte diffère
+    plusieurs fois de suite demande un MSG_FULL_STATE.
     """
 
     def __init__(
@@ -24,9 +64,14 @@ class NetworkGameEngine(GameEngine):
         setup_config: Dict | None = None,
         first_server: str = "left",
         network_mode: str = "server",  # "server" ou "client"
-        server_conn: ChessPingServer | None = None,
-        client_conn: ChessPingClient | None = None,
-        controlled_paddle: str = "left",  # "left" ou "right"
+        server_conn: Transport | None = None,
+        client_conn: Transport | None = None,
+        controlled_paddle: str | None = "left",  # "left", "right" ou None (serveur dédié, spectateur)
+        interpolate_ball: bool = False,
+        piece_ids: Dict[str, List[int]] | None = None,  # identifiants reçus dans la configuration
+        paddle_mode: str = protocol.PADDLE_MODE_STATE,  # "state" ou "input"
+        tick_thread: bool = False,  # simulation serveur dans un thread à cadence fixe
+        lag_compensation: bool = False,  # juger les coups distants sur la balle vue par le client
     ):
         super().__init__(screen, setup_config, first_server)
         
@@ -34,24 +79,269 @@ class NetworkGameEngine(GameEngine):
         self.server_conn = server_conn
         self.client_conn = client_conn
         self.controlled_paddle = controlled_paddle  # Quel paddle ce joueur contrôle
+        self.paddle_mode = paddle_mode
         
-        # Compteur de frames pour limiter les mises à jour réseau
-        self.network_update_counter = 0
-        self.network_update_interval = 1  # Envoyer des updates toutes les N frames
-        
-        # Pour le serveur : suivi des indices de pièces pour la synchronisation
-        self._build_piece_indices()
+        # Côté client : adopter les identifiants de pièces du serveur
+        if piece_ids is not None:
+            self._apply_piece_ids(piece_ids)
+
+        # Tampons d'interpolation : le paddle adverse (et éventuellement la balle
+        # côté client) est affiché avec un léger retard pour lisser la gigue réseau.
+        self.paddle_buffers = {"left": SnapshotBuffer(), "right": SnapshotBuffer()}
+        self.ball_buffer = SnapshotBuffer() if interpolate_ball and network_mode == "client" else None
+
+        # Tick de simulation du serveur : incrémenté à chaque frame côté serveur,
+        # dernier tick reçu côté client. Chaque message d'état serveur est horodaté.
+        self.server_tick = 0
+        # Côté client : tick de la dernière mise à jour de balle appliquée, et
+        # tick de la balle affichée quand elle est interpolée (None sinon)
+        self.ball_tick = 0
+        self.shown_ball_tick: float | None = None
+
+        # Mode "input", côté client : tick local et entrées appliquées
+        # localement (prédiction), rejouées après chaque position du serveur
+        self.input_tick = 0
+        self.input_history: Deque[Tuple[int, bool, bool]] = deque(maxlen=NET_INPUT_HISTORY)
+        self._local_keys = (False, False)
+        self._sent_keys = (False, False)
+        # Mode "input", côté serveur : transitions reçues, état courant des
+        # touches et dernier tick client simulé, par paddle distant
+        self.remote_inputs: Dict[str, Deque[Tuple[int, bool, bool]]] = {"left": deque(), "right": deque()}
+        self.remote_keys = {"left": (False, False), "right": (False, False)}
+        self.remote_input_tick = {"left": 0, "right": 0}
+
+        # Compensation de latence, côté serveur : état de la balle à chaque
+        # tick récent, pour rejuger un coup de paddle distant
+        self.lag_compensation = lag_compensation and network_mode == "server"
+        self.ball_history: Deque[Tuple[int, tuple]] = deque(maxlen=NET_LAG_COMP_MAX_REWIND + 1)
+        self.compensated_hits = 0
+
+        # Détection de désynchronisation : empreintes différentes consécutives
+        # (client) et dernier tick de resynchronisation accordée (serveur)
+        self.hash_mismatches = 0
+        self.resyncs = 0
+        self._last_resync_tick: int | None = None
+
+        # Coupure réseau : la partie est suspendue jusqu'à la reprise
+        self.link_lost = False
+
+        # Simulation serveur dans un thread dédié : état validé à chaque tick
+        # et entrées de l'hôte relevées par le thread de rendu
+        self.tick_thread = tick_thread and network_mode == "server"
+        self.sim_lock = threading.Lock()
+        self.committed_state: tuple | None = None
+        # État de la liaison au dernier tick, lu par le thread de rendu
+        self.link_ok = True
+        self.ticker: FixedRateTicker | None = None
+        self._host_keys = None
+        self._host_mouse: Tuple[int, int] = (0, 0)
         
-    def _build_piece_indices(self):
-        """Construit des dictionnaires pour retrouver l'index d'une pièce."""
-        self.piece_to_index_left = {id(piece): i for i, piece in enumerate(self.pieces_left)}
-        self.piece_to_index_right = {id(piece): i for i, piece in enumerate(self.pieces_right)}
+    def _apply_piece_ids(self, piece_ids: Dict[str, List[int]]):
+        """Attribue aux pièces locales les identifiants annoncés par le serveur.
+
+        Les pièces sont créées dans le même ordre des deux côtés à partir de
+        la même configuration ; les identifiants sont associés dans cet ordre.
+        """
+        for side, pieces in (("left", self.pieces_left), ("right", self.pieces_right)):
+            ids = piece_ids.get(side)
+            if not isinstance(ids, list) or len(ids) != len(pieces):
+                print(f"Identifiants de pièces {side} incohérents avec la configuration, ignorés")
+                continue
+            for piece, piece_id in zip(pieces, ids):
+                piece.piece_id = piece_id
+        self._register_pieces()
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Instantané complet de la partie (MSG_FULL_STATE)."""
+        return protocol.make_full_state_message(
+            pieces=[[piece.piece_id, piece.life] for piece in self.pieces_by_id.values()],
+            score_left=self.score_left,
+            score_right=self.score_right,
+            ball=[self.ball.x, self.ball.y, self.ball.vx, self.ball.vy],
+            ball_color=self.ball.color,
+            paddles={"left": self.left_paddle.rect.y, "right": self.right_paddle.rect.y},
+            serving=self.serving,
+            server_side=self.server_side,
+            serve_angle=self.serve_angle,
+            speed_factor=self.ball_speed_factor,
+        )
+
+    def state_digest(self) -> int:
+        """Empreinte CRC32 de l'état répliqué : vies des pièces, scores, vitesse et service.
+
+        Balle et paddles, renvoyés en continu, n'en font pas partie.
+        """
+        lives = sorted((piece.piece_id, piece.life) for piece in self.pieces_by_id.values())
+        state = (
+            lives,
+            self.score_left,
+            self.score_right,
+            round(self.ball_speed_factor * 100),
+            self.serving,
+            self.server_side,
+        )
+        return zlib.crc32(repr(state).encode("ascii"))
+
+    def _check_state_hash(self, msg: Dict[str, Any]):
+        """Compare l'empreinte du serveur à la nôtre ; demande une resynchronisation si besoin.
+
+        Une seule différence peut venir de messages encore en vol (l'empreinte,
+        message d'état, peut doubler des événements) : la demande n'est
+        envoyée qu'après NET_STATE_HASH_MISMATCHES différences consécutives.
+        """
+        if msg.get("hash") == self.state_digest():
+            self.hash_mismatches = 0
+            return
+        self.hash_mismatches += 1
+        if self.hash_mismatches < NET_STATE_HASH_MISMATCHES:
+            return
+        self.hash_mismatches = 0
+        tick = msg.get("tick")
+        if self.client_conn.send_game_message(protocol.make_resync_request_message(tick if isinstance(tick, int) else -1)):
+            self.resyncs += 1
+            print(f"Désynchronisation détectée (tick {tick}), demande de l'état complet")
+
+    def _send_resync(self):
+        """Envoie l'état complet demandé par un client, au plus une fois par intervalle d'empreinte."""
+        if self._last_resync_tick is not None and self.server_tick - self._last_resync_tick < NET_STATE_HASH_INTERVAL:
+            return
+        self._last_resync_tick = self.server_tick
+        self._send_server_message(self.snapshot_state())
+        self.resyncs += 1
+
+    def _apply_full_state(self, msg: Dict[str, Any]):
+        """Remplace l'état local par un instantané reçu du serveur."""
+        try:
+            lives = {int(piece_id): int(life) for piece_id, life in msg["pieces"]}
+            x, y, vx, vy = (float(v) for v in msg["ball"])
+        except (KeyError, TypeError, ValueError):
+            print("Instantané d'état malformé, ignoré")
+            return
+
+        # Toutes les pièces de la partie, y compris celles retirées à tort
+        # localement ; les listes sont reconstruites en place (cf. load_state)
+        for pieces, all_pieces in (
+            (self.pieces_left, self._all_pieces_left),
+            (self.pieces_right, self._all_pieces_right),
+        ):
+            for piece in all_pieces:
+                piece.life = lives.get(piece.piece_id, 0)
+            pieces[:] = [piece for piece in all_pieces if piece.life > 0]
+        self._register_pieces()
+
+        self.score_left = msg.get("score_left", self.score_left)
+        self.score_right = msg.get("score_right", self.score_right)
+        self.ball.x, self.ball.y, self.ball.vx, self.ball.vy = x, y, vx, vy
+        color = msg.get("color")
+        if isinstance(color, list) and len(color) == 3:
+            self.ball.color = tuple(color)
+        self.ball.rect.center = (int(x), int(y))
+
+        # Notre propre paddle reste sous contrôle local
+        paddles = msg.get("paddles") or {}
+        for side, paddle in (("left", self.left_paddle), ("right", self.right_paddle)):
+            if side != self.controlled_paddle and isinstance(paddles.get(side), (int, float)):
+                paddle.rect.y = int(paddles[side])
+                paddle.display_y = None
+
+        self.serving = bool(msg.get("serving", self.serving))
+        if msg.get("server_side") in ("left", "right"):
+            self.server_side = msg["server_side"]
+        if isinstance(msg.get("serve_angle"), (int, float)):
+            self.serve_angle = float(msg["serve_angle"])
+        if isinstance(msg.get("factor"), (int, float)):
+            self.ball_speed_factor = float(msg["factor"])
+
+        # Les snapshots d'interpolation antérieurs à la coupure sont périmés
+        for buffer in self.paddle_buffers.values():
+            buffer.clear()
+        if self.ball_buffer is not None:
+            self.ball_buffer.clear()
+        self.ball.display_pos = None
+        self.shown_ball_tick = None
+        if isinstance(msg.get("tick"), int):
+            self.ball_tick = msg["tick"]
+
+    def _check_connection(self) -> bool:
+        """Surveille la liaison ; en cas de coupure, tente la reprise sans bloquer.
+
+        Retourne True si la partie peut avancer normalement.
+        """
+        conn = self.server_conn if self.network_mode == "server" else self.client_conn
+        if conn is None:
+            return True
+        if conn.connected:
+            if self.link_lost:
+                # Liaison revenue sur la même connexion (pair de nouveau entendu)
+                self.link_lost = False
+                print("Liaison rétablie")
+            return True
+
+        if not self.link_lost:
+            self.link_lost = True
+            print("Connexion perdue, tentative de reprise...")
+
+        if self.network_mode == "server":
+            if conn.poll_reconnect():
+                self.link_lost = False
+                self._send_server_message(self.snapshot_state())
+                self.paddle_buffers[self._remote_side()].clear()
+                print("Client reconnecté, partie reprise")
+                return True
+        elif conn.reconnect():
+            # L'instantané du serveur arrivera comme un message de jeu
+            self.link_lost = False
+            print("Reconnecté au serveur, partie reprise")
+            return True
+        return False
+
+    def _draw_link_lost(self):
+        """Bandeau affiché pendant une coupure réseau."""
+        from config import SCREEN_WIDTH, SCREEN_HEIGHT
+        text = self.font.render("Connexion perdue - reprise en cours...", True, (255, 200, 0))
+        rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        backdrop = pygame.Surface((rect.width + 30, rect.height + 20), pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 200))
+        self.screen.blit(backdrop, backdrop.get_rect(center=rect.center))
+        self.screen.blit(text, rect)
+
+    def _remove_piece(self, piece):
+        """Retire une pièce détruite de sa liste et du registre."""
+        pieces = self.pieces_left if piece.color == "white" else self.pieces_right
+        if piece in pieces:
+            pieces.remove(piece)
+        self.pieces_by_id.pop(piece.piece_id, None)
+
+    def _send_server_message(self, message: Dict[str, Any]) -> bool:
+        """Envoie un message d'état au client, horodaté avec le tick serveur."""
+        protocol.stamp_message(message, self.server_tick, time.monotonic())
+        return self.server_conn.send_game_message(message)
+
+    def _server_timestamp(self, msg: Dict[str, Any]) -> float | None:
+        """Instant d'émission d'un message serveur, converti dans l'horloge locale.
+
+        Retourne None tant que l'écart d'horloge n'est pas estimé.
+        """
+        tick = msg.get("tick")
+        if isinstance(tick, int) and tick > self.server_tick:
+            self.server_tick = tick
+        ts = msg.get("ts")
+        if not isinstance(ts, (int, float)) or not self.client_conn.clock_sync.synced:
+            return None
+        return self.client_conn.clock_sync.to_local(ts)
 
     def _send_network_update(self):
         """Envoie les mises à jour réseau appropriées."""
+        # La fréquence d'envoi des messages d'état est adaptée au lien
+        # par le contrôleur de débit de la connexion.
         if self.network_mode == "server" and self.server_conn:
+            self.server_conn.update_send_rate()
+            self.server_conn.maybe_send_ping()
             self._send_as_server()
+            self._maybe_send_state_hash()
         elif self.network_mode == "client" and self.client_conn:
+            self.client_conn.update_send_rate()
+            self.client_conn.maybe_send_ping()
             self._send_as_client()
 
     def _send_as_server(self):
@@ -59,30 +349,53 @@ class NetworkGameEngine(GameEngine):
         if not self.server_conn:
             return
             
+        rate = self.server_conn.rate_controller
+
         # Envoyer la position de la balle (le serveur a l'autorité)
-        ball_msg = protocol.make_ball_update_message(
-            self.ball.x,
-            self.ball.y,
-            self.ball.vx,
-            self.ball.vy,
-            self.ball.color,
-        )
-        self.server_conn.send_game_message(ball_msg)
-        
-        # Envoyer la position du paddle du serveur
-        if self.controlled_paddle == "left":
-            paddle = self.left_paddle
+        if rate.should_send(protocol.MSG_BALL_UPDATE):
+            ball_msg = protocol.make_ball_update_message(
+                self.ball.x,
+                self.ball.y,
+                self.ball.vx,
+                self.ball.vy,
+                self.ball.color,
+            )
+            self._send_server_message(ball_msg)
+
+        if not rate.should_send(protocol.MSG_PADDLE_UPDATE):
+            return
+
+        # Envoyer la position du paddle du serveur (des deux paddles pour un
+        # serveur dédié, ou en mode "input" où le serveur simule aussi le paddle
+        # du client : chaque client réconcilie ou ignore son propre paddle)
+        input_mode = self.paddle_mode == protocol.PADDLE_MODE_INPUT
+        if self.controlled_paddle and not input_mode:
+            sides = [self.controlled_paddle]
         else:
-            paddle = self.right_paddle
-            
-        paddle_msg = protocol.make_paddle_update_message(
-            self.controlled_paddle, paddle.rect.y
-        )
-        self.server_conn.send_game_message(paddle_msg)
+            sides = ["left", "right"]
+        for side in sides:
+            paddle = self.left_paddle if side == "left" else self.right_paddle
+            ack = self.remote_input_tick[side] if input_mode and side != self.controlled_paddle else None
+            paddle_msg = protocol.make_paddle_update_message(side, paddle.rect.y, ack)
+            self._send_server_message(paddle_msg)
+
+    def _maybe_send_state_hash(self):
+        """Envoie l'empreinte de l'état répliqué tous les NET_STATE_HASH_INTERVAL ticks."""
+        if NET_STATE_HASH_INTERVAL > 0 and self.server_tick % NET_STATE_HASH_INTERVAL == 0:
+            self._send_server_message(protocol.make_state_hash_message(self.state_digest()))
 
     def _send_as_client(self):
-        """Le client envoie la position de son paddle."""
-        if not self.client_conn:
+        """Le client envoie la position de son paddle (ou ses transitions de touches)."""
+        if not self.client_conn or self.controlled_paddle is None:
+            return
+        if self.paddle_mode == protocol.PADDLE_MODE_INPUT:
+            # Un message par changement d'état des touches, jamais limité
+            if self._local_keys != self._sent_keys:
+                up, down = self._local_keys
+                if self.client_conn.send_game_message(protocol.make_input_message(self.input_tick, up, down)):
+                    self._sent_keys = self._local_keys
+            return
+        if not self.client_conn.rate_controller.should_send(protocol.MSG_PADDLE_UPDATE):
             return
             
         if self.controlled_paddle == "left":
@@ -91,7 +404,7 @@ class NetworkGameEngine(GameEngine):
             paddle = self.right_paddle
             
         paddle_msg = protocol.make_paddle_update_message(
-            self.controlled_paddle, paddle.rect.y
+            self.controlled_paddle, paddle.rect.y, view=self._view_tick()
         )
         self.client_conn.send_game_message(paddle_msg)
 
@@ -112,18 +425,47 @@ class NetworkGameEngine(GameEngine):
             msg_type = msg.get("type")
             
             if msg_type == protocol.MSG_PADDLE_UPDATE:
+                # En mode "input", seul le serveur déplace les paddles distants
+                if self.paddle_mode == protocol.PADDLE_MODE_INPUT:
+                    continue
                 # Mettre à jour le paddle du client
+                # La position reçue fait autorité pour les collisions,
+                # l'affichage passe par le tampon d'interpolation.
                 side = msg.get("side")
                 y = msg.get("y")
                 if side == "left":
                     self.left_paddle.rect.y = y
+                    self.paddle_buffers["left"].push((y,))
                 elif side == "right":
                     self.right_paddle.rect.y = y
+                    self.paddle_buffers["right"].push((y,))
+                else:
+                    continue
+                view = msg.get("view")
+                if self.lag_compensation and isinstance(view, int):
+                    self._compensate_paddle_hit(side, view)
                     
+            elif msg_type == protocol.MSG_INPUT:
+                side = msg.get("side") or self._remote_side()
+                if self.paddle_mode == protocol.PADDLE_MODE_INPUT and side in self.remote_inputs:
+                    self._queue_remote_input(side, msg)
+
+            elif msg_type == protocol.MSG_RESYNC_REQUEST:
+                self._send_resync()
+
             elif msg_type == protocol.MSG_SERVE_LAUNCH:
-                # Le client a décidé de lancer la balle (si c'est son tour de servir)
-                # Pour l'instant, on laisse le serveur gérer le service
-                pass
+                # Un joueur distant lance la balle : seulement si c'est son tour de servir.
+                # Sans champ "side" (connexion directe), l'émetteur est le client.
+                side = msg.get("side") or self._remote_side()
+                angle = msg.get("angle")
+                if (
+                    self.serving
+                    and side == self.server_side
+                    and side != self.controlled_paddle
+                    and isinstance(angle, (int, float))
+                ):
+                    self.serve_angle = float(angle)
+                    self._launch_ball()
 
     def _recv_as_client(self):
         """Le client reçoit les mises à jour de la balle, du paddle adverse, etc."""
@@ -133,6 +475,7 @@ class NetworkGameEngine(GameEngine):
         messages = self.client_conn.recv_game_messages()
         for msg in messages:
             msg_type = msg.get("type")
+            sent_at = self._server_timestamp(msg)
             
             if msg_type == protocol.MSG_BALL_UPDATE:
                 # Mettre à jour la position de la balle
@@ -144,6 +487,12 @@ class NetworkGameEngine(GameEngine):
                 if isinstance(color, (list, tuple)) and len(color) == 3:
                     self.ball.color = tuple(color)
                 self.ball.rect.center = (int(self.ball.x), int(self.ball.y))
+                tick = msg.get("tick")
+                if isinstance(tick, int):
+                    self.ball_tick = tick
+                if self.ball_buffer is not None:
+                    # Le tick est interpolé avec la position : c'est celui de la balle affichée
+                    self.ball_buffer.push((self.ball.x, self.ball.y, self.ball_tick), sent_at)
                 # Si la balle se met en mouvement, on quitte l'état de service
                 if self.serving and (self.ball.vx != 0 or self.ball.vy != 0):
                     self.serving = False
@@ -152,33 +501,32 @@ class NetworkGameEngine(GameEngine):
                 # Mettre à jour le paddle adverse
                 side = msg.get("side")
                 y = msg.get("y")
-                if side == "left" and self.controlled_paddle != "left":
+                if side == self.controlled_paddle and isinstance(msg.get("ack"), int):
+                    # Mode "input" : position autoritaire de notre propre paddle
+                    self._reconcile_local_paddle(y, msg["ack"])
+                elif side == "left" and self.controlled_paddle != "left":
                     self.left_paddle.rect.y = y
+                    self.paddle_buffers["left"].push((y,), sent_at)
                 elif side == "right" and self.controlled_paddle != "right":
                     self.right_paddle.rect.y = y
+                    self.paddle_buffers["right"].push((y,), sent_at)
                     
             elif msg_type == protocol.MSG_PIECE_HIT:
                 # Une pièce a été touchée
-                side = msg.get("side")
-                piece_index = msg.get("piece_index")
+                piece = self.pieces_by_id.get(msg.get("piece_id"))
                 life = msg.get("life")
-                
-                pieces = self.pieces_left if side == "left" else self.pieces_right
-                if 0 <= piece_index < len(pieces):
-                    pieces[piece_index].life = life
+                if piece is not None and isinstance(life, int):
+                    piece.life = life
                     
             elif msg_type == protocol.MSG_PIECE_DESTROYED:
                 # Une pièce a été détruite
-                side = msg.get("side")
-                piece_index = msg.get("piece_index")
-                
-                pieces = self.pieces_left if side == "left" else self.pieces_right
-                if 0 <= piece_index < len(pieces):
+                piece = self.pieces_by_id.get(msg.get("piece_id"))
+                if piece is not None:
                     # alive est une propriété en lecture seule basée sur life>0.
                     # On marque donc la pièce comme morte en mettant sa vie à 0,
-                    # puis on la retire de la liste locale pour rester aligné avec le serveur.
-                    pieces[piece_index].life = 0
-                    pieces.pop(piece_index)
+                    # puis on la retire de la liste locale et du registre.
+                    piece.life = 0
+                    self._remove_piece(piece)
                     
             elif msg_type == protocol.MSG_SCORE_UPDATE:
                 # Mise à jour des scores
@@ -190,6 +538,221 @@ class NetworkGameEngine(GameEngine):
                 if isinstance(factor, (int, float)):
                     self.ball_speed_factor = float(factor)
                     self._apply_ball_speed_factor()
+            elif msg_type == protocol.MSG_FULL_STATE:
+                # Reprise après coupure ou resynchronisation : état complet de la partie
+                self._apply_full_state(msg)
+                self.hash_mismatches = 0
+            elif msg_type == protocol.MSG_STATE_HASH:
+                self._check_state_hash(msg)
+
+    def _remote_side(self) -> str:
+        """Côté du joueur distant pour une connexion directe hôte/client."""
+        return "right" if self.controlled_paddle == "left" else "left"
+
+    def _launch_serve(self):
+        """Lance la balle localement et, côté client, transmet l'angle au serveur."""
+        angle = self.serve_angle
+        self._launch_ball()
+        if self.network_mode == "client" and self.client_conn:
+            self.client_conn.send_game_message(protocol.make_serve_launch_message(angle))
+
+    def _queue_remote_input(self, side: str, msg: Dict[str, Any]):
+        """Met en file une transition de touches d'un joueur distant (mode "input")."""
+        tick = msg.get("tick")
+        if side == self.controlled_paddle or not isinstance(tick, int):
+            return
+        queue = self.remote_inputs[side]
+        next_tick = self.remote_input_tick[side] + 1
+        if abs(tick - next_tick) > NET_INPUT_MAX_DRIFT:
+            # Premier message, ou horloge de ticks trop décalée : se recaler
+            queue.clear()
+            self.remote_input_tick[side] = tick - 1
+        queue.append((tick, bool(msg.get("up")), bool(msg.get("down"))))
+
+    def _simulate_input_paddles(self):
+        """Avance les paddles distants d'un tick selon les touches reçues (mode "input")."""
+        for side, paddle in (("left", self.left_paddle), ("right", self.right_paddle)):
+            if side == self.controlled_paddle:
+                continue
+            queue = self.remote_inputs[side]
+            next_tick = self.remote_input_tick[side] + 1
+            while queue and queue[0][0] <= next_tick:
+                _tick, up, down = queue.popleft()
+                self.remote_keys[side] = (up, down)
+            up, down = self.remote_keys[side]
+            paddle.update({paddle.up_key: up, paddle.down_key: down})
+            self.remote_input_tick[side] = next_tick
+
+    def _record_local_input(self, paddle, keys):
+        """Mémorise l'entrée locale appliquée à ce tick (mode "input", côté client)."""
+        self.input_tick += 1
+        up, down = bool(keys[paddle.up_key]), bool(keys[paddle.down_key])
+        self.input_history.append((self.input_tick, up, down))
+        self._local_keys = (up, down)
+
+    def _reconcile_local_paddle(self, y: float, ack: int):
+        """Repart de la position du serveur et rejoue les entrées qu'il n'a pas encore vues."""
+        paddle = self.left_paddle if self.controlled_paddle == "left" else self.right_paddle
+        history = self.input_history
+        while history and history[0][0] <= ack:
+            history.popleft()
+        paddle.rect.y = int(y)
+        for _tick, up, down in history:
+            paddle.update({paddle.up_key: up, paddle.down_key: down})
+
+    def _step_server(self, aim_pos: Tuple[int, int] | None = None):
+        """Avance la physique autoritaire d'une frame (mode serveur)."""
+        if self.paddle_mode == protocol.PADDLE_MODE_INPUT:
+            self._simulate_input_paddles()
+        if self.serving:
+            # Seul un hôte vise à la souris ; un serveur dédié attend MSG_SERVE_LAUNCH
+            self._update_serve(aim=self.controlled_paddle is not None, aim_pos=aim_pos)
+            # Rien à rejuger avant le service
+            self.ball_history.clear()
+        else:
+            self.ball.update()
+            self._handle_collisions()
+            if self.lag_compensation:
+                self.ball_history.append((self.server_tick, self.ball.save_state()))
+
+    def _view_tick(self) -> int:
+        """Côté client : tick serveur de la balle actuellement affichée.
+
+        Ce n'est pas server_tick, qui avance avec n'importe quel message
+        (paddle, empreinte) même quand les envois de balle sont espacés.
+        """
+        if self.shown_ball_tick is not None:
+            # Balle interpolée : affichée avec le retard du tampon
+            return round(self.shown_ball_tick)
+        return self.ball_tick
+
+    def _compensate_paddle_hit(self, side: str, view_tick: int):
+        """Rejuge un coup du paddle distant sur la balle telle que le client la voyait.
+
+        La position du paddle arrive environ un RTT après l'instant où le
+        client a vu la balle du tick view_tick. Si le paddle touchait cette
+        balle, et que la balle n'a pas rebondi depuis, le rebond est appliqué
+        à ce tick et la balle est ré-avancée jusqu'au tick courant.
+
+        Seul l'état de la balle est historisé : le paddle est pris à la
+        position que le client vient d'envoyer, c'est-à-dire celle qu'il avait
+        en regardant la balle du tick view_tick.
+        """
+        if self.serving or not self.ball_history:
+            return
+        rewind = self.ball_history[-1][0] - view_tick
+        if rewind <= 0 or rewind > NET_LAG_COMP_MAX_REWIND:
+            # Tick courant (jugé normalement) ou trop ancien
+            return
+        past = next((state for tick, state in self.ball_history if tick == view_tick), None)
+        if past is None:
+            return
+
+        # Sens du rebond sur ce paddle ; la balle devait aller vers lui, alors comme maintenant
+        direction = 1 if side == "left" else -1
+        x, y, vx, vy, _color = past
+        if vx * direction >= 0 or self.ball.vx * direction >= 0:
+            return
+        from config import BALL_RADIUS
+        paddle = self.left_paddle if side == "left" else self.right_paddle
+        coll_rect = paddle.rect.inflate(0, -2 * BALL_RADIUS)
+        past_rect = self.ball.rect.copy()
+        past_rect.center = (int(x), int(y))
+        if coll_rect.height <= 0 or not past_rect.colliderect(coll_rect):
+            return
+
+        color = (255, 0, 0) if side == "left" else (0, 0, 255)
+        self.ball.load_state((x, y, direction * abs(vx), vy, color))
+        # Ré-avance complète : la balle rejouée touche pièces et paddles
+        for _ in range(rewind):
+            self.ball.update()
+            self._handle_collisions()
+        # Historique réécrit : la balle ne repasse plus devant ce paddle
+        self.ball_history.clear()
+        self.compensated_hits += 1
+
+    def advance_server_tick(self):
+        """Exécute un tick autoritaire sans rendu : réception, physique, envoi.
+
+        Utilisé par le serveur dédié, qui n'a ni fenêtre ni paddle local.
+        """
+        self.server_tick += 1
+        self._recv_network_updates()
+        self._step_server()
+        self._send_network_update()
+
+    def _server_tick(self):
+        """Tick autoritaire de l'hôte, exécuté par le thread de simulation."""
+        with self.sim_lock:
+            self.link_ok = self._check_connection()
+            if self.link_ok:
+                self.server_tick += 1
+                self._recv_network_updates()
+                self._apply_interpolation()
+                paddle = self._controlled_paddle_object()
+                if paddle is not None and self._host_keys is not None:
+                    paddle.update(self._host_keys)
+                self._step_server(aim_pos=self._host_mouse)
+                self._send_network_update()
+            self.committed_state = self.save_state()
+
+    def _controlled_paddle_object(self):
+        if self.controlled_paddle == "left":
+            return self.left_paddle
+        if self.controlled_paddle == "right":
+            return self.right_paddle
+        return None
+
+    def _draw_committed(self, state: tuple):
+        """Dessine la partie depuis un état validé par le thread de simulation."""
+        (
+            (ball_x, ball_y, _vx, _vy, ball_color),
+            left_y,
+            right_y,
+            lives_left,
+            lives_right,
+            _last_hit,
+            _score_left,
+            _score_right,
+            serving,
+            _server_side,
+            serve_angle,
+            _factor,
+        ) = state
+        self.board.draw_board(self.screen)
+        for pieces, lives in ((self._all_pieces_left, lives_left), (self._all_pieces_right, lives_right)):
+            for piece, life in zip(pieces, lives):
+                if life > 0:
+                    self.screen.blit(piece.image, piece.rect)
+                    piece.draw_life_bar(self.screen, life)
+        for paddle, y in ((self.left_paddle, left_y), (self.right_paddle, right_y)):
+            display_y = paddle.display_y if paddle.display_y is not None else y
+            pygame.draw.rect(self.screen, paddle.color, (paddle.rect.x, display_y, paddle.width, paddle.height))
+        pygame.draw.circle(self.screen, ball_color, (int(ball_x), int(ball_y)), self.ball.radius)
+        if serving:
+            self._draw_serve_arrow((ball_x, ball_y), serve_angle)
+
+    def _apply_interpolation(self):
+        """Met à jour les positions affichées des entités distantes."""
+        now = time.monotonic()
+        for side, paddle in (("left", self.left_paddle), ("right", self.right_paddle)):
+            if side == self.controlled_paddle:
+                continue
+            values = self.paddle_buffers[side].sample(now)
+            if values is not None:
+                paddle.display_y = int(round(values[0]))
+
+        if self.ball_buffer is None:
+            return
+        # Pendant notre propre service, la balle est attachée localement au paddle
+        if self.serving and self.server_side == self.controlled_paddle:
+            self.ball.display_pos = None
+            self.shown_ball_tick = None
+            return
+        values = self.ball_buffer.sample(now)
+        if values is not None:
+            self.ball.display_pos = (values[0], values[1])
+            self.shown_ball_tick = values[2]
 
     def _handle_collisions(self):
         """Override pour gérer les collisions différemment selon le mode réseau."""
@@ -241,27 +804,23 @@ class NetworkGameEngine(GameEngine):
                 after = piece.life
                 
                 # Envoyer la mise à jour au client
-                piece_index = self.piece_to_index_left.get(id(piece), -1)
-                if piece_index >= 0 and self.server_conn:
-                    hit_msg = protocol.make_piece_hit_message("left", piece_index, after)
-                    self.server_conn.send_game_message(hit_msg)
+                if self.server_conn:
+                    hit_msg = protocol.make_piece_hit_message("left", piece.piece_id, after)
+                    self._send_server_message(hit_msg)
                 
                 self.ball.vx = abs(self.ball.vx)
                 
                 if not piece.alive:
-                    self.pieces_left.remove(piece)
+                    self._remove_piece(piece)
                     self.score_right += 1
                     
                     # Envoyer la destruction et le score
                     if self.server_conn:
-                        destroy_msg = protocol.make_piece_destroyed_message("left", piece_index)
-                        self.server_conn.send_game_message(destroy_msg)
+                        destroy_msg = protocol.make_piece_destroyed_message("left", piece.piece_id)
+                        self._send_server_message(destroy_msg)
                         
                         score_msg = protocol.make_score_update_message(self.score_left, self.score_right)
-                        self.server_conn.send_game_message(score_msg)
-                    
-                    # Reconstruire les indices
-                    self._build_piece_indices()
+                        self._send_server_message(score_msg)
                     
                 self.last_hit_piece = piece
                 hit_handled = True
@@ -280,124 +839,181 @@ class NetworkGameEngine(GameEngine):
                     after = piece.life
                     
                     # Envoyer la mise à jour au client
-                    piece_index = self.piece_to_index_right.get(id(piece), -1)
-                    if piece_index >= 0 and self.server_conn:
-                        hit_msg = protocol.make_piece_hit_message("right", piece_index, after)
-                        self.server_conn.send_game_message(hit_msg)
+                    if self.server_conn:
+                        hit_msg = protocol.make_piece_hit_message("right", piece.piece_id, after)
+                        self._send_server_message(hit_msg)
                     
                     self.ball.vx = -abs(self.ball.vx)
                     
                     if not piece.alive:
-                        self.pieces_right.remove(piece)
+                        self._remove_piece(piece)
                         self.score_left += 1
                         
                         # Envoyer la destruction et le score
                         if self.server_conn:
-                            destroy_msg = protocol.make_piece_destroyed_message("right", piece_index)
-                            self.server_conn.send_game_message(destroy_msg)
+                            destroy_msg = protocol.make_piece_destroyed_message("right", piece.piece_id)
+                            self._send_server_message(destroy_msg)
                             
                             score_msg = protocol.make_score_update_message(self.score_left, self.score_right)
-                            self.server_conn.send_game_message(score_msg)
-                        
-                        # Reconstruire les indices
-                        self._build_piece_indices()
+                            self._send_server_message(score_msg)
                         
                     self.last_hit_piece = piece
                     break
 
     def game_loop(self):
         """Boucle de jeu avec intégration réseau."""
+        if self.tick_thread:
+            # La simulation avance dans son propre thread ; cette boucle ne fait
+            # plus que relever les entrées de l'hôte et dessiner l'état validé
+            self.committed_state = self.save_state()
+            self.ticker = FixedRateTicker(self._server_tick, NET_SERVER_TICK_RATE, NET_SERVER_MAX_TICK_LAG)
+            self.ticker.start()
+        sim_guard = self.sim_lock if self.tick_thread else nullcontext()
+        try:
+            self._run_frames(sim_guard)
+        finally:
+            if self.ticker is not None:
+                self.ticker.stop()
+
+    def poll_network(self) -> bool:
+        """Début de frame : liaison, tick serveur, réception et interpolation.
+
+        Retourne False pendant une coupure (la partie est alors figée).
+        """
+        connected = self._check_connection()
+        if connected:
+            if self.network_mode == "server":
+                self.server_tick += 1
+            self._recv_network_updates()
+            self._apply_interpolation()
+        return connected
+
+    def step_frame(self, keys, aim_pos: Tuple[int, int] | None = None):
+        """Fin de frame : paddle local, physique (serveur) et envoi des mises à jour."""
+        # Update du paddle contrôlé par ce joueur
+        paddle = self._controlled_paddle_object()
+        if paddle is not None:
+            paddle.update(keys)
+            # Mode "input" : prédiction locale, mémorisée pour la réconciliation
+            if self.network_mode == "client" and self.paddle_mode == protocol.PADDLE_MODE_INPUT:
+                self._record_local_input(paddle, keys)
+
+        # Update de la physique (seulement côté serveur)
+        if self.network_mode == "server":
+            self._step_server(aim_pos)
+        else:
+            # Le client met à jour le service si c'est son paddle
+            if self.serving and self.server_side == self.controlled_paddle:
+                self._update_serve(aim_pos=aim_pos)
+
+        # Envoyer les mises à jour réseau (fréquence adaptée au lien)
+        self._send_network_update()
+
+    def run_frame(self, keys, aim_pos: Tuple[int, int] | None = None) -> bool:
+        """Une frame complète sans rendu ni événements (tests, bancs de mesure).
+
+        Deux moteurs reliés par un LoopbackTransport et appelés tour à tour
+        avancent de façon reproductible. Retourne False pendant une coupure.
+        """
+        connected = self.poll_network()
+        if connected:
+            self.step_frame(keys, aim_pos)
+        return connected
+
+    def _run_frames(self, sim_guard):
         running = True
         while running:
             self.clock.tick(60)  # FPS constant
-            
-            # Recevoir les mises à jour réseau
-            self._recv_network_updates()
+
+            if self.tick_thread:
+                connected = self.link_ok
+                if self.ticker.error is not None:
+                    running = False
+            else:
+                # Pendant une coupure, la partie est figée (rendu et événements seulement)
+                connected = self.poll_network()
             
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
-                
-                # Gérer les événements des panneaux de configuration
-                self.white_config_panel.handle_event(event)
-                self.dark_config_panel.handle_event(event)
 
-                # Gestion des boutons de vitesse de balle
-                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    if self._speed_minus_rect.collidepoint(event.pos):
-                        self.ball_speed_factor = max(self.ball_speed_min, self.ball_speed_factor - 0.1)
-                        self._apply_ball_speed_factor()
-                        # Synchroniser la nouvelle vitesse côté serveur
-                        if self.network_mode == "server" and self.server_conn:
-                            msg = protocol.make_speed_update_message(self.ball_speed_factor)
-                            self.server_conn.send_game_message(msg)
-                    elif self._speed_plus_rect.collidepoint(event.pos):
-                        self.ball_speed_factor = min(self.ball_speed_max, self.ball_speed_factor + 0.1)
-                        self._apply_ball_speed_factor()
-                        # Synchroniser la nouvelle vitesse côté serveur
-                        if self.network_mode == "server" and self.server_conn:
-                            msg = protocol.make_speed_update_message(self.ball_speed_factor)
-                            self.server_conn.send_game_message(msg)
-
-                # Lancement manuel de la balle (seulement si c'est notre tour de servir)
-                if self.serving:
-                    can_serve = (
-                        (self.server_side == self.controlled_paddle) or
-                        (self.network_mode == "server")  # Le serveur a priorité
-                    )
-                    
-                    if can_serve:
-                        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                            self._launch_ball()
-                        if event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN):
-                            self._launch_ball()
+                with sim_guard:
+                    self._handle_game_event(event, connected)
 
             keys = pygame.key.get_pressed()
 
-            # Update du paddle contrôlé par ce joueur
-            if self.controlled_paddle == "left":
-                self.left_paddle.update(keys)
-            else:
-                self.right_paddle.update(keys)
-
-            # Update de la physique (seulement côté serveur)
-            if self.network_mode == "server":
-                if self.serving:
-                    self._update_serve()
-                else:
-                    self.ball.update()
-                    self._handle_collisions()
-            else:
-                # Le client met à jour le service si c'est son paddle
-                if self.serving and self.server_side == self.controlled_paddle:
-                    self._update_serve()
-
-            # Envoyer les mises à jour réseau périodiquement
-            self.network_update_counter += 1
-            if self.network_update_counter >= self.network_update_interval:
-                self._send_network_update()
-                self.network_update_counter = 0
+            if self.tick_thread:
+                # Entrées relevées ici, appliquées au prochain tick de simulation
+                self._host_keys = keys
+                self._host_mouse = pygame.mouse.get_pos()
+            elif connected:
+                self.step_frame(keys)
 
             # Rendu (identique pour serveur et client)
-            self.screen.fill((30, 30, 30))
+            self.draw_frame(connected)
+            pygame.display.flip()
+
+    def draw_frame(self, connected: bool = True):
+        """Dessine la frame courante (sans l'afficher)."""
+        self.screen.fill((30, 30, 30))
+        if self.tick_thread:
+            self._draw_committed(self.committed_state)
+        else:
             self.board.draw_board(self.screen)
             self.board.draw_pieces(self.screen)
             self.left_paddle.draw(self.screen)
             self.right_paddle.draw(self.screen)
             self.ball.draw(self.screen)
             self._draw_serve_arrow()
-            self._draw_hud()
+        self._draw_hud()
 
-            # Dessiner un fond de footer semi-transparent sur toute la largeur
-            from config import SCREEN_WIDTH
-            footer_y = self.white_config_panel.y
-            footer_height = self.white_config_panel.get_height()
-            footer_surface = pygame.Surface((SCREEN_WIDTH, footer_height), pygame.SRCALPHA)
-            footer_surface.fill((10, 10, 20, 180))
-            self.screen.blit(footer_surface, (0, footer_y))
+        # Dessiner un fond de footer semi-transparent sur toute la largeur
+        from config import SCREEN_WIDTH
+        footer_y = self.white_config_panel.y
+        footer_height = self.white_config_panel.get_height()
+        footer_surface = pygame.Surface((SCREEN_WIDTH, footer_height), pygame.SRCALPHA)
+        footer_surface.fill((10, 10, 20, 180))
+        self.screen.blit(footer_surface, (0, footer_y))
 
-            # Dessiner les panneaux de configuration par-dessus le footer
-            self.white_config_panel.draw(self.screen)
-            self.dark_config_panel.draw(self.screen)
+        # Dessiner les panneaux de configuration par-dessus le footer
+        self.white_config_panel.draw(self.screen)
+        self.dark_config_panel.draw(self.screen)
 
-            pygame.display.flip()
+        if not connected:
+            self._draw_link_lost()
+
+    def _handle_game_event(self, event, connected: bool):
+        """Panneaux, boutons de vitesse et lancement du service."""
+        # Gérer les événements des panneaux de configuration
+        self.white_config_panel.handle_event(event)
+        self.dark_config_panel.handle_event(event)
+
+        # Gestion des boutons de vitesse de balle
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self._speed_minus_rect.collidepoint(event.pos):
+                self.ball_speed_factor = max(self.ball_speed_min, self.ball_speed_factor - 0.1)
+                self._apply_ball_speed_factor()
+                # Synchroniser la nouvelle vitesse côté serveur
+                if self.network_mode == "server" and self.server_conn:
+                    msg = protocol.make_speed_update_message(self.ball_speed_factor)
+                    self._send_server_message(msg)
+            elif self._speed_plus_rect.collidepoint(event.pos):
+                self.ball_speed_factor = min(self.ball_speed_max, self.ball_speed_factor + 0.1)
+                self._apply_ball_speed_factor()
+                # Synchroniser la nouvelle vitesse côté serveur
+                if self.network_mode == "server" and self.server_conn:
+                    msg = protocol.make_speed_update_message(self.ball_speed_factor)
+                    self._send_server_message(msg)
+
+        # Lancement manuel de la balle (seulement si c'est notre tour de servir)
+        if self.serving and connected:
+            can_serve = (
+                (self.server_side == self.controlled_paddle) or
+                (self.network_mode == "server")  # Le serveur a priorité
+            )
+            
+            if can_serve:
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    self._launch_serve()
+                if event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                    self._launch_serve()
@@ -14,18 +14,28 @@ from config import (
 )
 
 
+# Virgule fixe de FixedBall : 1 pixel = FIXED_ONE unités entières
+FIXED_ONE = 256
+
+
 class Ball:
-    def __init__(self):
+    def __init__(self, rng: random.Random | None = None):
         self.radius = BALL_RADIUS
         self.color = (0, 0, 0)  # noir par défaut
+        # Générateur aléatoire (module random par défaut) : un générateur
+        # initialisé avec une graine partagée rend reset() reproductible
+        self.rng = rng if rng is not None else random
+        # Position affichée si elle diffère de la position logique
+        # (balle interpolée côté client en réseau)
+        self.display_pos: tuple[float, float] | None = None
         self.reset()
 
     def reset(self):
         # centre du plateau
         self.x = BOARD_LEFT + BOARD_WIDTH // 2
         self.y = BOARD_TOP + BOARD_HEIGHT // 2
-        self.vx = random.choice([-1, 1]) * BALL_SPEED_X
-        self.vy = random.choice([-1, 1]) * BALL_SPEED_Y
+        self.vx = self.rng.choice([-1, 1]) * BALL_SPEED_X
+        self.vy = self.rng.choice([-1, 1]) * BALL_SPEED_Y
         self.rect = pygame.Rect(0, 0, self.radius * 2, self.radius * 2)
         self.rect.center = (self.x, self.y)
         self.color = (0, 0, 0)
@@ -61,5 +71,101 @@ class Ball:
             self.x = self.rect.centerx
             self.vx *= -1
 
+    def save_state(self) -> tuple:
+        """État de la balle sous forme de tuple immuable (cf. GameEngine.save_state)."""
+        return (self.x, self.y, self.vx, self.vy, self.color)
+
+    def load_state(self, state: tuple):
+        self.x, self.y, self.vx, self.vy, self.color = state
+        self.rect.center = (self.x, self.y)
+
     def draw(self, surface: pygame.Surface):
-        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
+        x, y = self.display_pos if self.display_pos is not None else (self.x, self.y)
+        pygame.draw.circle(surface, self.color, (int(x), int(y)), self.radius)
+
+
+class FixedBall(Ball):
+    """Balle en virgule fixe, pour une simulation identique sur chaque machine.
+
+    Positions et vitesses sont des entiers (1/FIXED_ONE pixel) : update() ne
+    fait aucun calcul flottant. Les attributs x, y, vx, vy restent lisibles et
+    modifiables en pixels ; une affectation est arrondie à l'unité fixe la
+    plus proche.
+    """
+
+    def __init__(self, rng: random.Random | None = None):
+        self.fx = 0
+        self.fy = 0
+        self.fvx = 0
+        self.fvy = 0
+        super().__init__(rng)
+
+    @property
+    def x(self) -> float:
+        return self.fx / FIXED_ONE
+
+    @x.setter
+    def x(self, value: float):
+        self.fx = round(value * FIXED_ONE)
+
+    @property
+    def y(self) -> float:
+        return self.fy / FIXED_ONE
+
+    @y.setter
+    def y(self, value: float):
+        self.fy = round(value * FIXED_ONE)
+
+    @property
+    def vx(self) -> float:
+        return self.fvx / FIXED_ONE
+
+    @vx.setter
+    def vx(self, value: float):
+        self.fvx = round(value * FIXED_ONE)
+
+    @property
+    def vy(self) -> float:
+        return self.fvy / FIXED_ONE
+
+    @vy.setter
+    def vy(self, value: float):
+        self.fvy = round(value * FIXED_ONE)
+
+    def save_state(self) -> tuple:
+        return (self.fx, self.fy, self.fvx, self.fvy, self.color)
+
+    def load_state(self, state: tuple):
+        self.fx, self.fy, self.fvx, self.fvy, self.color = state
+        self.rect.center = (self.fx // FIXED_ONE, self.fy // FIXED_ONE)
+
+    def update(self):
+        self.fx += self.fvx
+        self.fy += self.fvy
+        self.rect.center = (self.fx // FIXED_ONE, self.fy // FIXED_ONE)
+
+        # Limites du plateau
+        board_left = BOARD_LEFT
+        board_right = BOARD_LEFT + BOARD_WIDTH
+        board_top = BOARD_TOP
+        board_bottom = BOARD_TOP + BOARD_HEIGHT
+
+        # rebond haut / bas sur les bords du plateau
+        if self.rect.top <= board_top:
+            self.rect.top = board_top
+            self.fy = self.rect.centery * FIXED_ONE
+            self.fvy = -self.fvy
+        elif self.rect.bottom >= board_bottom:
+            self.rect.bottom = board_bottom
+            self.fy = self.rect.centery * FIXED_ONE
+            self.fvy = -self.fvy
+
+        # rebond gauche / droite sur les bords du plateau
+        if self.rect.left <= board_left:
+            self.rect.left = board_left
+            self.fx = self.rect.centerx * FIXED_ONE
+            self.fvx = -self.fvx
+        elif self.rect.right >= board_right:
+            self.rect.right = board_right
+            self.fx = self.rect.centerx * FIXED_ONE
+            self.fvx = -self.fvx
@@ -17,6 +17,9 @@ class Paddle:
         self.width = PADDLE_WIDTH
         self.height = PADDLE_HEIGHT
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
+        # Position Y affichée si elle diffère de la position logique
+        # (paddle distant interpolé en réseau)
+        self.display_y: int | None = None
 
     def update(self, keys):
         if keys[self.up_key]:
@@ -34,4 +37,7 @@ class Paddle:
             self.rect.bottom = board_bottom
 
     def draw(self, surface: pygame.Surface):
-        pygame.draw.rect(surface, self.color, self.rect)
+        rect = self.rect
+        if self.display_y is not None:
+            rect = self.rect.move(0, self.display_y - self.rect.y)
+        pygame.draw.rect(surface, self.color, rect)
@@ -0,0 +1,126 @@
+"""Rollback au-dessus de la simulation lockstep.
+
+Le lockstep attend les entrées du pair distant ; ici, la simulation avance
+sans attendre en prédisant ces entrées (mêmes touches que la dernière entrée
+reçue). Chaque tick simulé sur une prédiction garde un instantané de l'état
+(GameEngine.save_state). Quand l'entrée réelle arrive et diffère de la
+prédiction, l'état est restauré au tick concerné et les ticks suivants sont
+re-simulés dans la même frame. Les entrées locales s'appliquent donc sans
+délai, quel que soit le RTT.
+
+La prédiction est bornée à NET_ROLLBACK_WINDOW ticks : au-delà, la partie
+attend le pair comme en lockstep.
+"""
+
+from typing import Dict
+
+import pygame
+
+from config import NET_ROLLBACK_DELAY, NET_ROLLBACK_WINDOW
+from game.lockstep_engine import EMPTY_INPUT, LockstepGameEngine, TickInput
+
+
+class RollbackGameEngine(LockstepGameEngine):
+    """Partie réseau en rollback : prédiction des entrées distantes et re-simulation.
+
+    Args:
+        screen: Surface d'affichage
+        setup_config: Configuration des pièces (identique chez les deux pairs)
+        first_server: Premier serveur, "left" ou "right"
+        conn: Connexion au pair (Transport : ChessPingServer, ChessPingClient...)
+        controlled_paddle: Paddle contrôlé localement, "left" ou "right"
+        seed: Graine partagée du générateur aléatoire
+        input_delay: Délai d'application des entrées locales, en ticks
+        window: Nombre maximal de ticks simulés sur des entrées prédites
+    """
+
+    def __init__(
+        self,
+        screen: pygame.Surface,
+        setup_config: Dict | None = None,
+        first_server: str = "left",
+        conn=None,
+        controlled_paddle: str = "left",
+        seed: int = 0,
+        input_delay: int = NET_ROLLBACK_DELAY,
+        window: int = NET_ROLLBACK_WINDOW,
+    ):
+        super().__init__(screen, setup_config, first_server, conn, controlled_paddle, seed, input_delay)
+        self.window = window
+        # Dernier tick dont l'entrée distante est connue (TCP : reçues dans l'ordre)
+        self.confirmed_tick = input_delay - 1
+        self._last_remote_input = EMPTY_INPUT
+        # Instantanés pris avant chaque tick non confirmé, et entrées prédites utilisées
+        self.saved_states: Dict[int, tuple] = {}
+        self.predicted: Dict[int, TickInput] = {}
+        self._rollback_from: int | None = None
+        self._oldest_tick = 0
+
+        # Statistiques
+        self.rollbacks = 0
+        self.resimulated_ticks = 0
+
+    def _predict_remote_input(self) -> TickInput:
+        """Prédiction : les touches de la dernière entrée reçue, sans action ponctuelle."""
+        up, down = self._last_remote_input[0], self._last_remote_input[1]
+        return (up, down, None, None, None)
+
+    def _on_remote_input(self, tick: int, tick_input: TickInput):
+        if tick <= self.confirmed_tick:
+            return
+        self.inputs[self.remote_paddle][tick] = tick_input
+        self.confirmed_tick = tick
+        self._last_remote_input = tick_input
+        if tick < self.sim_tick and self.predicted.pop(tick, None) != tick_input:
+            # Tick déjà simulé sur une prédiction fausse : à rejouer
+            if self._rollback_from is None or tick < self._rollback_from:
+                self._rollback_from = tick
+
+    def _simulate_tick(self, tick: int):
+        """Simule un tick avec l'entrée distante reçue, ou prédite à défaut."""
+        remote_input = self.inputs[self.remote_paddle].get(tick)
+        if remote_input is None:
+            remote_input = self._predict_remote_input()
+            self.predicted[tick] = remote_input
+            # Seuls les ticks prédits peuvent être la cible d'un rollback
+            self.saved_states[tick] = self.save_state()
+        self.step({
+            self.controlled_paddle: self.inputs[self.controlled_paddle][tick],
+            self.remote_paddle: remote_input,
+        })
+
+    def _resimulate(self, start: int):
+        """Restaure l'état du tick start et rejoue jusqu'au tick courant."""
+        self.load_state(self.saved_states[start])
+        for tick in range(start, self.sim_tick):
+            self.predicted.pop(tick, None)
+            self._simulate_tick(tick)
+        self.rollbacks += 1
+        self.resimulated_ticks += self.sim_tick - start
+
+    def _discard_confirmed(self):
+        """Oublie entrées et instantanés des ticks confirmés et déjà simulés."""
+        last = min(self.confirmed_tick, self.sim_tick - 1)
+        while self._oldest_tick <= last:
+            tick = self._oldest_tick
+            self.saved_states.pop(tick, None)
+            self.predicted.pop(tick, None)
+            self.inputs[self.controlled_paddle].pop(tick, None)
+            self.inputs[self.remote_paddle].pop(tick, None)
+            self._oldest_tick += 1
+
+    def _advance(self) -> bool:
+        if self._rollback_from is not None:
+            start, self._rollback_from = self._rollback_from, None
+            self._resimulate(start)
+        self._discard_confirmed()
+
+        tick = self.sim_tick
+        if tick not in self.inputs[self.controlled_paddle]:
+            return False
+        if tick - self.confirmed_tick > self.window:
+            # Trop d'avance sur le pair : attendre ses entrées
+            return False
+        self._simulate_tick(tick)
+        self.sim_tick += 1
+        return True
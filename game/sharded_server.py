@@ -0,0 +1,561 @@
+"""Serveur dédié multi-processus : salles réparties sur plusieurs cœurs (Linux).
+
+Un seul processus Python n'exécute la simulation que sur un cœur (GIL). Ici,
+N processus de travail exécutent chacun un DedicatedServer sans socket
+d'écoute, et un accepteur frontal (``ShardFront``) possède le port de jeu :
+
+- il lit la demande de chaque connexion (MSG_JOIN, ou rien pendant
+  DEDICATED_JOIN_GRACE secondes : appariement automatique) et répond
+  lui-même aux sondes de découverte ;
+- il garde le premier joueur d'une salle jusqu'à l'arrivée du second, puis
+  transmet les deux sockets au processus le moins chargé, qui démarre la
+  partie ; les spectateurs rejoignent le processus qui héberge leur salle.
+
+SO_REUSEPORT n'est pas utilisé : le noyau répartirait les connexions au
+hasard, et les deux joueurs d'une salle pourraient arriver dans deux
+processus différents.
+
+Canal de contrôle : une paire de sockets Unix SOCK_SEQPACKET par processus,
+un message JSON par paquet. Les descripteurs des connexions voyagent avec le
+message de placement (``socket.send_fds``), accompagnés des octets déjà lus
+par l'accepteur.
+
+- accepteur -> processus : {"type": "room", "name", "pending"} (deux
+  sockets), {"type": "spectate", "name", "pending"} (un socket),
+  {"type": "drain"} ;
+- processus -> accepteur : {"type": "stats", ...} toutes les
+  DEDICATED_SHARD_STATS_INTERVAL secondes, {"type": "room_closed", "name"}.
+
+Un processus vidé (drain) ne reçoit plus de salle, termine ses parties en
+cours puis s'arrête ; la fermeture de son canal prévient l'accepteur. SIGTERM
+vide tous les processus avant de quitter, SIGHUP les remplace un par un par
+des processus neufs sans interrompre les parties (redémarrage progressif).
+Un processus qui s'arrête de lui-même est remplacé.
+"""
+
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Any, Dict, List, Set, Tuple
+
+import config
+from config import (
+    DEDICATED_JOIN_GRACE,
+    DEDICATED_SHARD_LOG_INTERVAL,
+    DEDICATED_SHARD_STATS_INTERVAL,
+    DEDICATED_TICK_RATE,
+    NET_DISCOVERY_PORT,
+)
+from game.net import protocol
+from game.net.connection import ENCODING
+from game.net.discovery import DiscoveryResponder, announce_line
+
+# Taille maximale d'un message de contrôle
+CONTROL_MESSAGE_SIZE = 64 * 1024
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message).encode("utf-8")
+
+
+def _decode(data: bytes) -> Dict[str, Any] | None:
+    try:
+        message = json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def _is_alive(sock: socket.socket) -> bool:
+    """La connexion non bloquante n'a pas été fermée par le pair."""
+    try:
+        return sock.recv(1, socket.MSG_PEEK) != b""
+    except (BlockingIOError, InterruptedError):
+        return True
+    except OSError:
+        return False
+
+
+# ---- Processus de travail ----
+
+
+class ShardWorker:
+    """Processus de travail : exécute les salles placées par l'accepteur.
+
+    Args:
+        index: Numéro du processus (journal)
+        control: Extrémité processus du canal de contrôle
+        server: Serveur dédié sans socket d'écoute qui héberge les salles
+    """
+
+    def __init__(self, index: int, control: socket.socket, server):
+        self.index = index
+        self.control = control
+        self.server = server
+        self.draining = False
+        self._done: asyncio.Future | None = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._done = loop.create_future()
+        self.control.setblocking(False)
+        self.server.on_room_closed = self._on_room_closed
+        loop.add_reader(self.control, self._on_control)
+        tasks = [
+            asyncio.ensure_future(self.server.tick_loop()),
+            asyncio.ensure_future(self._stats_loop()),
+        ]
+        print(f"Processus {self.index} prêt (pid {os.getpid()})")
+        try:
+            await self._done
+        finally:
+            for task in tasks:
+                task.cancel()
+            loop.remove_reader(self.control)
+            self.control.close()
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        try:
+            self.control.send(_encode(message))
+        except OSError:
+            # Accepteur arrêté ou saturé : les statistiques suivantes le remplaceront
+            pass
+
+    # ---- Canal de contrôle ----
+
+    def _on_control(self) -> None:
+        try:
+            data, fds, _flags, _addr = socket.recv_fds(self.control, CONTROL_MESSAGE_SIZE, 2)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data, fds = b"", []
+        socks = [socket.socket(fileno=fd) for fd in fds]
+        if not data:
+            # Accepteur arrêté : terminer les parties en cours
+            asyncio.get_running_loop().remove_reader(self.control)
+            self.drain()
+            return
+        message = _decode(data) or {}
+        msg_type = message.get("type")
+        pending = [text.encode("latin-1") for text in message.get("pending", [])]
+        if msg_type == "room" and len(socks) == 2 and len(pending) == 2:
+            asyncio.ensure_future(self._open_room(str(message.get("name")), socks, pending))
+        elif msg_type == "spectate" and len(socks) == 1 and len(pending) == 1:
+            asyncio.ensure_future(self._add_spectator(str(message.get("name")), socks[0], pending[0]))
+        elif msg_type == "drain":
+            self.drain()
+        else:
+            for sock in socks:
+                sock.close()
+
+    async def _adopt(self, sock: socket.socket, pending: bytes):
+        from game.dedicated_server import PlayerSession
+
+        loop = asyncio.get_running_loop()
+        sock.setblocking(False)
+        _, session = await loop.connect_accepted_socket(
+            lambda: PlayerSession(self.server, placed=True), sock
+        )
+        if pending:
+            session.data_received(pending)
+        return session
+
+    async def _open_room(self, name: str, socks: List[socket.socket], pending: List[bytes]) -> None:
+        left = await self._adopt(socks[0], pending[0])
+        right = await self._adopt(socks[1], pending[1])
+        if left.transport is None or right.transport is None:
+            # Un joueur est parti pendant le placement
+            left.close()
+            right.close()
+            self._on_room_closed(name)
+            return
+        self.server.open_room(name, left, right)
+
+    async def _add_spectator(self, name: str, sock: socket.socket, pending: bytes) -> None:
+        session = await self._adopt(sock, pending)
+        self.server.spectate(session, name)
+
+    def _on_room_closed(self, name: str) -> None:
+        self._send({"type": "room_closed", "name": name})
+        self._check_drained()
+
+    # ---- Vidage ----
+
+    def drain(self) -> None:
+        """Ne plus accepter de salle et s'arrêter à la fin des parties en cours."""
+        if not self.draining:
+            self.draining = True
+            print(f"Processus {self.index} : vidage ({len(self.server.rooms)} salles en cours)")
+        self._check_drained()
+
+    def _check_drained(self) -> None:
+        if self.draining and not self.server.rooms and not self._done.done():
+            self._done.set_result(None)
+
+    # ---- Statistiques ----
+
+    async def _stats_loop(self) -> None:
+        """Envoie périodiquement la charge du processus à l'accepteur."""
+        loop = asyncio.get_running_loop()
+        last_time, last_busy, last_ticks = loop.time(), self.server.tick_busy, self.server.ticks
+        while True:
+            await asyncio.sleep(DEDICATED_SHARD_STATS_INTERVAL)
+            now = loop.time()
+            busy = self.server.tick_busy - last_busy
+            ticks = self.server.ticks - last_ticks
+            rooms = list(self.server.rooms.values())
+            self._send({
+                "type": "stats",
+                "rooms": len(rooms),
+                "spectators": sum(len(room.conn.spectators) for room in rooms),
+                # Part du temps passée à simuler (1.0 = un cœur saturé)
+                "load": busy / max(now - last_time, 1e-9),
+                "tick_ms": 1000 * busy / ticks if ticks else 0.0,
+            })
+            last_time, last_busy, last_ticks = now, self.server.tick_busy, self.server.ticks
+
+
+def run_worker(index: int, control: socket.socket, rows: int, first_server: str, tick_rate: int, port: int) -> None:
+    """Point d'entrée d'un processus de travail (démarré par ShardFront)."""
+    # Ctrl+C s'adresse à tout le groupe de processus : c'est l'accepteur qui arrête les processus
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    # Configurer le plateau avant d'importer les modules de jeu
+    config.apply_board_rows(rows)
+    from game.ui.pre_game_config import make_default_setup
+    from game.dedicated_server import DedicatedServer
+
+    server = DedicatedServer(
+        port=port,
+        setup=make_default_setup(rows),
+        first_server=first_server,
+        tick_rate=tick_rate,
+    )
+    try:
+        asyncio.run(ShardWorker(index, control, server).run())
+    finally:
+        pygame.quit()
+
+
+# ---- Accepteur frontal ----
+
+
+class Shard:
+    """Processus de travail vu par l'accepteur."""
+
+    def __init__(self, index: int, process: multiprocessing.process.BaseProcess, control: socket.socket):
+        self.index = index
+        self.process = process
+        self.control = control
+        # Salles hébergées, d'après les placements et les fermetures signalées
+        self.rooms: Set[str] = set()
+        self.draining = False
+        # Dernières statistiques reçues
+        self.stats: Dict[str, Any] = {}
+
+    def send(self, message: Dict[str, Any], socks: List[socket.socket] = ()) -> bool:
+        """Envoie un message de contrôle, avec les sockets à transmettre au processus."""
+        try:
+            socket.send_fds(self.control, [_encode(message)], [sock.fileno() for sock in socks])
+        except OSError as e:
+            print(f"Processus {self.index} injoignable: {e}")
+            return False
+        return True
+
+
+class ShardFront:
+    """Accepteur frontal : place les salles sur ``workers`` processus de travail.
+
+    Args:
+        host, port: Adresse d'écoute
+        workers: Nombre de processus de travail
+        rows: Nombre de lignes du plateau (toutes les salles)
+        first_server: Côté qui sert en premier
+        tick_rate: Cadence de simulation de chaque processus
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 5050,
+        workers: int = 2,
+        rows: int = 2,
+        first_server: str = "left",
+        tick_rate: int = DEDICATED_TICK_RATE,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.rows = rows
+        self.first_server = first_server
+        self.tick_rate = tick_rate
+
+        self.shards: List[Shard] = []
+        # Processus hébergeant chaque salle en cours
+        self.rooms: Dict[str, Shard] = {}
+        # Joueur en attente d'adversaire (socket, octets déjà lus), par nom de salle
+        self.waiting: Dict[str | None, Tuple[socket.socket, bytes]] = {}
+        self._room_ids = itertools.count(1)
+        self._shard_ids = itertools.count()
+        # Processus neufs : pas d'état pygame hérité de l'accepteur
+        self._context = multiprocessing.get_context("spawn")
+        self._sock: socket.socket | None = None
+        self._accept_task: asyncio.Task | None = None
+        self._stopping = False
+        self._done: asyncio.Future | None = None
+
+    # ---- Processus ----
+
+    def _start_shard(self) -> Shard:
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        index = next(self._shard_ids)
+        process = self._context.Process(
+            target=run_worker,
+            args=(index, child, self.rows, self.first_server, self.tick_rate, self.port),
+            name=f"chess-ping-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        parent.setblocking(False)
+        shard = Shard(index, process, parent)
+        self.shards.append(shard)
+        asyncio.get_running_loop().add_reader(parent, self._on_shard_message, shard)
+        return shard
+
+    def _on_shard_message(self, shard: Shard) -> None:
+        try:
+            data = shard.control.recv(CONTROL_MESSAGE_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._on_shard_exit(shard)
+            return
+        message = _decode(data) or {}
+        msg_type = message.get("type")
+        if msg_type == "stats":
+            shard.stats = message
+        elif msg_type == "room_closed":
+            name = message.get("name")
+            shard.rooms.discard(name)
+            if self.rooms.get(name) is shard:
+                del self.rooms[name]
+
+    def _on_shard_exit(self, shard: Shard) -> None:
+        asyncio.get_running_loop().remove_reader(shard.control)
+        shard.control.close()
+        shard.process.join(timeout=1.0)
+        self.shards.remove(shard)
+        for name in shard.rooms:
+            if self.rooms.get(name) is shard:
+                del self.rooms[name]
+        if shard.draining:
+            print(f"Processus {shard.index} vidé et arrêté")
+        else:
+            print(f"Processus {shard.index} arrêté (code {shard.process.exitcode}), {len(shard.rooms)} salles perdues")
+            if not self._stopping:
+                self._start_shard()
+        if self._stopping and not self.shards and not self._done.done():
+            self._done.set_result(None)
+
+    def _shards_by_load(self) -> List[Shard]:
+        """Processus qui acceptent des salles, du moins chargé (en salles) au plus chargé."""
+        candidates = [shard for shard in self.shards if not shard.draining]
+        return sorted(candidates, key=lambda shard: (len(shard.rooms), shard.stats.get("load", 0.0)))
+
+    def drain(self, shard: Shard, replace: bool = True) -> None:
+        """Vide un processus ; avec ``replace``, un processus neuf prend sa place."""
+        if shard.draining:
+            return
+        shard.draining = True
+        if replace and not self._stopping:
+            self._start_shard()
+        shard.send({"type": "drain"})
+
+    def restart_shards(self) -> None:
+        """Redémarrage progressif : chaque processus est vidé et remplacé."""
+        print("Redémarrage progressif des processus")
+        for shard in list(self.shards):
+            self.drain(shard)
+
+    def shutdown(self) -> None:
+        """Arrêt propre : plus de nouvelles connexions, fin des parties en cours."""
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"Arrêt : attente de la fin des {len(self.rooms)} parties en cours")
+        if self._accept_task is not None:
+            self._accept_task.cancel()
+        for conn, _pending in self.waiting.values():
+            conn.close()
+        self.waiting.clear()
+        for shard in list(self.shards):
+            self.drain(shard, replace=False)
+        if not self.shards and not self._done.done():
+            self._done.set_result(None)
+
+    # ---- Placement ----
+
+    async def _accept_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            conn, _addr = await loop.sock_accept(self._sock)
+            conn.setblocking(False)
+            asyncio.ensure_future(self._place(conn))
+
+    async def _read_request(self, conn: socket.socket) -> bytes | None:
+        """Octets reçus jusqu'à la première ligne, ou pendant DEDICATED_JOIN_GRACE secondes.
+
+        Retourne None si la connexion a été fermée.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + DEDICATED_JOIN_GRACE
+        data = b""
+        while b"\n" not in data:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(loop.sock_recv(conn, 4096), remaining)
+            except asyncio.TimeoutError:
+                break
+            except OSError:
+                return None
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    async def _place(self, conn: socket.socket) -> None:
+        data = await self._read_request(conn)
+        if data is None or self._stopping:
+            conn.close()
+            return
+        line, newline, rest = data.partition(b"\n")
+        message = _decode(line) if newline else None
+        msg_type = message.get("type") if message is not None else None
+        if msg_type == protocol.MSG_DISCOVER:
+            # Sonde de découverte : annonce, puis fermeture
+            try:
+                conn.send(announce_line(self.port, dedicated=True))
+            except OSError:
+                pass
+            conn.close()
+        elif msg_type == protocol.MSG_JOIN:
+            room = message.get("room")
+            room = room if isinstance(room, str) and room else None
+            if message.get("spectate"):
+                self._place_spectator(conn, room, rest)
+            else:
+                self._place_player(conn, room, rest)
+        else:
+            self._place_player(conn, None, data)
+
+    def _place_player(self, conn: socket.socket, room_name: str | None, pending: bytes) -> None:
+        if room_name is not None and room_name in self.rooms:
+            # Salle déjà complète
+            conn.close()
+            return
+
+        opponent = self.waiting.pop(room_name, None)
+        if opponent is None or not _is_alive(opponent[0]):
+            if opponent is not None:
+                opponent[0].close()
+            self.waiting[room_name] = (conn, pending)
+            return
+
+        name = room_name if room_name is not None else f"auto-{next(self._room_ids)}"
+        socks = [opponent[0], conn]
+        message = {"type": "room", "name": name, "pending": [opponent[1].decode("latin-1"), pending.decode("latin-1")]}
+        # Du moins chargé au plus chargé : un processus injoignable laisse la place au suivant
+        for shard in self._shards_by_load():
+            if shard.send(message, socks):
+                self.rooms[name] = shard
+                shard.rooms.add(name)
+                break
+        else:
+            print(f"Salle {name} : aucun processus disponible, joueurs refusés")
+            refusal = (json.dumps(protocol.make_error_message("aucune salle disponible")) + "\n").encode(ENCODING)
+            for sock in socks:
+                try:
+                    sock.send(refusal)
+                except OSError:
+                    pass
+        # Le processus a reçu ses propres copies des descripteurs
+        for sock in socks:
+            sock.close()
+
+    def _place_spectator(self, conn: socket.socket, room_name: str | None, pending: bytes) -> None:
+        if room_name is None:
+            # Regarder une partie en cours quelconque
+            room_name = next(iter(self.rooms), None)
+        shard = self.rooms.get(room_name) if room_name is not None else None
+        if shard is not None:
+            shard.send({"type": "spectate", "name": room_name, "pending": [pending.decode("latin-1")]}, [conn])
+        conn.close()
+
+    # ---- Boucles ----
+
+    async def _log_loop(self) -> None:
+        """Affiche périodiquement la charge de chaque processus."""
+        while True:
+            await asyncio.sleep(DEDICATED_SHARD_LOG_INTERVAL)
+            for shard in self.shards:
+                stats = shard.stats
+                state = " (vidage)" if shard.draining else ""
+                print(
+                    f"Processus {shard.index}{state} : {len(shard.rooms)} salles, "
+                    f"{stats.get('spectators', 0)} spectateurs, "
+                    f"tick {stats.get('tick_ms', 0.0):.2f} ms, "
+                    f"charge {100 * stats.get('load', 0.0):.0f} %"
+                )
+
+    async def serve_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._done = loop.create_future()
+        self._sock = socket.create_server((self.host, self.port), backlog=128)
+        self._sock.setblocking(False)
+        for _ in range(self.workers):
+            self._start_shard()
+        try:
+            await loop.create_datagram_endpoint(
+                lambda: DiscoveryResponder(self.port), local_addr=(self.host, NET_DISCOVERY_PORT)
+            )
+        except OSError as e:
+            print(f"Découverte sur le réseau local indisponible: {e}")
+        loop.add_signal_handler(signal.SIGTERM, self.shutdown)
+        loop.add_signal_handler(signal.SIGHUP, self.restart_shards)
+        print(
+            f"Serveur dédié en écoute sur {self.host}:{self.port} "
+            f"({self.workers} processus, {self.tick_rate} ticks/s)"
+        )
+        self._accept_task = asyncio.ensure_future(self._accept_loop())
+        log_task = asyncio.ensure_future(self._log_loop())
+        try:
+            await self._done
+        finally:
+            self._accept_task.cancel()
+            log_task.cancel()
+            self._sock.close()
+            for conn, _pending in self.waiting.values():
+                conn.close()
+            # Ctrl+C : arrêt immédiat des processus restants, sans les remplacer
+            self._stopping = True
+            for shard in self.shards:
+                loop.remove_reader(shard.control)
+                shard.control.close()
+                shard.process.terminate()
+            for shard in self.shards:
+                shard.process.join(timeout=1.0)
@@ -0,0 +1,64 @@
+"""Thread de simulation à cadence fixe, indépendant du rendu.
+
+L'échéance du tick suivant est calculée depuis la précédente (et non depuis
+la fin du tick) : la cadence moyenne ne dérive pas, même si un tick est
+exécuté en retard. En cas de retard important (machine suspendue, tick
+anormalement long), les ticks manqués sont abandonnés plutôt qu'exécutés en
+rafale, comme dans l'ordonnanceur du serveur dédié.
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class FixedRateTicker(threading.Thread):
+    """Appelle une fonction à cadence fixe, avec correction de dérive.
+
+    Args:
+        callback: Fonction exécutée à chaque tick
+        rate: Ticks par seconde
+        max_lag: Retard (en ticks) au-delà duquel les ticks manqués sont abandonnés
+    """
+
+    def __init__(self, callback: Callable[[], None], rate: float, max_lag: int):
+        super().__init__(name="chess-ping-tick", daemon=True)
+        self.callback = callback
+        self.period = 1 / rate
+        self.max_lag = max_lag
+        self._stop_event = threading.Event()
+
+        # Statistiques
+        self.ticks = 0
+        self.skipped = 0
+        self.max_late = 0.0  # plus grand retard observé sur une échéance (s)
+        self.error: Exception | None = None
+
+    def run(self) -> None:
+        period = self.period
+        next_tick = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                late = time.perf_counter() - next_tick
+                if late > self.max_late:
+                    self.max_late = late
+                self.callback()
+                self.ticks += 1
+
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay < -self.max_lag * period:
+                    self.skipped += int(-delay / period)
+                    next_tick = time.perf_counter()
+                    delay = 0.0
+                if delay > 0:
+                    self._stop_event.wait(delay)
+        except Exception as e:
+            # Remonté au thread de rendu, qui arrête la partie
+            self.error = e
+            print(f"Erreur dans le thread de simulation: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout=1.0)
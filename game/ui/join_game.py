@@ -1,10 +1,18 @@
 import pygame
 
 from config import SCREEN_WIDTH, SCREEN_HEIGHT
+from game.net.discovery import LanScanner
 
 
 class JoinGameScreen:
-    """Écran pour saisir l'adresse IP et le port du serveur et se connecter."""
+    """Écran pour saisir l'adresse IP et le port du serveur et se connecter.
+
+    Les parties trouvées sur le réseau local (cf. game/net/discovery.py)
+    s'affichent sous le formulaire au fil de la recherche ; un clic en
+    rejoint une, F5 relance la recherche.
+    """
+
+    MAX_LISTED = 4
 
     def __init__(self, screen: pygame.Surface):
         self.screen = screen
@@ -17,6 +25,8 @@ class JoinGameScreen:
         self.ip_text = "127.0.0.1"
         self.port_text = "5050"
         self.active_field = "ip"  # "ip" ou "port"
+        self.scanner: LanScanner | None = None
+        self.found_rects: list[tuple[pygame.Rect, dict]] = []
 
     def run(self) -> tuple[str, int] | None:
         ip_rect = pygame.Rect(0, 0, 260, 40)
@@ -30,6 +40,7 @@ class JoinGameScreen:
         port_rect.center = (center_x, start_y + 60)
         btn_rect.center = (center_x, start_y + 130)
 
+        self._start_scan()
         running = True
         while running:
             self.clock.tick(30)
@@ -48,10 +59,16 @@ class JoinGameScreen:
                             return self.ip_text, port
                         except ValueError:
                             pass
+                    else:
+                        for rect, server in self.found_rects:
+                            if rect.collidepoint(event.pos):
+                                return server["host"], server["port"]
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         return None
-                    if event.key == pygame.K_TAB:
+                    if event.key == pygame.K_F5:
+                        self._start_scan()
+                    elif event.key == pygame.K_TAB:
                         self.active_field = "port" if self.active_field == "ip" else "ip"
                     elif event.key == pygame.K_RETURN:
                         try:
@@ -78,8 +95,45 @@ class JoinGameScreen:
             txt = self.label_font.render("Se connecter", True, (0, 0, 0))
             self.screen.blit(txt, txt.get_rect(center=btn_rect.center))
 
+            self._draw_found_servers(btn_rect.bottom + 25)
+
             pygame.display.flip()
 
+    def _start_scan(self):
+        """Relance la recherche des parties du réseau local (sauf si une recherche est en cours)."""
+        if self.scanner is not None and not self.scanner.finished:
+            return
+        try:
+            port = int(self.port_text)
+        except ValueError:
+            port = 5050
+        self.scanner = LanScanner(port)
+        self.scanner.start()
+
+    def _draw_found_servers(self, top: int):
+        servers = self.scanner.results() if self.scanner is not None else []
+        if servers:
+            status = "Parties sur le réseau local (cliquer pour rejoindre) :"
+        elif self.scanner is not None and not self.scanner.finished:
+            status = "Recherche des parties sur le réseau local..."
+        else:
+            status = "Aucune partie trouvée sur le réseau local (F5 : relancer)"
+        status_surf = self.label_font.render(status, True, (180, 180, 210))
+        self.screen.blit(status_surf, status_surf.get_rect(center=(SCREEN_WIDTH // 2, top)))
+
+        self.found_rects = []
+        mouse = pygame.mouse.get_pos()
+        for i, server in enumerate(servers[: self.MAX_LISTED]):
+            rect = pygame.Rect(0, 0, 560, 28)
+            rect.center = (SCREEN_WIDTH // 2, top + 32 + i * 32)
+            hovered = rect.collidepoint(mouse)
+            pygame.draw.rect(self.screen, (70, 70, 130) if hovered else (40, 40, 80), rect, border_radius=6)
+            kind = "serveur dédié" if server["dedicated"] else "hôte"
+            label = f"{server['name']} - {server['host']}:{server['port']} ({kind})"
+            surf = self.label_font.render(label, True, (255, 255, 255))
+            self.screen.blit(surf, surf.get_rect(center=rect.center))
+            self.found_rects.append((rect, server))
+
     def _handle_text_input(self, event: pygame.event.Event):
         if self.active_field == "ip":
             if event.key == pygame.K_BACKSPACE:
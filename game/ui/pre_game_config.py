@@ -1,5 +1,5 @@
 import pygame
-from typing import Dict, Tuple
+from typing import Callable, Dict, Tuple
 
 from config import SCREEN_WIDTH, SCREEN_HEIGHT, PIECE_LIFE
 from utils.loader import load_image
@@ -9,6 +9,49 @@ PIECE_TYPES = ["pawn", "rook", "knight", "bishop", "queen", "king"]
 ROW_OPTIONS = [2, 4, 6, 8]
 
 
+def default_piece_counts(rows: int) -> Dict[str, int]:
+    """Quantités de pièces par défaut pour un plateau de ``rows`` lignes.
+
+    Voir PreGameConfigScreen._reset_defaults_for_rows.
+    """
+    # Comptes standard d'un jeu d'échecs par couleur
+    standard_counts = {
+        "pawn": 8,
+        "rook": 2,
+        "knight": 2,
+        "bishop": 2,
+        "queen": 1,
+        "king": 1,
+    }
+
+    limit = 2 * rows
+
+    # Ordre de priorité pour garder les pièces les plus importantes
+    # Tours en premier, puis reine, roi, puis pièces mineures
+    priority_order = ["rook", "queen", "king", "bishop", "knight", "pawn"]
+
+    remaining = limit
+    counts: Dict[str, int] = {k: 0 for k in PIECE_TYPES}
+    for kind in priority_order:
+        if remaining <= 0:
+            break
+        std = standard_counts.get(kind, 0)
+        take = min(std, remaining)
+        counts[kind] = take
+        remaining -= take
+    return counts
+
+
+def make_default_setup(rows: int) -> Dict:
+    """Configuration de partie par défaut, au format retourné par PreGameConfigScreen.run."""
+    counts = default_piece_counts(rows)
+    return {
+        "rows": rows,
+        "white": {k: {"count": counts[k], "life": PIECE_LIFE.get(k, 1)} for k in PIECE_TYPES},
+        "dark": {k: {"count": counts[k], "life": PIECE_LIFE.get(k, 1)} for k in PIECE_TYPES},
+    }
+
+
 class PreGameConfigScreen:
     """Écran de configuration avant le lancement de la partie.
 
@@ -66,35 +109,7 @@ class PreGameConfigScreen:
         fous, cavaliers, pions.
         """
 
-        # Comptes standard d'un jeu d'échecs par couleur
-        standard_counts = {
-            "pawn": 8,
-            "rook": 2,
-            "knight": 2,
-            "bishop": 2,
-            "queen": 1,
-            "king": 1,
-        }
-
-        limit = 2 * rows
-
-        # Ordre de priorité pour garder les pièces les plus importantes
-        # Tours en premier, puis reine, roi, puis pièces mineures
-        priority_order = ["rook", "queen", "king", "bishop", "knight", "pawn"]
-
-        def compute_counts() -> Dict[str, int]:
-            remaining = limit
-            counts: Dict[str, int] = {k: 0 for k in PIECE_TYPES}
-            for kind in priority_order:
-                if remaining <= 0:
-                    break
-                std = standard_counts.get(kind, 0)
-                take = min(std, remaining)
-                counts[kind] = take
-                remaining -= take
-            return counts
-
-        base_counts = compute_counts()
+        base_counts = default_piece_counts(rows)
 
         for color in ("white", "dark"):
             for kind in PIECE_TYPES:
@@ -287,11 +302,17 @@ class PreGameConfigScreen:
 
     # ---- Boucle principale ----
 
-    def run(self) -> Dict:
-        """Affiche l'écran jusqu'à validation, et retourne la configuration choisie."""
+    def run(self, on_tick: Callable[[], str | None] | None = None) -> Dict:
+        """Affiche l'écran jusqu'à validation, et retourne la configuration choisie.
+
+        Args:
+            on_tick: Appelé à chaque frame (ex: accepter un client sans bloquer) ;
+                le texte retourné est affiché en bas de l'écran
+        """
         self.running = True
         while self.running:
             self.clock.tick(30)
+            status = on_tick() if on_tick is not None else None
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
@@ -304,6 +325,9 @@ class PreGameConfigScreen:
             self.screen.fill((20, 20, 40))
             self._draw_rows_selector()
             self._draw_pieces_section()
+            if status:
+                surf = self.small_font.render(status, True, (180, 180, 210))
+                self.screen.blit(surf, surf.get_rect(centerx=SCREEN_WIDTH // 2, bottom=SCREEN_HEIGHT - 6))
 
             pygame.display.flip()
 
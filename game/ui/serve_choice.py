@@ -1,5 +1,5 @@
 import pygame
-from typing import Literal
+from typing import Callable, Literal
 
 from config import SCREEN_WIDTH, SCREEN_HEIGHT
 
@@ -17,8 +17,13 @@ class ServeChoiceScreen:
         self.title_font = pygame.font.Font(None, 40)
         self.label_font = pygame.font.Font(None, 28)
 
-    def run(self) -> ServeSide:
-        """Boucle jusqu'au choix de l'utilisateur, retourne "left" ou "right"."""
+    def run(self, on_tick: Callable[[], str | None] | None = None) -> ServeSide:
+        """Boucle jusqu'au choix de l'utilisateur, retourne "left" ou "right".
+
+        Args:
+            on_tick: Appelé à chaque frame (ex: accepter un client sans bloquer) ;
+                le texte retourné est affiché en bas de l'écran
+        """
         running = True
         choice: ServeSide | None = None
 
@@ -35,6 +40,7 @@ class ServeChoiceScreen:
 
         while running:
             self.clock.tick(30)
+            status = on_tick() if on_tick is not None else None
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
@@ -74,6 +80,10 @@ class ServeChoiceScreen:
             txt_right = self.label_font.render("Noirs (droite)", True, (0, 0, 0))
             self.screen.blit(txt_right, txt_right.get_rect(center=right_rect.center))
 
+            if status:
+                surf = self.label_font.render(status, True, (180, 180, 210))
+                self.screen.blit(surf, surf.get_rect(centerx=SCREEN_WIDTH // 2, bottom=SCREEN_HEIGHT - 20))
+
             pygame.display.flip()
 
         return choice or "left"
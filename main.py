@@ -8,6 +8,90 @@ from game.ui.serve_choice import ServeChoiceScreen
 from game.ui.join_game import JoinGameScreen
 from game.net.server import ChessPingServer
 from game.net.client import ChessPingClient
+from game.net.capture import capture_path
+from game.net.discovery import DiscoveryAnnouncer
+
+
+def _capture_path(role: str) -> str | None:
+    """Fichier de capture de la connexion, si la capture est activée."""
+    if config.NET_CAPTURE_DIR is None:
+        return None
+    return capture_path(config.NET_CAPTURE_DIR, role)
+
+
+def _wait_connected(screen: pygame.Surface, client: ChessPingClient) -> None:
+    """Connexion non bloquante au serveur, en gardant la fenêtre réactive.
+
+    Lève une exception si la connexion échoue ou dépasse NET_CONNECT_TIMEOUT
+    (ou si le joueur l'annule avec Échap).
+    """
+    font = pygame.font.Font(None, 32)
+    clock = pygame.time.Clock()
+    client.start_connect()
+    deadline = pygame.time.get_ticks() + int(config.NET_CONNECT_TIMEOUT * 1000)
+    while not client.poll_connect():
+        if pygame.time.get_ticks() >= deadline:
+            client.close()
+            raise TimeoutError(f"{client.host}:{client.port} ne répond pas")
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                client.close()
+                raise ConnectionAbortedError("connexion annulée")
+
+        screen.fill((10, 10, 30))
+        surf = font.render(f"Connexion à {client.host}:{client.port}...", True, (255, 255, 255))
+        screen.blit(surf, surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+        pygame.display.flip()
+        clock.tick(30)
+
+
+def _wait_config(screen: pygame.Surface, client: ChessPingClient) -> dict:
+    """Attend la configuration de l'hôte (qui peut encore la préparer) sans figer la fenêtre."""
+    font = pygame.font.Font(None, 32)
+    clock = pygame.time.Clock()
+    while True:
+        cfg = client.poll_config()
+        if cfg is not None:
+            return cfg
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                raise ConnectionAbortedError("connexion annulée")
+
+        screen.fill((10, 10, 30))
+        surf = font.render("Connecté ! L'hôte prépare la partie...", True, (255, 255, 255))
+        screen.blit(surf, surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
+        pygame.display.flip()
+        clock.tick(30)
+
+
+def _wait_for_client(screen: pygame.Surface, server: ChessPingServer, local_ip: str) -> bool:
+    """Affiche l'écran d'attente jusqu'à la connexion du client (sans bloquer).
+
+    Retourne False si l'hôte ferme la fenêtre.
+    """
+    font = pygame.font.Font(None, 32)
+    info_lines = [
+        "Serveur en attente de connexion...",
+        f"IP locale : {local_ip}",
+        f"Port : {server.port}",
+        "Lancez le client sur l'autre machine et entrez cette IP.",
+    ]
+    clock = pygame.time.Clock()
+    while not server.poll_accept():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+
+        screen.fill((10, 10, 30))
+        for i, line in enumerate(info_lines):
+            surf = font.render(line, True, (255, 255, 255))
+            screen.blit(
+                surf,
+                surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3 + i * 30)),
+            )
+        pygame.display.flip()
+        clock.tick(30)
+    return True
 
 
 def main():
@@ -26,13 +110,7 @@ def main():
         setup = pre_config_screen.run()
 
         # Mettre à jour dynamiquement BOARD_ROWS et les valeurs dérivées
-        config.BOARD_ROWS = setup["rows"]
-        config.BOARD_HEIGHT = config.CELL_SIZE * config.BOARD_ROWS
-        config.BOARD_TOP = (config.SCREEN_HEIGHT - config.BOARD_HEIGHT) // 2
-        config.BOARD_WIDTH = config.CELL_SIZE * config.BOARD_COLS
-        config.BOARD_LEFT = (config.SCREEN_WIDTH - config.BOARD_WIDTH) // 2
-        config.LEFT_AREA_X = config.BOARD_LEFT - 200
-        config.RIGHT_AREA_X = config.BOARD_LEFT + config.BOARD_WIDTH + 200
+        config.apply_board_rows(setup["rows"])
 
         # Écran de choix du premier serveur (gauche/droite)
         serve_choice_screen = ServeChoiceScreen(screen)
@@ -46,67 +124,89 @@ def main():
 
 
     elif mode == "server":
-        # Mode serveur : démarrer un socket, afficher IP, attendre un client,
-        # puis envoyer la configuration de partie.
-        server = ChessPingServer()
+        # Mode serveur : démarrer un socket et accepter le client pendant que
+        # l'hôte configure la partie, puis lui envoyer la configuration dès
+        # que les deux sont prêts.
+        server = ChessPingServer(capture_path=_capture_path("server"))
         server.start_listening()
+        # Répondre aux recherches de parties du réseau local tant qu'on attend le client
+        try:
+            announcer = DiscoveryAnnouncer(server.port)
+            announcer.start()
+        except OSError as e:
+            print(f"Découverte sur le réseau local indisponible: {e}")
+            announcer = None
 
         local_ip = ChessPingServer.get_display_ip()
-        font = pygame.font.Font(None, 32)
-        info_lines = [
-            "Serveur en attente de connexion...",
-            f"IP locale : {local_ip}",
-            f"Port : {server.port}",
-            "Lancez le client sur l'autre machine et entrez cette IP.",
-        ]
-
-        waiting_client = True
-        clock = pygame.time.Clock()
-        while waiting_client:
-            clock.tick(10)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    server.close()
-                    pygame.quit()
-                    return
-
-            screen.fill((10, 10, 30))
-            for i, line in enumerate(info_lines):
-                surf = font.render(line, True, (255, 255, 255))
-                screen.blit(
-                    surf,
-                    surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 3 + i * 30)),
-                )
-            pygame.display.flip()
 
-            # Essayer d'accepter un client (blocant court)
-            server.sock.settimeout(0.1)
-            try:
-                server.accept_client_blocking()
-                waiting_client = False
-            except Exception:
-                continue
+        def accept_status() -> str:
+            # Accepte le client sans bloquer pendant que l'hôte configure la partie
+            if server.poll_accept():
+                return f"Joueur connecté ({server.client_addr[0]})"
+            return f"En attente d'un joueur sur {local_ip}:{server.port}..."
 
-        # Une fois le client connecté, on fait la pré-config complète côté serveur
         pre_config_screen = PreGameConfigScreen(screen)
-        setup = pre_config_screen.run()
+        setup = pre_config_screen.run(on_tick=accept_status)
 
-        config.BOARD_ROWS = setup["rows"]
-        config.BOARD_HEIGHT = config.CELL_SIZE * config.BOARD_ROWS
-        config.BOARD_TOP = (config.SCREEN_HEIGHT - config.BOARD_HEIGHT) // 2
-        config.BOARD_WIDTH = config.CELL_SIZE * config.BOARD_COLS
-        config.BOARD_LEFT = (config.SCREEN_WIDTH - config.BOARD_WIDTH) // 2
-        config.LEFT_AREA_X = config.BOARD_LEFT - 200
-        config.RIGHT_AREA_X = config.BOARD_LEFT + config.BOARD_WIDTH + 200
+        config.apply_board_rows(setup["rows"])
 
         serve_choice_screen = ServeChoiceScreen(screen)
-        first_server = serve_choice_screen.run()
+        first_server = serve_choice_screen.run(on_tick=accept_status)
 
         # Pour cette première version, on suppose que l'hôte joue le paddle gauche.
         host_paddle = "left"
 
-        # Envoyer la configuration au client
         from game.net import protocol
+
+        lockstep = None
+        if config.NET_SYNC_MODE in (protocol.SYNC_MODE_LOCKSTEP, protocol.SYNC_MODE_ROLLBACK):
+            # Lockstep/rollback : chaque pair simule la partie à partir des entrées échangées
+            import secrets
+            from game.lockstep_engine import LockstepGameEngine
+            from game.rollback_engine import RollbackGameEngine
+
+            if config.NET_SYNC_MODE == protocol.SYNC_MODE_ROLLBACK:
+                engine_class, delay = RollbackGameEngine, config.NET_ROLLBACK_DELAY
+            else:
+                engine_class, delay = LockstepGameEngine, config.NET_LOCKSTEP_DELAY
+            lockstep = {"seed": secrets.randbits(32), "delay": delay}
+            engine = engine_class(
+                screen,
+                setup_config=setup,
+                first_server=first_server,
+                conn=server,
+                controlled_paddle=host_paddle,
+                seed=lockstep["seed"],
+                input_delay=lockstep["delay"],
+            )
+        else:
+            # Utiliser NetworkGameEngine pour le mode multijoueur
+            from game.network_engine import NetworkGameEngine
+
+            engine = NetworkGameEngine(
+                screen,
+                setup_config=setup,
+                first_server=first_server,
+                network_mode="server",
+                server_conn=server,
+                controlled_paddle=host_paddle,
+                paddle_mode=config.NET_PADDLE_MODE,
+                tick_thread=config.NET_SERVER_TICK_THREAD,
+                lag_compensation=config.NET_LAG_COMPENSATION,
+            )
+
+        # Moteur prêt : attendre le client s'il n'est pas encore là, la
+        # configuration part dès qu'il est connecté
+        if not _wait_for_client(screen, server, local_ip):
+            if announcer is not None:
+                announcer.stop()
+            server.close()
+            pygame.quit()
+            return
+        if announcer is not None:
+            announcer.stop()
+
+        # Envoyer la configuration au client (avec les identifiants des pièces)
         # Pour l'instant, on envoie un multiplicateur de vitesse initial = 1.0.
         # Il sera ensuite synchronisé en temps réel si le serveur le modifie.
         config_msg = protocol.make_config_message(
@@ -114,6 +214,11 @@ def main():
             first_server,
             host_paddle,
             ball_speed_factor=1.0,
+            piece_ids=engine.piece_ids(),
+            session=server.session_token,
+            paddle_mode=config.NET_PADDLE_MODE,
+            sync_mode=config.NET_SYNC_MODE,
+            lockstep=lockstep,
         )
         
         try:
@@ -123,17 +228,6 @@ def main():
             pygame.quit()
             return
 
-        # Utiliser NetworkGameEngine pour le mode multijoueur
-        from game.network_engine import NetworkGameEngine
-
-        engine = NetworkGameEngine(
-            screen,
-            setup_config=setup,
-            first_server=first_server,
-            network_mode="server",
-            server_conn=server,
-            controlled_paddle=host_paddle,
-        )
         try:
             engine.game_loop()
         finally:
@@ -150,10 +244,10 @@ def main():
             return
         ip, port = ip_port
 
-        client = ChessPingClient(ip, port)
+        client = ChessPingClient(ip, port, capture_path=_capture_path("client"))
         try:
-            client.connect()
-            cfg = client.recv_config()
+            _wait_connected(screen, client)
+            cfg = _wait_config(screen, client)
         except Exception as e:
             # Afficher un message d'erreur
             font = pygame.font.Font(None, 32)
@@ -186,17 +280,14 @@ def main():
         host_paddle = cfg.get("host_paddle")
         ball_speed_factor = cfg.get("ball_speed_factor", 1.0)
         
-        # Le client joue le paddle opposé à l'hôte
-        client_paddle = "right" if host_paddle == "left" else "left"
+        # Le client joue le paddle opposé à l'hôte (aucun en spectateur)
+        if cfg.get("spectator"):
+            client_paddle = None
+        else:
+            client_paddle = "right" if host_paddle == "left" else "left"
 
         # Mettre à jour dynamiquement BOARD_ROWS et les valeurs dérivées
-        config.BOARD_ROWS = setup["rows"]
-        config.BOARD_HEIGHT = config.CELL_SIZE * config.BOARD_ROWS
-        config.BOARD_TOP = (config.SCREEN_HEIGHT - config.BOARD_HEIGHT) // 2
-        config.BOARD_WIDTH = config.CELL_SIZE * config.BOARD_COLS
-        config.BOARD_LEFT = (config.SCREEN_WIDTH - config.BOARD_WIDTH) // 2
-        config.LEFT_AREA_X = config.BOARD_LEFT - 200
-        config.RIGHT_AREA_X = config.BOARD_LEFT + config.BOARD_WIDTH + 200
+        config.apply_board_rows(setup["rows"])
 
         # Afficher un écran de confirmation avant de lancer le jeu
         font = pygame.font.Font(None, 32)
@@ -215,7 +306,7 @@ def main():
             screen.fill((10, 10, 30))
             lines = [
                 "Connecté au serveur !",
-                f"Vous contrôlez le paddle {client_paddle}",
+                f"Vous contrôlez le paddle {client_paddle}" if client_paddle else "Mode spectateur",
                 f"Premier serveur: {first_server}",
                 "",
                 "Appuyez sur une touche pour commencer...",
@@ -229,19 +320,42 @@ def main():
 
             pygame.display.flip()
 
-        # Utiliser NetworkGameEngine pour le mode client
-        from game.network_engine import NetworkGameEngine
+        from game.net import protocol
 
-        engine = NetworkGameEngine(
-            screen,
-            setup_config=setup,
-            first_server=first_server,
-            network_mode="client",
-            client_conn=client,
-            controlled_paddle=client_paddle,
-        )
-        # Appliquer le multiplicateur de vitesse défini par le serveur.
-        engine.ball_speed_factor = float(ball_speed_factor)
+        lockstep = cfg.get("lockstep")
+        sync_mode = cfg.get("sync_mode")
+        if sync_mode in (protocol.SYNC_MODE_LOCKSTEP, protocol.SYNC_MODE_ROLLBACK) and isinstance(lockstep, dict):
+            # Lockstep/rollback : même simulation que l'hôte, avec la graine qu'il a tirée
+            from game.lockstep_engine import LockstepGameEngine
+            from game.rollback_engine import RollbackGameEngine
+
+            engine_class = RollbackGameEngine if sync_mode == protocol.SYNC_MODE_ROLLBACK else LockstepGameEngine
+            engine = engine_class(
+                screen,
+                setup_config=setup,
+                first_server=first_server,
+                conn=client,
+                controlled_paddle=client_paddle,
+                seed=int(lockstep.get("seed", 0)),
+                input_delay=int(lockstep.get("delay", config.NET_LOCKSTEP_DELAY)),
+            )
+        else:
+            # Utiliser NetworkGameEngine pour le mode client
+            from game.network_engine import NetworkGameEngine
+
+            engine = NetworkGameEngine(
+                screen,
+                setup_config=setup,
+                first_server=first_server,
+                network_mode="client",
+                client_conn=client,
+                controlled_paddle=client_paddle,
+                piece_ids=cfg.get("piece_ids"),
+                paddle_mode=cfg.get("paddle_mode", protocol.PADDLE_MODE_STATE),
+                interpolate_ball=config.NET_INTERPOLATE_BALL,
+            )
+            # Appliquer le multiplicateur de vitesse défini par le serveur.
+            engine.ball_speed_factor = float(ball_speed_factor)
         try:
             engine.game_loop()
         finally:
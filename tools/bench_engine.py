@@ -0,0 +1,197 @@
+"""Banc de mesure de la pile réseau complète, sans fenêtre ni socket.
+
+Un moteur hôte et un moteur client sont reliés par un LoopbackTransport et
+appelés tour à tour dans le même processus : chaque tick comprend la frame
+de l'hôte puis celle du client (réception, simulation, encodage et envoi),
+sans rendu. Les entrées des joueurs sont tirées d'un générateur initialisé
+(``--seed``) : deux exécutions d'un même commit simulent la même partie.
+
+``--delay`` retarde chaque message de quelques frames (3 par défaut en mode
+rollback, pour que des prédictions soient fausses et corrigées ; 0 sinon).
+
+En fin de mesure, l'état des deux moteurs est comparé (scores, pièces,
+balle) pour détecter une désynchronisation.
+
+    python tools/bench_engine.py --mode state --ticks 5000
+    python tools/bench_engine.py --mode rollback --rows 8 --output bench.json
+    python tools/bench_engine.py --mode state --delay 6
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict
+
+# Pas de fenêtre : pilote vidéo factice (nécessaire pour charger les images des pièces)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame  # noqa: E402
+
+import config  # noqa: E402
+
+MODES = ("state", "input", "lockstep", "rollback")
+# Latence de la liaison en mémoire (frames) quand --delay n'est pas donné
+DEFAULT_DELAY = {"rollback": 3}
+
+
+def make_keys(paddle, up: bool, down: bool):
+    keys = defaultdict(bool)
+    keys[paddle.up_key] = up
+    keys[paddle.down_key] = down
+    return keys
+
+
+def game_state(engine) -> Dict[str, Any]:
+    """Partie vue par un moteur : ce qui doit être identique chez les deux pairs."""
+    return {
+        "scores": [engine.score_left, engine.score_right],
+        "pieces": sorted([piece.piece_id, piece.life] for piece in engine.pieces_left + engine.pieces_right),
+        "serving": engine.serving,
+        "ball": [round(engine.ball.x, 3), round(engine.ball.y, 3)],
+    }
+
+
+def build_engines(mode: str, screen: pygame.Surface, setup: Dict, seed: int, delay: int = 0):
+    """Crée (hôte, client) reliés par une liaison en mémoire, de latence ``delay`` frames."""
+    from game.lockstep_engine import LockstepGameEngine
+    from game.network_engine import NetworkGameEngine
+    from game.net import protocol
+    from game.net.transport import make_loopback_pair
+    from game.rollback_engine import RollbackGameEngine
+
+    server_conn, client_conn = make_loopback_pair(delay)
+    if mode in ("lockstep", "rollback"):
+        engine_class = LockstepGameEngine if mode == "lockstep" else RollbackGameEngine
+        host = engine_class(screen, setup, "left", conn=server_conn, controlled_paddle="left", seed=seed)
+        client = engine_class(screen, setup, "left", conn=client_conn, controlled_paddle="right", seed=seed)
+        return host, client
+
+    paddle_mode = protocol.PADDLE_MODE_INPUT if mode == "input" else protocol.PADDLE_MODE_STATE
+    host = NetworkGameEngine(
+        screen, setup, "left", network_mode="server", server_conn=server_conn,
+        controlled_paddle="left", paddle_mode=paddle_mode, lag_compensation=config.NET_LAG_COMPENSATION,
+    )
+    client = NetworkGameEngine(
+        screen, setup, "left", network_mode="client", client_conn=client_conn,
+        controlled_paddle="right", piece_ids=host.piece_ids(), paddle_mode=paddle_mode,
+    )
+    return host, client
+
+
+def run(mode: str, ticks: int, rows: int, seed: int, delay: int = 0) -> Dict[str, Any]:
+    from game.ui.pre_game_config import make_default_setup
+
+    pygame.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    random.seed(seed)
+    host, client = build_engines(mode, screen, make_default_setup(rows), seed, delay)
+    lockstep = mode in ("lockstep", "rollback")
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        # Service lancé dès que possible, par le pair qui sert, avec un angle tiré au hasard
+        if host.serving:
+            server = host if not lockstep or host.server_side == "left" else client
+            server.serve_angle = rng.uniform(-0.5, 0.5)
+            if lockstep:
+                server._pending_launch = True
+            else:
+                host._launch_serve()
+        host_keys = make_keys(host.left_paddle, rng.random() < 0.3, rng.random() < 0.3)
+        client_keys = make_keys(client.right_paddle, rng.random() < 0.3, rng.random() < 0.3)
+        host.run_frame(host_keys)
+        client.run_frame(client_keys)
+    elapsed = time.perf_counter() - start
+
+    if lockstep:
+        # Amener les deux pairs au même tick avant de comparer
+        idle = (make_keys(host.left_paddle, False, False), make_keys(client.right_paddle, False, False))
+        for _ in range(4 * config.NET_LOCKSTEP_DELAY + 2 * config.NET_ROLLBACK_WINDOW + 4 * delay):
+            if host.sim_tick == client.sim_tick and not getattr(client, "predicted", None):
+                break
+            host_behind, client_behind = host.sim_tick <= client.sim_tick, client.sim_tick <= host.sim_tick
+            if host_behind:
+                host.run_frame(idle[0])
+            if client_behind:
+                client.run_frame(idle[1])
+    else:
+        # Hôte arrêté : le client reçoit les derniers messages encore en vol
+        idle = make_keys(client.right_paddle, False, False)
+        for _ in range(delay):
+            client.run_frame(idle)
+    host_state, client_state = game_state(host), game_state(client)
+
+    snapshot = host.conn.stats.snapshot() if lockstep else host.server_conn.stats.snapshot()
+    result = {
+        "mode": mode,
+        "rows": rows,
+        "seed": seed,
+        "delay": delay,
+        "ticks": ticks,
+        "elapsed": elapsed,
+        "ticks_per_sec": ticks / elapsed,
+        "us_per_tick": elapsed / ticks * 1e6,
+        "host_bytes_per_tick": snapshot["sent_bytes"] / ticks,
+        "host_messages_per_tick": snapshot["sent"] / ticks,
+        "in_sync": host_state == client_state,
+        "host_state": host_state,
+        "client_state": client_state,
+    }
+    if not lockstep:
+        # Demandes d'état complet après une empreinte différente (0 attendu)
+        result["resyncs"] = client.resyncs
+    if mode == "rollback":
+        result["rollbacks"] = client.rollbacks
+        result["resimulated_ticks"] = client.resimulated_ticks
+    pygame.quit()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de mesure de la pile réseau Chess-Ping (hôte + client en mémoire)")
+    parser.add_argument("--mode", choices=MODES, default="state", help="synchronisation mesurée")
+    parser.add_argument("--ticks", type=int, default=3000, help="ticks simulés (hôte + client)")
+    parser.add_argument("--rows", type=int, choices=[2, 4, 6, 8], default=8)
+    parser.add_argument("--seed", type=int, default=1, help="graine des entrées et de la balle")
+    parser.add_argument(
+        "--delay", type=int, help="latence de la liaison en frames (défaut : 3 en mode rollback, 0 sinon)"
+    )
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    args = parser.parse_args()
+
+    # Configurer le plateau avant d'importer les modules de jeu
+    config.apply_board_rows(args.rows)
+    delay = args.delay if args.delay is not None else DEFAULT_DELAY.get(args.mode, 0)
+    result = run(args.mode, args.ticks, args.rows, args.seed, delay)
+
+    print(
+        f"{result['mode']:9s} {result['ticks']} ticks  latence {result['delay']}  {result['ticks_per_sec']:,.0f} ticks/s  "
+        f"{result['us_per_tick']:.1f} µs/tick  hôte {result['host_bytes_per_tick']:.0f} o/tick "
+        f"({result['host_messages_per_tick']:.1f} msg/tick)"
+    )
+    if result.get("resyncs"):
+        print(f"resynchronisations demandées par le client : {result['resyncs']}")
+    if "rollbacks" in result:
+        print(f"rollbacks {result['rollbacks']}, ticks re-simulés {result['resimulated_ticks']}")
+    if result["in_sync"]:
+        print("Hôte et client synchronisés")
+    else:
+        print(f"DÉSYNCHRONISATION\n  hôte   {result['host_state']}\n  client {result['client_state']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+    sys.exit(0 if result["in_sync"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""Banc de mesure du protocole réseau : encodage, décodage, taille, allocations.
+
+Couvre chaque type de message de ``game/net/protocol.py`` (toute fonction
+``make_*_message`` sans exemple dans ``SAMPLES`` fait échouer le banc), ainsi
+que des lots de messages représentatifs d'un tick de jeu. Pour chaque cas :
+
+- encode : ``make_*_message`` + sérialisation d'une trame (comme ``send_json``) ;
+- decode : ``FrameReader`` (comme ``recv_json_nonblocking``), en mémoire ;
+- socketpair : ``send_json`` d'un côté, ``recv_json_nonblocking`` de l'autre ;
+- shm : même échange par ``ShmConnection`` (anneaux en mémoire partagée) ;
+- octets par message ;
+- allocations par message (tracemalloc) : blocs et octets encore vivants
+  après l'opération, et pic de mémoire transitoire.
+
+Une mesure supplémentaire donne l'aller-retour d'un ping entre deux processus,
+par socketpair et par mémoire partagée (médiane et 99e centile, en µs).
+
+Les résultats sont écrits en JSON (avec le commit git courant) et peuvent être
+comparés à ceux d'une exécution précédente :
+
+    python tools/bench_protocol.py --output bench.json
+    python tools/bench_protocol.py --output bench2.json --compare bench.json
+"""
+
+import argparse
+import gc
+import inspect
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.net import protocol  # noqa: E402
+from game.net.connection import ENCODING, FrameReader, recv_json_nonblocking, send_json  # noqa: E402
+from game.net.shm_transport import ShmConnection  # noqa: E402
+
+
+def _setup(rows: int = 8) -> Dict[str, Any]:
+    counts = {"pawn": rows, "rook": 2, "knight": 2, "bishop": 2, "queen": 1, "king": 1}
+    side = {kind: {"count": count, "life": 3} for kind, count in counts.items()}
+    return {"rows": rows, "white": side, "dark": dict(side)}
+
+
+def _full_state() -> Dict[str, Any]:
+    return protocol.make_full_state_message(
+        pieces=[[piece_id, 3] for piece_id in range(32)],
+        score_left=4,
+        score_right=7,
+        ball=[412.53125, 287.0625, -6.7082, 2.2360],
+        ball_color=(255, 0, 0),
+        paddles={"left": 250, "right": 318},
+        serving=False,
+        server_side="left",
+        serve_angle=0.321,
+        speed_factor=1.2,
+    )
+
+
+def _stamped(message: Dict[str, Any]) -> Dict[str, Any]:
+    return protocol.stamp_message(message, 123456, 98765.432109)
+
+
+# Un exemple réaliste par fonction make_*_message du protocole
+SAMPLES: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "make_config_message": lambda: protocol.make_config_message(
+        _setup(), "left", "left", 1.0, piece_ids={"left": list(range(16)), "right": list(range(16, 32))},
+        session="0123456789abcdef0123456789abcdef",
+    ),
+    "make_paddle_update_message": lambda: _stamped(protocol.make_paddle_update_message("left", 287)),
+    "make_ball_update_message": lambda: _stamped(
+        protocol.make_ball_update_message(412.53125, 287.0625, -6.7082, 2.2360, (255, 0, 0))
+    ),
+    "make_speed_update_message": lambda: _stamped(protocol.make_speed_update_message(1.3)),
+    "make_piece_hit_message": lambda: _stamped(protocol.make_piece_hit_message("right", 21, 2)),
+    "make_piece_destroyed_message": lambda: _stamped(protocol.make_piece_destroyed_message("right", 21)),
+    "make_score_update_message": lambda: _stamped(protocol.make_score_update_message(4, 7)),
+    "make_serve_start_message": lambda: protocol.make_serve_start_message("right"),
+    "make_input_message": lambda: _stamped(protocol.make_input_message(48213, True, False)),
+    "make_lockstep_input_message": lambda: protocol.make_lockstep_input_message(
+        48213, False, True, aim=-464, launch=[1460, -715]
+    ),
+    "make_serve_launch_message": lambda: protocol.make_serve_launch_message(-0.4636476),
+    "make_game_end_message": lambda: protocol.make_game_end_message("left"),
+    "make_join_message": lambda: protocol.make_join_message("salle-42"),
+    "make_ping_message": lambda: protocol.make_ping_message(98765.432109),
+    "make_pong_message": lambda: protocol.make_pong_message(98765.432109, 12345.678901, 12345.679012),
+    "make_heartbeat_message": protocol.make_heartbeat_message,
+    "make_resume_message": lambda: protocol.make_resume_message("0123456789abcdef0123456789abcdef"),
+    "make_full_state_message": lambda: _stamped(_full_state()),
+    "make_state_hash_message": lambda: _stamped(protocol.make_state_hash_message(3735928559)),
+    "make_resync_request_message": lambda: protocol.make_resync_request_message(48213),
+    "make_discover_message": protocol.make_discover_message,
+    "make_announce_message": lambda: protocol.make_announce_message(5050, "poste-salon", dedicated=True),
+}
+
+
+# Lots de messages produits pendant un tick
+def _tick_idle() -> List[Dict[str, Any]]:
+    return [SAMPLES["make_ball_update_message"](), SAMPLES["make_paddle_update_message"]()]
+
+
+def _tick_rally() -> List[Dict[str, Any]]:
+    return [
+        SAMPLES["make_ball_update_message"](),
+        _stamped(protocol.make_paddle_update_message("left", 250)),
+        _stamped(protocol.make_paddle_update_message("right", 318)),
+        SAMPLES["make_ping_message"](),
+    ]
+
+
+def _tick_destroy() -> List[Dict[str, Any]]:
+    return [
+        SAMPLES["make_piece_hit_message"](),
+        SAMPLES["make_piece_destroyed_message"](),
+        SAMPLES["make_score_update_message"](),
+        SAMPLES["make_ball_update_message"](),
+        _stamped(protocol.make_paddle_update_message("left", 250)),
+        _stamped(protocol.make_paddle_update_message("right", 318)),
+    ]
+
+
+BUNDLES: Dict[str, Callable[[], List[Dict[str, Any]]]] = {
+    "tick_idle": _tick_idle,
+    "tick_rally": _tick_rally,
+    "tick_destroy": _tick_destroy,
+}
+
+
+def check_coverage() -> None:
+    """Échoue si un type de message du protocole n'a pas d'exemple."""
+    makers = {
+        name for name, obj in inspect.getmembers(protocol, inspect.isfunction)
+        if name.startswith("make_") and name.endswith("_message")
+    }
+    missing = sorted(makers - SAMPLES.keys())
+    if missing:
+        raise SystemExit(f"Messages sans exemple dans le banc : {', '.join(missing)}")
+
+
+def encode(messages: List[Dict[str, Any]]) -> bytes:
+    """Encode des messages comme le chemin d'envoi (une trame par message)."""
+    return b"".join((json.dumps(message) + "\n").encode(ENCODING) for message in messages)
+
+
+# ---- Mesures ----
+
+
+def timeit(fn: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Meilleure durée (secondes) d'un appel, calibrée pour durer au moins min_time."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def allocations(fn: Callable[[], Any], n: int = 2000) -> Dict[str, float]:
+    """Allocations par appel : blocs et octets retenus, pic transitoire."""
+    gc.collect()
+    tracemalloc.start()
+    kept = []
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(n):
+        kept.append(fn())
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    # La liste ``kept`` elle-même (un pointeur par appel) est exclue
+    return {
+        "blocks_retained": max(0.0, blocks / n),
+        "bytes_retained": max(0.0, size / n - 8),
+        "peak_bytes": (peak - base) / n,
+    }
+
+
+def bench_socketpair(messages: List[Dict[str, Any]], count: int) -> float:
+    """Débit (messages/s) de send_json -> recv_json_nonblocking sur un socketpair."""
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    b.setblocking(False)
+    reader = FrameReader()
+    received = 0
+    start = time.perf_counter()
+    sent = 0
+    while received < count:
+        # Écrire tant que le noyau accepte, puis lire ce qui est arrivé
+        while sent < count:
+            try:
+                send_json(a, messages[sent % len(messages)])
+            except BlockingIOError:
+                break
+            sent += 1
+        received += len(recv_json_nonblocking(b, reader))
+    elapsed = time.perf_counter() - start
+    a.close()
+    b.close()
+    return count / elapsed
+
+
+def bench_shm(messages: List[Dict[str, Any]], count: int) -> float:
+    """Débit (messages/s) de send_game_message -> recv_game_messages sur deux ShmConnection."""
+    name = f"chessping_bench_{os.getpid()}"
+    a = ShmConnection(name, "server")
+    b = ShmConnection(name, "client")
+    received = 0
+    start = time.perf_counter()
+    sent = 0
+    while received < count:
+        # Écrire tant que l'anneau a de la place, puis lire ce qui est arrivé
+        while sent < count and a.send_game_message(messages[sent % len(messages)]):
+            sent += 1
+        received += len(b.recv_game_messages())
+    elapsed = time.perf_counter() - start
+    b.close()
+    a.close()
+    return count / elapsed
+
+
+# Rend la main dans les boucles de scrutation : sur une machine à un seul cœur,
+# l'autre processus ne progresserait sinon qu'à la fin de la tranche de temps
+_yield = getattr(os, "sched_yield", lambda: time.sleep(0))
+
+
+def _echo_socket(sock: socket.socket, count: int) -> None:
+    reader = FrameReader()
+    echoed = 0
+    while echoed < count:
+        messages = recv_json_nonblocking(sock, reader)
+        for msg in messages:
+            send_json(sock, msg)
+            echoed += 1
+        if not messages:
+            _yield()
+
+
+def _echo_shm(name: str, count: int) -> None:
+    conn = ShmConnection(name, "client")
+    echoed = 0
+    while echoed < count:
+        if not conn.rx.read_into(conn.reader):
+            _yield()
+            continue
+        for msg in conn.reader.read_messages():
+            conn.send_game_message(msg)
+            echoed += 1
+    conn.close()
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+def bench_round_trip(count: int) -> Dict[str, Dict[str, float]]:
+    """Aller-retour d'un ping vers un processus écho, par socketpair puis par mémoire partagée.
+
+    Les deux côtés scrutent sans dormir : la mesure est celle du transport,
+    pas du délai de réveil d'un processus endormi.
+    """
+    message = protocol.make_ping_message(0.0)
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    b.setblocking(False)
+    echo = ctx.Process(target=_echo_socket, args=(b, count), daemon=True)
+    echo.start()
+    reader = FrameReader()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        send_json(a, message)
+        while not recv_json_nonblocking(a, reader):
+            _yield()
+        samples.append(time.perf_counter() - start)
+    echo.join()
+    a.close()
+    b.close()
+    results["socketpair"] = _percentiles(samples)
+
+    name = f"chessping_rtt_{os.getpid()}"
+    conn = ShmConnection(name, "server")
+    echo = ctx.Process(target=_echo_shm, args=(name, count), daemon=True)
+    echo.start()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        conn.send_game_message(message)
+        while not conn.rx.read_into(conn.reader):
+            _yield()
+        conn.reader.read_messages()
+        samples.append(time.perf_counter() - start)
+    echo.join()
+    conn.close()
+    results["shm"] = _percentiles(samples)
+    return results
+
+
+def bench_case(
+    name: str, make: Callable[[], List[Dict[str, Any]]], min_time: float, repeat: int, socket_count: int
+) -> Dict[str, Any]:
+    messages = make()
+    data = encode(messages)
+    n = len(messages)
+
+    def do_encode():
+        return encode(make())
+
+    def do_decode():
+        reader = FrameReader(len(data) + FrameReader.MIN_RECV_SPACE)
+        reader.feed(data)
+        return reader.read_messages()
+
+    encode_time = timeit(do_encode, min_time, repeat)
+    decode_time = timeit(do_decode, min_time, repeat)
+    allocs = {
+        "encode": {k: v / n for k, v in allocations(do_encode).items()},
+        "decode": {k: v / n for k, v in allocations(do_decode).items()},
+    }
+    return {
+        "messages": n,
+        "bytes_per_message": len(data) / n,
+        "encode_ops_per_sec": n / encode_time,
+        "decode_ops_per_sec": n / decode_time,
+        "socketpair_msgs_per_sec": bench_socketpair(messages, socket_count),
+        "shm_msgs_per_sec": bench_shm(messages, socket_count),
+        "allocations_per_message": allocs,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results: Dict[str, Any], previous: Dict[str, Any]) -> None:
+    print(f"\nComparaison avec {previous.get('commit')} ({previous.get('date')}) :")
+    for name, case in results["cases"].items():
+        old = previous.get("cases", {}).get(name)
+        if old is None:
+            continue
+        deltas = []
+        for key in ("encode_ops_per_sec", "decode_ops_per_sec", "socketpair_msgs_per_sec", "shm_msgs_per_sec"):
+            if old.get(key):
+                deltas.append(f"{key.split('_')[0]} {100 * (case[key] / old[key] - 1):+.1f}%")
+        size_delta = case["bytes_per_message"] - old.get("bytes_per_message", case["bytes_per_message"])
+        deltas.append(f"taille {size_delta:+.1f} o")
+        print(f"  {name:32s} " + ", ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de mesure du protocole Chess-Ping")
+    parser.add_argument("--output", default="bench_protocol.json", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="résultats JSON d'une exécution précédente")
+    parser.add_argument("--min-time", type=float, default=0.1, help="durée minimale d'une mesure (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="nombre de mesures (meilleure retenue)")
+    parser.add_argument("--socket-count", type=int, default=20000, help="messages par mesure socketpair et shm")
+    parser.add_argument("--rtt-count", type=int, default=5000, help="allers-retours par mesure de latence (0 : aucune)")
+    parser.add_argument("--only", help="ne mesurer que les cas contenant cette chaîne")
+    args = parser.parse_args()
+
+    check_coverage()
+    cases: Dict[str, Callable[[], List[Dict[str, Any]]]] = {
+        name.removeprefix("make_").removesuffix("_message"): (lambda sample=sample: [sample()])
+        for name, sample in SAMPLES.items()
+    }
+    cases.update(BUNDLES)
+    if args.only:
+        cases = {name: make for name, make in cases.items() if args.only in name}
+
+    results = {
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cases": {},
+    }
+    print(f"{'cas':18s} {'octets':>7s} {'encode/s':>11s} {'decode/s':>11s} {'socket/s':>11s} {'shm/s':>11s} {'blocs enc':>9s} {'blocs dec':>9s}")
+    for name, make in cases.items():
+        case = bench_case(name, make, args.min_time, args.repeat, args.socket_count)
+        results["cases"][name] = case
+        allocs = case["allocations_per_message"]
+        print(
+            f"{name:18s} {case['bytes_per_message']:7.1f} {case['encode_ops_per_sec']:11,.0f} "
+            f"{case['decode_ops_per_sec']:11,.0f} {case['socketpair_msgs_per_sec']:11,.0f} "
+            f"{case['shm_msgs_per_sec']:11,.0f} "
+            f"{allocs['encode']['blocks_retained']:9.1f} {allocs['decode']['blocks_retained']:9.1f}"
+        )
+
+    if args.rtt_count > 0:
+        results["round_trip"] = bench_round_trip(args.rtt_count)
+        print("\nAller-retour entre deux processus (µs) :")
+        for transport, rtt in results["round_trip"].items():
+            print(f"  {transport:12s} médiane {rtt['p50_us']:8.1f}   p99 {rtt['p99_us']:8.1f}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
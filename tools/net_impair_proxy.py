@@ -0,0 +1,337 @@
+"""Relais TCP local qui dégrade le lien entre ChessPingClient et ChessPingServer.
+
+Le proxy écoute sur un port local et relaie chaque connexion vers le serveur
+réel, message par message (trames JSON délimitées par '\\n'). Dans chaque sens,
+il applique de façon reproductible (générateur aléatoire initialisé par
+``--seed``) :
+
+- un délai de propagation fixe et une gigue ;
+- un débit maximal (sérialisation des octets sur un lien à débit fixe) ;
+- des pertes et un réordonnancement.
+
+TCP garantit l'ordre et la livraison : en mode ``stream`` (par défaut), une
+perte est donc simulée comme une retransmission (le message, et tous ceux qui
+le suivent, sont retardés d'un RTO), et il n'y a pas de réordonnancement. Le
+mode ``datagram`` émule ce que verrait un futur transport UDP : les messages
+d'état (balle, paddles) peuvent être perdus ou arriver dans le désordre, les
+autres messages restent fiables et ordonnés. Le jeu n'a pas encore de
+transport UDP ; un relais UDP appliquant les mêmes dégradations sera ajouté
+avec lui.
+
+La latence de chaque message (réception par le proxy -> remise au pair) peut
+être journalisée dans un fichier CSV, et un résumé par sens est affiché
+périodiquement.
+
+Usage (serveur du jeu sur le port 5050, le client se connecte au port 5051) :
+    python tools/net_impair_proxy.py --listen-port 5051 --target 127.0.0.1:5050 \\
+        --delay 40 --jitter 10 --bandwidth 256 --loss 0.02 --seed 1 --log latency.csv
+"""
+
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.net import protocol  # noqa: E402
+
+
+# Taille maximale d'une trame lue par le relais
+MAX_FRAME_SIZE = 1024 * 1024
+
+
+class Impairment:
+    """Paramètres de dégradation d'un sens du lien.
+
+    Args:
+        delay: Délai de propagation (secondes)
+        jitter: Écart-type de la gigue (secondes), tronquée à 3 écarts-types
+        bandwidth: Débit maximal (octets/s), 0 = illimité
+        loss: Probabilité de perte d'un message
+        reorder: Probabilité qu'un message d'état soit retardé derrière les
+            suivants (mode datagram uniquement)
+        rto: Retard d'une retransmission simulée (mode stream)
+        datagram: Émuler un transport non fiable pour les messages d'état
+        seed: Graine du générateur aléatoire
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: float = 0.0,
+        loss: float = 0.0,
+        reorder: float = 0.0,
+        rto: float = 0.2,
+        datagram: bool = False,
+        seed: int = 0,
+    ):
+        self.delay = delay
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.loss = loss
+        self.reorder = reorder
+        self.rto = rto
+        self.datagram = datagram
+        self.rng = random.Random(seed)
+
+    def propagation(self) -> float:
+        if self.jitter <= 0:
+            return self.delay
+        noise = max(-3.0, min(3.0, self.rng.gauss(0.0, 1.0))) * self.jitter
+        return max(0.0, self.delay + noise)
+
+
+class LatencyLog:
+    """Latences par message : fichier CSV optionnel et résumé périodique."""
+
+    def __init__(self, path: str | None):
+        self.file = open(path, "w", encoding="utf-8") if path else None
+        if self.file is not None:
+            self.file.write("time,direction,type,bytes,latency_ms,dropped\n")
+        self.samples = {"c2s": [], "s2c": []}
+        self.bytes = {"c2s": 0, "s2c": 0}
+        self.dropped = {"c2s": 0, "s2c": 0}
+
+    def record(self, direction: str, msg_type: str, size: int, latency: float | None) -> None:
+        if latency is None:
+            self.dropped[direction] += 1
+        else:
+            self.samples[direction].append(latency)
+            self.bytes[direction] += size
+        if self.file is not None:
+            latency_ms = "" if latency is None else f"{latency * 1000:.3f}"
+            self.file.write(
+                f"{time.monotonic():.6f},{direction},{msg_type},{size},{latency_ms},{int(latency is None)}\n"
+            )
+
+    def report(self, period: float) -> None:
+        for direction in ("c2s", "s2c"):
+            samples = self.samples[direction]
+            if not samples and not self.dropped[direction]:
+                continue
+            if samples:
+                ordered = sorted(samples)
+                p50 = statistics.median(ordered) * 1000
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+                worst = ordered[-1] * 1000
+            else:
+                p50 = p95 = worst = 0.0
+            print(
+                f"[{direction}] {len(samples)} msg, {self.bytes[direction] / period / 1024:.1f} Ko/s, "
+                f"latence p50 {p50:.1f} ms p95 {p95:.1f} ms max {worst:.1f} ms, "
+                f"{self.dropped[direction]} perdus"
+            )
+            samples.clear()
+            self.bytes[direction] = 0
+            self.dropped[direction] = 0
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+class DirectionPipe:
+    """Un sens du relais : lit les trames, calcule leur instant de remise, les écrit."""
+
+    def __init__(
+        self,
+        name: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        impairment: Impairment,
+        log: LatencyLog,
+    ):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.impairment = impairment
+        self.log = log
+        # File de remise : (instant, numéro d'ordre, instant de réception, type, trame)
+        self.schedule: List[Tuple[float, int, float, str, bytes]] = []
+        self.seq = 0
+        self.link_free_at = 0.0  # fin de sérialisation du message précédent
+        self.last_ordered_at = 0.0  # instant de remise du dernier message ordonné
+        self.wakeup = asyncio.Event()
+        self.eof = False
+
+    def _plan(self, frame: bytes, received: float) -> float | None:
+        """Instant de remise d'une trame, ou None si elle est perdue."""
+        imp = self.impairment
+        msg_type = _message_type(frame)
+        unreliable = imp.datagram and msg_type in protocol.STATE_MESSAGE_TYPES
+
+        # Sérialisation sur le lien à débit limité
+        start = max(received, self.link_free_at)
+        if imp.bandwidth > 0:
+            self.link_free_at = start + len(frame) / imp.bandwidth
+        else:
+            self.link_free_at = start
+        deliver_at = self.link_free_at + imp.propagation()
+
+        if imp.loss > 0 and imp.rng.random() < imp.loss:
+            if unreliable:
+                return None
+            # TCP : retransmission après un RTO, qui bloque aussi les suivants
+            deliver_at += imp.rto
+
+        if unreliable:
+            if imp.reorder > 0 and imp.rng.random() < imp.reorder:
+                deliver_at += imp.delay + 3 * imp.jitter
+            return deliver_at
+
+        # Flux ordonné : jamais avant le message fiable précédent
+        deliver_at = max(deliver_at, self.last_ordered_at)
+        self.last_ordered_at = deliver_at
+        return deliver_at
+
+    async def read_loop(self) -> None:
+        try:
+            while True:
+                frame = await self.reader.readuntil(b"\n")
+                received = time.monotonic()
+                deliver_at = self._plan(frame, received)
+                if deliver_at is None:
+                    self.log.record(self.name, _message_type(frame), len(frame), None)
+                    continue
+                heapq.heappush(self.schedule, (deliver_at, self.seq, received, _message_type(frame), frame))
+                self.seq += 1
+                self.wakeup.set()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            self.eof = True
+            self.wakeup.set()
+
+    async def write_loop(self) -> None:
+        try:
+            while not (self.eof and not self.schedule):
+                if not self.schedule:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                deliver_at = self.schedule[0][0]
+                delay = deliver_at - time.monotonic()
+                if delay > 0:
+                    # Réveil anticipé si un message plus urgent arrive
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                _at, _seq, received, msg_type, frame = heapq.heappop(self.schedule)
+                self.writer.write(frame)
+                self.log.record(self.name, msg_type, len(frame), time.monotonic() - received)
+                await self.writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.writer.close()
+
+
+def _message_type(frame: bytes) -> str:
+    try:
+        return str(json.loads(frame).get("type"))
+    except (ValueError, AttributeError):
+        return "?"
+
+
+async def relay(
+    client_reader: asyncio.StreamReader,
+    client_writer: asyncio.StreamWriter,
+    args: argparse.Namespace,
+    log: LatencyLog,
+    conn_id: int,
+) -> None:
+    host, port = args.target
+    try:
+        server_reader, server_writer = await asyncio.open_connection(host, port, limit=MAX_FRAME_SIZE)
+    except OSError as e:
+        print(f"Connexion au serveur {host}:{port} impossible: {e}")
+        client_writer.close()
+        return
+    print(f"Connexion {conn_id} relayée vers {host}:{port}")
+
+    # Un générateur par sens et par connexion : résultats reproductibles
+    def impairment(offset: int) -> Impairment:
+        return Impairment(
+            delay=args.delay / 1000,
+            jitter=args.jitter / 1000,
+            bandwidth=args.bandwidth * 1024,
+            loss=args.loss,
+            reorder=args.reorder,
+            rto=args.rto / 1000,
+            datagram=args.mode == "datagram",
+            seed=args.seed * 1000 + conn_id * 2 + offset,
+        )
+
+    pipes = [
+        DirectionPipe("c2s", client_reader, server_writer, impairment(0), log),
+        DirectionPipe("s2c", server_reader, client_writer, impairment(1), log),
+    ]
+    await asyncio.gather(*(p.read_loop() for p in pipes), *(p.write_loop() for p in pipes))
+    print(f"Connexion {conn_id} terminée")
+
+
+async def run(args: argparse.Namespace) -> None:
+    log = LatencyLog(args.log)
+    conn_ids = iter(range(1, 1 << 30))
+
+    async def on_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await relay(reader, writer, args, log, next(conn_ids))
+
+    server = await asyncio.start_server(on_client, args.listen_host, args.listen_port, limit=MAX_FRAME_SIZE)
+    print(
+        f"Proxy {args.listen_host}:{args.listen_port} -> {args.target[0]}:{args.target[1]} "
+        f"(délai {args.delay} ms, gigue {args.jitter} ms, débit {args.bandwidth or '∞'} Ko/s, "
+        f"pertes {args.loss:.1%}, mode {args.mode}, graine {args.seed})"
+    )
+    try:
+        async with server:
+            while True:
+                await asyncio.sleep(args.report_period)
+                log.report(args.report_period)
+    finally:
+        log.close()
+
+
+def parse_target(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relais TCP dégradant le lien Chess-Ping")
+    parser.add_argument("--listen-host", default="127.0.0.1")
+    parser.add_argument("--listen-port", type=int, default=5051)
+    parser.add_argument("--target", type=parse_target, default=("127.0.0.1", 5050), help="hôte:port du serveur")
+    parser.add_argument("--delay", type=float, default=0.0, help="délai dans chaque sens (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="écart-type de la gigue (ms)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="débit maximal par sens (Ko/s), 0 = illimité")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilité de perte par message")
+    parser.add_argument("--reorder", type=float, default=0.0, help="probabilité de réordonnancement (mode datagram)")
+    parser.add_argument("--rto", type=float, default=200.0, help="retard d'une retransmission simulée (ms)")
+    parser.add_argument("--mode", choices=["stream", "datagram"], default="stream")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", help="fichier CSV des latences par message")
+    parser.add_argument("--report-period", type=float, default=5.0, help="période du résumé (s)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Rejeu hors ligne d'une capture réseau (cf. game/net/capture.py).
+
+Les trames reçues pendant la session sont redonnées, dans l'ordre et au
+même rythme (ou aussi vite que possible avec ``--fast``), à un
+NetworkGameEngine neuf du même rôle, construit d'après la configuration
+capturée. Les envois du moteur rejoué sont ignorés.
+
+- Capture client : le moteur client reçoit le flux du serveur ; le paddle
+  local et les services du joueur sont repris des trames envoyées.
+- Capture serveur : le moteur serveur re-simule la partie tick par tick,
+  calé sur les ticks horodatant ses messages envoyés, avec les entrées
+  reçues du client. Le paddle et les services de l'hôte sont repris des
+  trames envoyées ; les empreintes d'état capturées (MSG_STATE_HASH) sont
+  comparées à celles de la re-simulation.
+
+Mesures : messages rejoués par seconde, coût de décodage par type de
+message, coût d'application (réception hors décodage) et de simulation par
+frame.
+
+    python tools/replay_capture.py captures/client-20250101-120000-4242.cpcap
+    python tools/replay_capture.py --fast --output replay.json captures/server-....cpcap
+    python tools/replay_capture.py --render --speed 0.5 captures/client-....cpcap
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from game.net import protocol  # noqa: E402
+from game.net.capture import DIR_IN, DIR_META, DIR_OUT, read_capture  # noqa: E402
+
+# Mesure du lien pendant la session : sans objet au rejeu
+IGNORED_TYPES = (protocol.MSG_HEARTBEAT, protocol.MSG_PING, protocol.MSG_PONG)
+
+
+def load_capture(path: str) -> Tuple[str, Dict[str, Any], int, List[Tuple[int, int, bytes]]]:
+    """Lit une capture : (rôle, configuration, index de la configuration, enregistrements)."""
+    records = list(read_capture(path))
+    if not records or records[0][1] != DIR_META:
+        raise ValueError(f"{path} : description de capture manquante")
+    role = json.loads(records[0][2]).get("role")
+    if role not in ("server", "client"):
+        raise ValueError(f"{path} : rôle inconnu {role!r}")
+    # La configuration est envoyée par le serveur, reçue par le client
+    config_dir = DIR_OUT if role == "server" else DIR_IN
+    for index, (_, direction, frame) in enumerate(records):
+        if direction == config_dir and b'"config"' in frame:
+            msg = json.loads(frame)
+            if msg.get("type") == protocol.MSG_CONFIG:
+                return role, msg, index, records
+    raise ValueError(f"{path} : configuration de partie absente de la capture")
+
+
+def make_replay_transport(label: str):
+    from game.net.clock_sync import ClockSync
+    from game.net.connection import FrameReader
+    from game.net.rate_control import SendRateController
+    from game.net.stats import NetStats
+    from game.net.transport import Transport
+
+    class ReplayTransport(Transport):
+        """Connexion rejouée : délivre les trames de la capture, ignore les envois."""
+
+        def __init__(self):
+            self.reader = FrameReader()
+            self.rate_controller = SendRateController()
+            self.clock_sync = ClockSync()
+            self.stats = NetStats(label)
+
+        @property
+        def connected(self) -> bool:
+            return True
+
+        def feed(self, frame: bytes) -> None:
+            self.reader.feed(frame + b"\n")
+
+        def send_game_message(self, message: Dict[str, Any]) -> bool:
+            return True
+
+        def recv_game_messages(self) -> List[Dict[str, Any]]:
+            if self.reader.pending == 0:
+                return []
+            return [msg for msg in self.reader.read_messages(self.stats) if msg.get("type") not in IGNORED_TYPES]
+
+        def update_send_rate(self) -> None:
+            self.rate_controller.update(None, queue_depth=0)
+
+        def close(self) -> None:
+            pass
+
+    return ReplayTransport()
+
+
+def build_engine(screen, role: str, cfg: Dict[str, Any], conn):
+    """Moteur neuf du rôle capturé, construit comme dans main.py."""
+    from game.network_engine import NetworkGameEngine
+
+    host_paddle = cfg.get("host_paddle") or "left"
+    paddle_mode = cfg.get("paddle_mode", protocol.PADDLE_MODE_STATE)
+    if role == "server":
+        engine = NetworkGameEngine(
+            screen, cfg["setup"], cfg.get("first_server", "left"), network_mode="server", server_conn=conn,
+            controlled_paddle=host_paddle, piece_ids=cfg.get("piece_ids"), paddle_mode=paddle_mode,
+            lag_compensation=config.NET_LAG_COMPENSATION,
+        )
+    else:
+        client_paddle = None if cfg.get("spectator") else ("right" if host_paddle == "left" else "left")
+        engine = NetworkGameEngine(
+            screen, cfg["setup"], cfg.get("first_server", "left"), network_mode="client", client_conn=conn,
+            controlled_paddle=client_paddle, piece_ids=cfg.get("piece_ids"), paddle_mode=paddle_mode,
+        )
+    engine.ball_speed_factor = float(cfg.get("ball_speed_factor", 1.0))
+    return engine
+
+
+def index_server_output(records, side: str):
+    """Trames envoyées par un serveur, par tick : paddle de l'hôte, services et empreintes."""
+    host_y, launches, hashes = {}, {}, {}
+    resting = True
+    for _, direction, frame in records:
+        if direction != DIR_OUT:
+            continue
+        msg = json.loads(frame)
+        tick, msg_type = msg.get("tick"), msg.get("type")
+        if not isinstance(tick, int):
+            continue
+        if msg_type == protocol.MSG_PADDLE_UPDATE and msg.get("side") == side:
+            host_y[tick] = msg.get("y")
+        elif msg_type == protocol.MSG_BALL_UPDATE:
+            moving = msg.get("vx", 0) != 0 or msg.get("vy", 0) != 0
+            if resting and moving:
+                launches[tick] = msg
+            resting = not moving
+        elif msg_type == protocol.MSG_STATE_HASH:
+            hashes[tick] = msg.get("hash")
+    return host_y, launches, hashes
+
+
+class Replay:
+    """Rejoue les enregistrements d'une capture dans un moteur.
+
+    Args:
+        engine: Moteur neuf du rôle capturé
+        conn: Sa connexion rejouée
+        role: "server" ou "client"
+        records: Enregistrements de la capture, configuration exclue
+        speed: Facteur de vitesse du rejeu ; 0 pour aller aussi vite que possible
+        render: Afficher chaque frame
+    """
+
+    def __init__(self, engine, conn, role: str, records, speed: float, render: bool):
+        import pygame
+
+        self.pygame = pygame
+        self.engine = engine
+        self.conn = conn
+        self.role = role
+        self.records = records
+        self.speed = speed
+        self.render = render
+        self.idle_keys = defaultdict(bool)
+        self.frames = 0
+        self.poll_ns = 0
+        self.step_ns = 0
+        self.hash_checks = 0
+        self.hash_mismatches = 0
+        self.captured_resyncs = 0
+        if role == "server":
+            self.host_y, self.launches, self.hashes = index_server_output(records, engine.controlled_paddle)
+
+    def _frame(self):
+        """Une frame du moteur : réception (décodage et application), puis simulation."""
+        engine = self.engine
+        start = time.perf_counter_ns()
+        engine.poll_network()
+        polled = time.perf_counter_ns()
+        if self.role == "server":
+            tick = engine.server_tick
+            y = self.host_y.get(tick)
+            paddle = engine._controlled_paddle_object()
+            if paddle is not None and isinstance(y, (int, float)):
+                paddle.rect.y = y
+        engine.step_frame(self.idle_keys)
+        self.poll_ns += polled - start
+        self.step_ns += time.perf_counter_ns() - polled
+        self.frames += 1
+
+        if self.role == "server":
+            launch = self.launches.get(tick)
+            if launch is not None and engine.serving:
+                # Service de l'hôte : balle telle qu'envoyée après le lancer
+                engine.ball.x, engine.ball.y = launch["x"], launch["y"]
+                engine.ball.vx, engine.ball.vy = launch["vx"], launch["vy"]
+                engine.serving = False
+            if tick in self.hashes:
+                self.hash_checks += 1
+                if self.hashes[tick] != engine.state_digest():
+                    self.hash_mismatches += 1
+
+        if self.render:
+            self.pygame.event.pump()
+            engine.draw_frame()
+            self.pygame.display.flip()
+
+    def _on_client_output(self, msg: Dict[str, Any]):
+        """Actions du joueur client, reprises de ses trames envoyées."""
+        engine = self.engine
+        msg_type = msg.get("type")
+        if msg_type == protocol.MSG_PADDLE_UPDATE and msg.get("side") == engine.controlled_paddle:
+            paddle = engine._controlled_paddle_object()
+            if paddle is not None and isinstance(msg.get("y"), (int, float)):
+                paddle.rect.y = msg["y"]
+        elif msg_type == protocol.MSG_SERVE_LAUNCH and engine.serving and isinstance(msg.get("angle"), (int, float)):
+            engine.serve_angle = float(msg["angle"])
+            engine._launch_ball()
+        elif msg_type == protocol.MSG_RESYNC_REQUEST:
+            self.captured_resyncs += 1
+
+    def run(self) -> float:
+        """Rejoue toute la capture. Retourne la durée du rejeu (s)."""
+        frame_ns = int(1e9 / config.NET_SERVER_TICK_RATE)
+        first_ns = self.records[0][0] if self.records else 0
+        next_frame_ns = first_ns
+        start = time.perf_counter()
+        for t_ns, direction, frame in self.records:
+            if self.speed > 0:
+                delay = (t_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            if direction == DIR_IN:
+                self.conn.feed(frame)
+            elif direction == DIR_OUT:
+                msg = json.loads(frame)
+                if self.role == "server":
+                    # Avancer la re-simulation jusqu'au tick qui a produit ce message
+                    tick = msg.get("tick")
+                    while isinstance(tick, int) and self.engine.server_tick < tick:
+                        self._frame()
+                else:
+                    self._on_client_output(msg)
+            if self.role == "client":
+                # Le client avance à cadence fixe, au temps de la capture
+                while next_frame_ns <= t_ns:
+                    self._frame()
+                    next_frame_ns += frame_ns
+        # Dernières trames reçues
+        self._frame()
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rejeu d'une capture réseau Chess-Ping dans un moteur neuf")
+    parser.add_argument("capture", help="fichier .cpcap")
+    parser.add_argument("--fast", action="store_true", help="aussi vite que possible (sinon au rythme capturé)")
+    parser.add_argument("--speed", type=float, default=1.0, help="facteur de vitesse du rejeu rythmé")
+    parser.add_argument("--render", action="store_true", help="afficher la partie rejouée")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    args = parser.parse_args()
+
+    if not args.render:
+        # Pas de fenêtre : pilote vidéo factice (nécessaire pour charger les images des pièces)
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+
+    role, cfg, config_index, records = load_capture(args.capture)
+    if cfg.get("sync_mode") in (protocol.SYNC_MODE_LOCKSTEP, protocol.SYNC_MODE_ROLLBACK):
+        sys.exit(f"{args.capture} : partie en {cfg['sync_mode']}, non rejouable par un NetworkGameEngine")
+    # Configurer le plateau avant d'importer les modules de jeu
+    config.apply_board_rows(cfg["setup"]["rows"])
+
+    pygame.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    conn = make_replay_transport("rejeu")
+    engine = build_engine(screen, role, cfg, conn)
+    game_records = records[config_index + 1:]
+    replay = Replay(engine, conn, role, game_records, 0.0 if args.fast else args.speed, args.render)
+    elapsed = replay.run()
+    pygame.quit()
+
+    snapshot = conn.stats.snapshot()
+    received = snapshot["received"]
+    duration = (game_records[-1][0] - game_records[0][0]) / 1e9 if game_records else 0.0
+    decode_ns = sum(counters["decode_ns"] for counters in snapshot["types"].values())
+    frames = max(replay.frames, 1)
+    result = {
+        "capture": args.capture,
+        "role": role,
+        "records": len(game_records),
+        "capture_seconds": duration,
+        "replay_seconds": elapsed,
+        "frames": replay.frames,
+        "messages": received,
+        "messages_per_sec": received / elapsed if elapsed > 0 else 0.0,
+        "decode_us_per_message": {
+            msg_type: counters["decode_ns"] / counters["received"] / 1000
+            for msg_type, counters in sorted(snapshot["types"].items())
+            if counters["received"]
+        },
+        "apply_us_per_frame": (replay.poll_ns - decode_ns) / frames / 1000,
+        "step_us_per_frame": replay.step_ns / frames / 1000,
+        "malformed_frames": snapshot["malformed_frames"],
+    }
+    if role == "server":
+        result["hash_checks"] = replay.hash_checks
+        result["hash_mismatches"] = replay.hash_mismatches
+    else:
+        result["resyncs"] = engine.resyncs
+        result["captured_resyncs"] = replay.captured_resyncs
+
+    print(
+        f"capture {role} : {result['records']} trames sur {duration:.1f} s, rejouées en {elapsed:.2f} s "
+        f"({result['frames']} frames, {received} messages, {result['messages_per_sec']:,.0f} msg/s)"
+    )
+    for msg_type, us in result["decode_us_per_message"].items():
+        print(f"  décodage {msg_type:16s} {us:7.2f} µs/msg  ({snapshot['types'][msg_type]['received']} messages)")
+    print(f"  application {result['apply_us_per_frame']:.1f} µs/frame, simulation {result['step_us_per_frame']:.1f} µs/frame")
+    if role == "server":
+        print(f"  empreintes d'état : {replay.hash_checks - replay.hash_mismatches}/{replay.hash_checks} identiques")
+    else:
+        print(f"  resynchronisations demandées : {engine.resyncs} au rejeu, {replay.captured_resyncs} dans la capture")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()